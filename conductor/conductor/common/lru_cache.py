@@ -0,0 +1,93 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Thread-safe in-memory cache with LRU eviction and a time to live."""
+
+import collections
+import threading
+import time
+
+import conductor.common.prometheus_metrics as PC
+
+
+class LRUCache(object):
+    """Cache of at most maxsize entries, each valid for ttl seconds.
+
+    The least recently used entry is evicted when the cache is full.
+    A maxsize or ttl of 0 disables the cache. Lookups are counted in
+    the oof_cache_lookups metric under the given name.
+    """
+
+    def __init__(self, name, maxsize, ttl):
+        """Initializer"""
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the value of key, None if missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            self._update_size()
+        PC.CACHE_LOOKUPS.labels(
+            self.name, 'miss' if entry is None else 'hit').inc()
+        return None if entry is None else entry[1]
+
+    def put(self, key, value, ttl=None):
+        """Store value under key, for ttl seconds if given"""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._update_size()
+
+    def pop(self, key):
+        """Remove key from the cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._update_size()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._update_size()
+
+    def _update_size(self):
+        PC.CACHE_SIZE.labels(self.name).set(len(self._entries))
@@ -22,16 +22,47 @@
 import json
 import time
 import os
+import uuid
 
+from oslo_config import cfg
+
+from conductor.common.models import plan_payload
 from conductor.common.models import validate_uuid4
 from conductor.common.music.model import base
 
+CONF = cfg.CONF
+
+# Plan fields that may be large, and may be moved to the payload table
+PAYLOAD_FIELDS = ('template', 'translation', 'solution')
+
+# Key of the reference a plans row holds for a field in the payload table
+PAYLOAD_REF = '__plan_payload__'
+
+# Times a payload is looked up again when it was replaced since the plan
+# was read
+PAYLOAD_READ_ATTEMPTS = 3
+
 
 def current_time_millis():
     """Current time in milliseconds."""
     return int(round(time.time() * 1000))
 
 
+def _payload_property(field):
+    """Plan field that is read from the payload table on first use"""
+
+    def getter(self):
+        if field in self._payload_refs:
+            self._load_payload(field)
+        return self._payload.get(field)
+
+    def setter(self, value):
+        self._payload_refs.pop(field, None)
+        self._payload[field] = value
+
+    return property(getter, setter)
+
+
 class Plan(base.Base):
     """Plan model.
 
@@ -61,9 +92,9 @@ class Plan(base.Base):
     solver_counter = None
     reservation_owner = None
     reservation_counter = None
-    template = None
-    translation = None
-    solution = None
+    template = _payload_property('template')
+    translation = _payload_property('translation')
+    solution = _payload_property('solution')
 
     # Status
     TEMPLATE = "template"  # Template ready for translation
@@ -173,13 +204,122 @@ class Plan(base.Base):
         self.translation = {}
         self.solution = {}
 
+    @classmethod
+    def payload_class(cls):
+        """Return the payload model for this plan model's keyspace"""
+        if '_payload_class' not in cls.__dict__:
+            cls._payload_class = base.create_dynamic_model(
+                keyspace=cls.__keyspace__,
+                baseclass=plan_payload.PlanPayload, classname="PlanPayload")
+        return cls._payload_class
+
+    def _load_payload(self, field):
+        """Read a field from the payload table
+
+        Another worker may have replaced the payload, and deleted the one
+        this plan refers to, since the plan was read. The plans row is
+        then read again for the current value of the field.
+        """
+        ref = self._payload_refs.pop(field)
+        for _ in range(PAYLOAD_READ_ATTEMPTS):
+            row = self.payload_class().query.one(ref)
+            if row is not None:
+                text = plan_payload.decompress(row.data)
+                self._payload[field] = json.loads(text)
+                self._payload_stored[field] = (text, ref)
+                return
+            current = self.query.one(self.id)
+            if current is None:
+                break
+            if field not in current._payload_refs:
+                self._payload[field] = current._payload.get(field)
+                self._payload_stored[field] = current._payload_stored[field]
+                return
+            if current._payload_refs[field] == ref:
+                break
+            ref = current._payload_refs[field]
+        raise ValueError("Plan {} {} payload {} not found".format(
+            self.id, field, ref))
+
+    def _write_payloads(self):
+        """Column values of the payload fields that changed
+
+        Fields not read since the plan was loaded, and fields whose JSON
+        did not change since they were loaded or last written, are left
+        out so the update doesn't rewrite them. Large fields are written
+        to the payload table when split_payloads is set.
+        """
+        values = {}
+        self._payload_pending = {}
+        for field in PAYLOAD_FIELDS:
+            if field in self._payload_refs:
+                continue
+            text = json.dumps(self._payload.get(field))
+            stored_text, stored_ref = \
+                self._payload_stored.get(field, (None, None))
+            if text == stored_text:
+                continue
+
+            ref = None
+            column = text
+            conf = CONF.plan_storage
+            if conf.split_payloads and len(text) > conf.split_threshold:
+                ref = '{}.{}.{}'.format(self.id, field, uuid.uuid4().hex)
+                self.payload_class()(
+                    id=ref, plan_id=self.id, field=field,
+                    data=plan_payload.compress(text,
+                                               conf.compression_level))
+                column = json.dumps({PAYLOAD_REF: ref})
+            values[field] = column
+            self._payload_pending[field] = (text, ref, stored_ref)
+        return values
+
+    def _payload_written(self, success):
+        """Record the outcome of writing the pending payload fields"""
+        pending, self._payload_pending = self._payload_pending, {}
+        self._payload_columns = {}
+        for field, (text, ref, stored_ref) in pending.items():
+            stale_ref = stored_ref if success else ref
+            if success:
+                self._payload_stored[field] = (text, ref)
+            if stale_ref:
+                self.payload_class()(id=stale_ref, _insert=False).delete()
+
+    def insert(self):
+        """Insert plan"""
+        # Payload rows are keyed by plan id, so pick the id up front
+        if not self.id:
+            self.id = str(uuid.uuid4())
+        self._payload_columns = self._write_payloads()
+        try:
+            response = super(Plan, self).insert()
+        except Exception:
+            self._payload_written(False)
+            raise
+        self._payload_written(True)
+        return response
+
     def update(self, condition=None):
         """Update plan
 
         Side-effect: Sets the updated field to the current time.
         """
         self.updated = current_time_millis()
-        return super(Plan, self).update(condition)
+        self._payload_columns = self._write_payloads()
+        try:
+            response = super(Plan, self).update(condition)
+        except Exception:
+            self._payload_written(False)
+            raise
+        self._payload_written(
+            bool(response) and 'FAILURE' not in str(response))
+        return response
+
+    def delete_payloads(self):
+        """Delete the payload table rows of the plan"""
+        payload_class = self.payload_class()
+        for row in payload_class.query.get_plan_by_col('plan_id', self.id):
+            row.delete()
 
     def values(self):
         """Values"""
@@ -191,9 +331,6 @@ class Plan(base.Base):
             'timeout': self.timeout,
             'recommend_max': self.recommend_max,
             'message': self.message,
-            'template': json.dumps(self.template),
-            'translation': json.dumps(self.translation),
-            'solution': json.dumps(self.solution),
             'translation_owner': self.translation_owner,
             'translation_counter': self.translation_counter,
             'translation_begin_timestamp': self.translation_begin_timestamp,
@@ -202,6 +339,8 @@ class Plan(base.Base):
             'reservation_owner': self.reservation_owner,
             'reservation_counter': self.reservation_counter,
         }
+        # Payload fields being written by insert() or update()
+        value_dict.update(self._payload_columns)
         if self.id:
             value_dict['id'] = self.id
         return value_dict
@@ -215,6 +354,13 @@ class Plan(base.Base):
                  translation_begin_timestamp=None, _insert=True):
         """Initializer"""
         super(Plan, self).__init__()
+        # Payload field values, references of fields not read yet, and
+        # the JSON text and reference last stored for each field
+        self._payload = {}
+        self._payload_refs = {}
+        self._payload_stored = {}
+        self._payload_pending = {}
+        self._payload_columns = {}
         self.status = status or self.TEMPLATE
         self.created = created or current_time_millis()
         self.updated = updated or current_time_millis()
@@ -240,9 +386,16 @@ class Plan(base.Base):
             self.solution = solution or {}
             self.insert()
         else:
-            self.template = json.loads(template)
-            self.translation = json.loads(translation)
-            self.solution = json.loads(solution)
+            for field, text in (('template', template),
+                                ('translation', translation),
+                                ('solution', solution)):
+                value = json.loads(text)
+                if isinstance(value, dict) and PAYLOAD_REF in value:
+                    self._payload_refs[field] = value[PAYLOAD_REF]
+                    self._payload_stored[field] = (None, value[PAYLOAD_REF])
+                else:
+                    self._payload[field] = value
+                    self._payload_stored[field] = (text, None)
 
     def __repr__(self):
         """Object representation"""
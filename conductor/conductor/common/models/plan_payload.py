@@ -0,0 +1,158 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Plan Payload Model"""
+
+import base64
+import time
+import zlib
+
+from oslo_config import cfg
+
+from conductor.common.music.model import base
+
+CONF = cfg.CONF
+
+PLAN_STORAGE_OPTS = [
+    cfg.BoolOpt('split_payloads',
+                default=False,
+                help='Set to True to store large plan templates, '
+                     'translations and solutions compressed in the '
+                     'plan_payloads table. The plans row then only holds '
+                     'a reference, and the payload is read when used.'),
+    cfg.IntOpt('split_threshold',
+               default=65536,
+               min=0,
+               help='Size in bytes of the JSON text above which a plan '
+                    'field is moved to the plan_payloads table. '
+                    'Default value is 65536.'),
+    cfg.IntOpt('compression_level',
+               default=6,
+               min=0,
+               max=9,
+               help='zlib compression level for plan payloads. '
+                    'Default value is 6.'),
+]
+
+CONF.register_opts(PLAN_STORAGE_OPTS, group='plan_storage')
+
+
+def current_time_millis():
+    """Current time in milliseconds."""
+    return int(round(time.time() * 1000))
+
+
+def compress(text, level=6):
+    """Compress text to a zlib + base64 ASCII string"""
+    data = zlib.compress(text.encode('utf-8'), level)
+    return base64.b64encode(data).decode('ascii')
+
+
+def decompress(data):
+    """Inverse of compress()"""
+    return zlib.decompress(base64.b64decode(data)).decode('utf-8')
+
+
+class PlanPayload(base.Base):
+    """Plan payload model.
+
+    Holds one version of a large plan field (template, translation or
+    solution) as compressed JSON. The plans row references the version
+    in use, so a payload written by an update that then failed its
+    condition is never read.
+
+    DO NOT use this class directly!
+
+    Only create PlanPayload-based classes using:
+    base.create_dynamic_model(keyspace=KEYSPACE,
+        baseclass=PlanPayload, classname=CLASS).
+    The table will be automatically created if it doesn't exist.
+    """
+
+    __tablename__ = "plan_payloads"
+    __keyspace__ = None
+
+    id = None  # pylint: disable=C0103
+    plan_id = None
+    field = None
+    data = None
+    created = None
+
+    @classmethod
+    def schema(cls):
+        """Return schema."""
+        schema = {
+            'id': 'text',  # <plan id>.<field>.<version>
+            'plan_id': 'text',  # Plan ID in UUID4 format
+            'field': 'text',  # Plan field name
+            'data': 'text',  # zlib compressed, base64 encoded JSON
+            'created': 'bigint',  # Creation time in msec from epoch
+            'PRIMARY KEY': '(id)',
+        }
+        return schema
+
+    @classmethod
+    def indexes(cls):
+        """Return indexes """
+        indexes = [
+            'plan_id'
+        ]
+        return indexes
+
+    @classmethod
+    def atomic(cls):
+        """Use atomic operations"""
+        return False
+
+    @classmethod
+    def pk_name(cls):
+        """Primary key name"""
+        return 'id'
+
+    def pk_value(self):
+        """Primary key value"""
+        return self.id
+
+    def values(self):
+        """Values"""
+        value_dict = {
+            'id': self.id,
+            'plan_id': self.plan_id,
+            'field': self.field,
+            'data': self.data,
+            'created': self.created,
+        }
+        return value_dict
+
+    def __init__(self, id=None, plan_id=None, field=None, data=None,
+                 created=None, _insert=True):
+        """Initializer"""
+        super(PlanPayload, self).__init__()
+        self.id = id
+        self.plan_id = plan_id
+        self.field = field
+        self.data = data
+        self.created = created or current_time_millis()
+
+        if _insert:
+            self.insert()
+
+    def __repr__(self):
+        """Object representation"""
+        return '<PlanPayload {}>'.format(self.id)
@@ -0,0 +1,140 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Work Item Model"""
+
+import time
+
+from conductor.common.music.model import base
+
+
+def current_time_millis():
+    """Current time in milliseconds."""
+    return int(round(time.time() * 1000))
+
+
+class WorkItem(base.Base):
+    """Work item model.
+
+    A work item tells the service owning a pipeline stage that a plan
+    is ready for it. Items are claimed by setting owner and lease_expiry
+    with a conditional update on the values last read, so only one
+    worker wins a given item.
+
+    DO NOT use this class directly!
+
+    Only create WorkItem-based classes using:
+    base.create_dynamic_model(keyspace=KEYSPACE,
+        baseclass=WorkItem, classname=CLASS).
+    The table will be automatically created if it doesn't exist.
+    """
+
+    __tablename__ = "work_queue"
+    __keyspace__ = None
+
+    id = None  # pylint: disable=C0103
+    stage = None
+    plan_id = None
+    owner = None
+    lease_expiry = None
+    created = None
+
+    @classmethod
+    def schema(cls):
+        """Return schema."""
+        schema = {
+            'id': 'text',  # <stage>.<plan id>
+            'stage': 'text',  # Pipeline stage (see work_queue.STAGES)
+            'plan_id': 'text',  # Plan ID in UUID4 format
+            'owner': 'text',  # Claiming worker, empty when unclaimed
+            'lease_expiry': 'bigint',  # Lease end in msec from epoch
+            'created': 'bigint',  # Creation time in msec from epoch
+            'PRIMARY KEY': '(id)',
+        }
+        return schema
+
+    @classmethod
+    def indexes(cls):
+        """Return indexes """
+        indexes = [
+            'stage'
+        ]
+        return indexes
+
+    @classmethod
+    def atomic(cls):
+        """Use atomic operations"""
+        return True
+
+    @classmethod
+    def pk_name(cls):
+        """Primary key name"""
+        return 'id'
+
+    def pk_value(self):
+        """Primary key value"""
+        return self.id
+
+    @property
+    def claimed(self):
+        """True if the item is held under a lease that has not expired"""
+        return bool(self.owner) and \
+            self.lease_expiry > current_time_millis()
+
+    def values(self):
+        """Values"""
+        value_dict = {
+            'id': self.id,
+            'stage': self.stage,
+            'plan_id': self.plan_id,
+            'owner': self.owner,
+            'lease_expiry': self.lease_expiry,
+            'created': self.created,
+        }
+        return value_dict
+
+    def __init__(self, stage=None, plan_id=None, id=None, owner=None,
+                 lease_expiry=None, created=None, _insert=True):
+        """Initializer"""
+        super(WorkItem, self).__init__()
+        self.stage = stage
+        self.plan_id = plan_id
+        self.id = id or "{}.{}".format(stage, plan_id)
+        self.owner = owner or ""
+        self.lease_expiry = lease_expiry or 0
+        self.created = created or current_time_millis()
+
+        if _insert:
+            self.insert()
+
+    def __repr__(self):
+        """Object representation"""
+        return '<WorkItem {}>'.format(self.id)
+
+    def __json__(self):
+        """JSON representation"""
+        json_ = {}
+        json_['id'] = self.id
+        json_['stage'] = self.stage
+        json_['plan_id'] = self.plan_id
+        json_['owner'] = self.owner
+        json_['lease_expiry'] = self.lease_expiry
+        json_['created'] = self.created
+
+        return json_
@@ -98,6 +98,7 @@ MUSIC_API_OPTS = [
 ]
 
 CONF.register_opts(MUSIC_API_OPTS, group='music_api')
+CONF.register_opts(rest.POOL_OPTS, group='music_api')
 
 
 class MusicAPI(object):
@@ -137,7 +138,9 @@ class MusicAPI(object):
             'log_debug': CONF.music_api.debug,
             'connect_timeout': CONF.music_api.connect_timeout,
             'read_timeout': CONF.music_api.read_timeout,
+            'name': 'music',
         }
+        kwargs.update(rest.pool_kwargs(CONF.music_api))
         self.rest = rest.REST(**kwargs)
 
         music_pwd = CONF.music_api.aafpass
@@ -0,0 +1,94 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Adaptive polling for the plan pipeline services."""
+
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+
+import conductor.common.prometheus_metrics as PC
+
+LOG = log.getLogger(__name__)
+
+CONF = cfg.CONF
+
+POLLING_OPTS = [
+    cfg.BoolOpt('adaptive',
+                default=False,
+                help='Set to True to poll again right away while work '
+                     'keeps arriving, and back off exponentially up to '
+                     'max_interval while idle. When False, services wait '
+                     'their configured interval before every poll.'),
+    cfg.FloatOpt('max_interval',
+                 default=30.0,
+                 min=0,
+                 help='Longest time in seconds an idle service waits '
+                      'between polls. Default value is 30.'),
+    cfg.FloatOpt('backoff_factor',
+                 default=2.0,
+                 min=1.0,
+                 help='Factor the wait grows by after each idle poll. '
+                      'Default value is 2.'),
+]
+
+CONF.register_opts(POLLING_OPTS, group='polling')
+
+
+class AdaptivePoller(object):
+    """Decide how long a service waits before it polls again.
+
+    Call wait() before each poll and record() with whether the poll
+    found work. The first idle poll after work waits the base interval,
+    each following idle poll waits backoff_factor times longer, up to
+    max_interval.
+    """
+
+    def __init__(self, conf, name, interval):
+        """Initializer"""
+        self.conf = conf
+        self.name = name
+        self.interval = interval
+        self.current = interval
+
+        PC.POLL_INTERVAL.labels(self.name).set(self.current)
+
+    def wait(self):
+        """Sleep until the next poll is due"""
+        if self.current > 0:
+            time.sleep(self.current)
+
+    def record(self, found_work):
+        """Adjust the wait after a poll"""
+        PC.POLLS.labels(self.name, 'work' if found_work else 'idle').inc()
+
+        if not self.conf.polling.adaptive:
+            self.current = self.interval
+        elif found_work:
+            self.current = 0
+        else:
+            ceiling = max(self.conf.polling.max_interval, self.interval)
+            self.current = min(
+                max(self.current * self.conf.polling.backoff_factor,
+                    self.interval),
+                ceiling)
+
+        PC.POLL_INTERVAL.labels(self.name).set(self.current)
+        return self.current
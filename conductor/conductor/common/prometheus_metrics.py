@@ -21,6 +21,7 @@
 from oslo_config import cfg
 from oslo_log import log
 from prometheus_client import Counter
+from prometheus_client import Gauge
 from prometheus_client import start_http_server
 
 LOG = log.getLogger(__name__)
@@ -95,6 +96,75 @@ HPA_CLOUD_REGION_UNSUCCESSFUL = Counter(
     ['customer_name', 'service_name', 'cloud_region']
 )
 
+# Polling stats of the translator, solver and reservation loops
+POLL_INTERVAL = Gauge(
+    'oof_poll_interval_seconds',
+    'Seconds a service waits before its next poll',
+    ['service']
+)
+
+POLLS = Counter(
+    'oof_polls',
+    'Number of polls, by whether they found work or not',
+    ['service', 'result']
+)
+
+# HTTP connection pool stats of the REST clients
+HTTP_POOL_MAXSIZE = Gauge(
+    'oof_http_pool_maxsize',
+    'Maximum number of connections kept open per host',
+    ['client']
+)
+
+HTTP_POOL_CONNECTIONS = Gauge(
+    'oof_http_pool_connections',
+    'Number of idle connections kept open by the connection pools',
+    ['client']
+)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    'oof_http_requests_in_flight',
+    'Number of HTTP requests in progress',
+    ['client']
+)
+
+# A&AI inventory cache stats of the data service
+AAI_CACHE_AGE = Gauge(
+    'oof_aai_cache_age_seconds',
+    'Seconds since the A&AI cache was last refreshed'
+)
+
+AAI_CACHE_REFRESH_DURATION = Gauge(
+    'oof_aai_cache_refresh_duration_seconds',
+    'Seconds the last A&AI cache refresh took'
+)
+
+AAI_CACHE_REFRESHES = Counter(
+    'oof_aai_cache_refreshes',
+    'Number of A&AI cache refreshes, by result',
+    ['result']
+)
+
+# In-memory object caches
+CACHE_LOOKUPS = Counter(
+    'oof_cache_lookups',
+    'Number of cache lookups, by whether they hit or missed',
+    ['cache', 'result']
+)
+
+CACHE_SIZE = Gauge(
+    'oof_cache_size',
+    'Number of entries in the cache',
+    ['cache']
+)
+
+SINGLE_FLIGHT_CALLS = Counter(
+    'oof_single_flight_calls',
+    'Number of calls, by whether they were issued or coalesced with an '
+    'identical call in flight',
+    ['client', 'result']
+)
+
 
 def _init_metrics(port_index):
     '''
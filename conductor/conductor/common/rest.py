@@ -25,15 +25,59 @@ from os import path
 from oslo_config import cfg
 from oslo_log import log
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from six.moves.urllib import parse
+from urllib3.util.retry import Retry
 
+import conductor.common.prometheus_metrics as PC
 from conductor.i18n import _LE, _LW  # pylint: disable=W0212
 
 LOG = log.getLogger(__name__)
 
 CONF = cfg.CONF
 
+# Connection pool options. Register these in the group of each REST
+# client (music_api, aai, multicloud, sdnc), then pass pool_kwargs() of
+# that group on to REST.
+POOL_OPTS = [
+    cfg.IntOpt('pool_connections',
+               default=10,
+               min=1,
+               help='Number of per-host connection pools to cache.'),
+    cfg.IntOpt('pool_maxsize',
+               default=10,
+               min=1,
+               help='Maximum number of connections kept open per host. '
+                    'Also the number of concurrent requests a client '
+                    'issues at once.'),
+    cfg.BoolOpt('pool_block',
+                default=False,
+                help='Set to True to wait for a free connection when the '
+                     'pool is used up instead of opening a connection '
+                     'that is discarded after use.'),
+    cfg.BoolOpt('keep_alive',
+                default=True,
+                help='Set to False to close connections after each '
+                     'request.'),
+    cfg.IntOpt('http_retries',
+               default=0,
+               min=0,
+               help='Number of times the connection pool retries failed '
+                    'connects, before the client level retries apply.'),
+]
+
+
+def pool_kwargs(group_conf):
+    """Return REST connection pool kwargs from a POOL_OPTS config group"""
+    return {
+        'pool_connections': group_conf.pool_connections,
+        'pool_maxsize': group_conf.pool_maxsize,
+        'pool_block': group_conf.pool_block,
+        'keep_alive': group_conf.keep_alive,
+        'http_retries': group_conf.http_retries,
+    }
+
 
 class RESTException(IOError):
     """Basic exception for errors raised by REST"""
@@ -63,7 +107,9 @@ class REST(object):
     def __init__(self, server_url, retries=3, connect_timeout=3.05,
                  read_timeout=12.05, username=None, password=None,
                  cert_file=None, cert_key_file=None, ca_bundle_file=None,
-                 log_debug=False):
+                 log_debug=False, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, keep_alive=True, http_retries=0,
+                 name='rest'):
         """Initializer."""
         parsed = parse.urlparse(server_url, 'http')
         if parsed.scheme not in ('http', 'https'):
@@ -94,11 +140,42 @@ class REST(object):
 
         # Use connection pooling, kthx.
         # http://docs.python-requests.org/en/master/user/advanced/
+        self.name = name
+        self.pool_maxsize = int(pool_maxsize)
         self.session = requests.Session()
+        self.adapter = HTTPAdapter(
+            pool_connections=int(pool_connections),
+            pool_maxsize=self.pool_maxsize,
+            pool_block=pool_block,
+            max_retries=Retry(total=int(http_retries), read=0,
+                              status=0, redirect=False))
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        PC.HTTP_POOL_MAXSIZE.labels(self.name).set(self.pool_maxsize)
+
+    def pool_connection_count(self):
+        """Number of idle connections kept open by the per-host pools"""
+        pools = self.adapter.poolmanager.pools
+        count = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            # Free slots of the pool queue hold None until a connection
+            # is returned to them.
+            queue = pool.pool if pool else None
+            if queue is not None:
+                with queue.mutex:
+                    count += sum(1 for conn in queue.queue
+                                 if conn is not None)
+        return count
 
     def request(self, method='get', content_type='application/json',
-                path='', headers=None, data=None):
-        """Performs HTTP request. Returns a requests.Response object."""
+                path='', headers=None, data=None, timeout=None):
+        """Performs HTTP request. Returns a requests.Response object.
+
+        timeout, if given, overrides the read timeout of this request.
+        """
         if method not in ('post', 'get', 'put', 'delete'):
             method = 'get'
         method_fn = getattr(self.session, method)
@@ -119,7 +196,8 @@ class REST(object):
         kwargs = {
             'data': data_str,
             'headers': full_headers,
-            'timeout': self.timeout,
+            'timeout': (self.timeout[0], float(timeout))
+            if timeout else self.timeout,
             'cert': (self.cert, self.key),
             'verify': self.verify,
             'stream': False,
@@ -135,6 +213,19 @@ class REST(object):
             if data:
                 LOG.debug("Request Body: {}".format(json.dumps(data)))
         response = None
+        in_flight = PC.HTTP_REQUESTS_IN_FLIGHT.labels(self.name)
+        in_flight.inc()
+        try:
+            response = self._request_with_retries(method_fn, full_url, kwargs)
+        finally:
+            in_flight.dec()
+            PC.HTTP_POOL_CONNECTIONS.labels(self.name).set(
+                self.pool_connection_count())
+        return response
+
+    def _request_with_retries(self, method_fn, full_url, kwargs):
+        """Performs HTTP request, retrying if it fails."""
+        response = None
         for attempt in range(self.retries):
             if attempt > 0:
                 # No need to show 400 bad requests from Music - Ignorable when lock cannot be received at one particular point in time
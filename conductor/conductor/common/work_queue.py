@@ -0,0 +1,278 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Leased per-stage work queue for the plan pipeline.
+
+Without the queue, the translator, solver and reservation services
+each scan the plans table by status and race to flip the status of the
+first plan they see; every worker but one wastes a MUSIC write. With
+the queue enabled, each stage only looks at its own work items, claims
+a few of them under a lease and skips items leased to someone else.
+Workers start claiming at a random offset, so they seldom contend for
+the same item. The conditional plan status update is kept as the final
+ownership check.
+
+While a plan is worked on, a heartbeat thread keeps renewing the lease
+on its item. A lease that runs out (e.g. the owner died) makes the item
+claimable again. The next owner then applies the stage's usual timeout recovery
+to the plan.
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log
+
+from conductor.common.models.plan import Plan
+from conductor.i18n import _LE
+from conductor.i18n import _LW
+
+LOG = log.getLogger(__name__)
+
+CONF = cfg.CONF
+
+WORK_QUEUE_OPTS = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Set to True to have the translator, solver and '
+                     'reservation services claim plans from the work '
+                     'queue table instead of scanning plans by status.'),
+    cfg.IntOpt('lease_duration',
+               default=60,
+               min=1,
+               help='Seconds a claimed work item stays leased to its '
+                    'owner. The lease is renewed every third of it while '
+                    'the plan is worked on. An item whose plan is still '
+                    'in progress is checked again once the lease runs '
+                    'out. Default value is 60.'),
+    cfg.IntOpt('claim_batch',
+               default=1,
+               min=1,
+               help='Maximum number of work items a worker claims at '
+                    'once. Default value is 1.'),
+]
+
+CONF.register_opts(WORK_QUEUE_OPTS, group='work_queue')
+
+# Pipeline stages
+TRANSLATOR = "translator"
+SOLVER = "solver"
+RESERVATION = "reservation"
+
+# Plan statuses that keep a plan in a stage. The first status in each
+# list is the one that hands the plan over to the stage.
+STAGES = {
+    TRANSLATOR: [Plan.TEMPLATE, Plan.TRANSLATING],
+    SOLVER: [Plan.TRANSLATED, Plan.SOLVING],
+    RESERVATION: [Plan.SOLVED, Plan.RESERVING],
+}
+
+
+def current_time_millis():
+    """Current time in milliseconds."""
+    return int(round(time.time() * 1000))
+
+
+def stage_for_status(status):
+    """Return the stage a plan with this status is handed over to"""
+    for stage, statuses in STAGES.items():
+        if statuses[0] == status:
+            return stage
+    return None
+
+
+class WorkQueue(object):
+    """Work queue for one pipeline stage.
+
+    Services call claim_plans() in place of scanning plans by status.
+    Plans handed out by the previous call are settled first: if a plan
+    has left the stage, its item is released and the plan is queued for
+    the stage it moved to.
+    """
+
+    def __init__(self, conf, work_item_class, plan_class, stage, owner=None):
+        """Initializer"""
+        self.conf = conf
+        self.WorkItem = work_item_class
+        self.Plan = plan_class
+        self.stage = stage
+        self.statuses = STAGES[stage]
+        self.owner = owner or "{}.{}".format(socket.gethostname(),
+                                             os.getpid())
+
+        # Claimed items not yet handed out, and (item, plan) pairs
+        # handed out by the last claim_plans() call.
+        self._claimed = []
+        self._active = []
+
+        # Renews the leases on the items in _active
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        self._stopped = threading.Event()
+
+    @property
+    def lease_duration_ms(self):
+        return self.conf.work_queue.lease_duration * 1000
+
+    def put(self, plan_id, stage=None):
+        """Queue a plan for a stage (this queue's stage by default)
+
+        Writing the row again resets any lease on it.
+        """
+        stage = stage or self.stage
+        LOG.debug("Queueing plan {} for stage {}".format(plan_id, stage))
+        return self.WorkItem(stage=stage, plan_id=plan_id)
+
+    def route(self, plan):
+        """Queue a plan for the stage its current status hands it to"""
+        stage = stage_for_status(plan.status)
+        if stage:
+            return self.put(plan.id, stage=stage)
+
+    def _take(self, item, lease_expiry):
+        """Conditionally set owner and lease, return True on success"""
+        condition = {
+            "owner": item.owner,
+            "lease_expiry": item.lease_expiry,
+        }
+        owner, expiry = item.owner, item.lease_expiry
+        item.owner = self.owner
+        item.lease_expiry = lease_expiry
+        response = item.update(condition=condition)
+        if response and 'SUCCESS' in response:
+            return True
+        item.owner, item.lease_expiry = owner, expiry
+        return False
+
+    def claim(self, limit=None):
+        """Claim up to limit unleased items in this stage"""
+        limit = limit or self.conf.work_queue.claim_batch
+        items = [item for item in
+                 self.WorkItem.query.get_plan_by_col("stage", self.stage)
+                 if not item.claimed]
+
+        # Start at a random offset so that workers polling at the same
+        # time seldom try to claim the same item.
+        random.shuffle(items)
+
+        claimed = []
+        for item in items:
+            if len(claimed) >= limit:
+                break
+            expiry = current_time_millis() + self.lease_duration_ms
+            if self._take(item, expiry):
+                claimed.append(item)
+        return claimed
+
+    def renew(self, item):
+        """Extend the lease on an item this worker holds"""
+        if item.owner != self.owner:
+            return False
+        expiry = current_time_millis() + self.lease_duration_ms
+        return self._take(item, expiry)
+
+    def release(self, item):
+        """Remove an item once its plan has left the stage"""
+        item.delete()
+
+    @property
+    def heartbeat_interval(self):
+        """Seconds between two renewals of the leases in use"""
+        return self.conf.work_queue.lease_duration / 3.0
+
+    def heartbeat(self):
+        """Renew the leases on the items whose plans are worked on"""
+        with self._lock:
+            for item, plan in self._active:
+                if not self.renew(item):
+                    LOG.warning(_LW("Unable to renew the lease on plan {} "
+                                    "for stage {}").format(plan.id,
+                                                           self.stage))
+
+    def _run_heartbeat(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception:
+                LOG.exception(_LE("Work queue heartbeat failed"))
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(
+                target=self._run_heartbeat,
+                name="work-queue-{}".format(self.stage))
+            self._heartbeat.daemon = True
+            self._heartbeat.start()
+
+    def stop(self):
+        """Stop renewing leases"""
+        self._stopped.set()
+
+    def settle(self):
+        """Settle the plans handed out by the last claim_plans() call"""
+        with self._lock:
+            active, self._active = self._active, []
+        for item, plan in active:
+            found = self.Plan.query.get_plan_by_col("id", plan.id)
+            if found and found[0].status in self.statuses:
+                # Still in progress, look again when the lease runs out.
+                continue
+            self.release(item)
+            if found:
+                self.route(found[0])
+
+    def claim_plans(self):
+        """Return the next plan(s) for this stage to work on"""
+        self.settle()
+        if not self._claimed:
+            self._claimed = self.claim()
+
+        while self._claimed:
+            item = self._claimed.pop(0)
+            # Renew leases that are more than half used up while waiting.
+            remaining = item.lease_expiry - current_time_millis()
+            if remaining < self.lease_duration_ms / 2 and \
+                    not self.renew(item):
+                continue
+            found = self.Plan.query.get_plan_by_col("id", item.plan_id)
+            if not found or found[0].status not in self.statuses:
+                # Stale item. Queue the plan for its new stage, in case
+                # whoever moved it on died before doing so.
+                if found:
+                    self.route(found[0])
+                self.release(item)
+                continue
+            with self._lock:
+                self._active.append((item, found[0]))
+            self._start_heartbeat()
+            return [found[0]]
+        return []
+
+    def backfill(self):
+        """Queue plans already in this stage that have no work item"""
+        queued = set(item.plan_id for item in
+                     self.WorkItem.query.get_plan_by_col("stage", self.stage))
+        for status in self.statuses:
+            for plan in self.Plan.query.get_plan_by_col("status", status):
+                if plan.id not in queued:
+                    self.put(plan.id)
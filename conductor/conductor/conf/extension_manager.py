@@ -0,0 +1,44 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+from oslo_config import cfg
+
+from conductor.i18n import _
+
+# Registered in the inventory_provider, vim_controller and
+# service_controller groups.
+EXT_MANAGER_MAP_OPTS = [
+    cfg.BoolOpt('concurrent_map',
+                default=True,
+                help=_('Set to True to call the method of all extensions '
+                       'concurrently. When set to False, extensions are '
+                       'called one after the other.')),
+    cfg.FloatOpt('map_timeout',
+                 default=0,
+                 min=0,
+                 help=_('Seconds to wait for each extension when calling '
+                        'extensions concurrently. The result of an extension '
+                        'that does not answer in time is left out. 0 waits '
+                        'forever.')),
+    cfg.DictOpt('extension_timeouts',
+                default={},
+                help=_('map_timeout of each extension, e.g. '
+                       'generator:5,aai:120.')),
+]
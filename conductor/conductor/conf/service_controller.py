@@ -19,13 +19,14 @@
 
 from oslo_config import cfg
 
+from conductor.conf import extension_manager
 from conductor.i18n import _
 
 SVC_CONTROLLER_EXT_MANAGER_OPTS = [
     cfg.ListOpt('extensions',
                 default=['sdnc'],
                 help=_('Extensions list to use')),
-]
+] + extension_manager.EXT_MANAGER_MAP_OPTS
 
 
 def register_extension_manager_opts(cfg=cfg.CONF):
@@ -19,6 +19,7 @@
 
 import json
 import uuid
+from conductor.common import work_queue
 from conductor.solver.orders_lock.orders_lock_service import OrdersLockingService
 from conductor.solver.triage_tool.triage_tool_service import TriageToolService
 from oslo_log import log
@@ -32,9 +33,13 @@ CONF = cfg.CONF
 class ControllerRPCEndpoint(object):
     """Controller Endpoint"""
 
-    def __init__(self, conf, plan_class):
+    def __init__(self, conf, plan_class, work_item_class=None):
         self.conf = conf
         self.Plan = plan_class
+        self.work_queue = None
+        if work_item_class:
+            self.work_queue = work_queue.WorkQueue(
+                conf, work_item_class, plan_class, work_queue.TRANSLATOR)
         self.OrdersLockingService = OrdersLockingService()
         self.TriageToolService = TriageToolService()
 
@@ -49,6 +54,9 @@ class ControllerRPCEndpoint(object):
         new_plan = self.Plan(name, timeout, recommend_max, template,
                              status=status)
 
+        if new_plan and self.work_queue:
+            self.work_queue.put(new_plan.id)
+
         if new_plan:
             plan_json = {
                 "plan": {
@@ -76,6 +84,9 @@ class ControllerRPCEndpoint(object):
             plans = self.Plan.query.all()
         for the_plan in plans:
             the_plan.delete()
+            # Also when split_payloads was turned off since the plan
+            # was stored
+            the_plan.delete_payloads()
 
         rtn = {
             'response': {},
@@ -21,6 +21,7 @@ import cotyledon
 
 from conductor.common.models import plan
 from conductor.common.models import order_lock
+from conductor.common.models import work_item
 from conductor.common.music import api
 from conductor.common.music import messaging as music_messaging
 from conductor.common.music.model import base
@@ -80,6 +81,10 @@ class ControllerServiceLauncher(object):
             keyspace=conf.keyspace, baseclass=plan.Plan, classname="Plan")
         self.OrderLock = base.create_dynamic_model(
             keyspace=conf.keyspace, baseclass=order_lock.OrderLock, classname="OrderLock")
+        self.WorkItem = None
+        if conf.work_queue.enabled:
+            self.WorkItem = base.create_dynamic_model(
+                keyspace=conf.keyspace, baseclass=work_item.WorkItem, classname="WorkItem")
 
         if not self.Plan:
             raise
@@ -91,7 +96,8 @@ class ControllerServiceLauncher(object):
         if transport:
             topic = "controller"
             target = music_messaging.Target(topic=topic)
-            endpoints = [rpc.ControllerRPCEndpoint(self.conf, self.Plan), ]
+            endpoints = [rpc.ControllerRPCEndpoint(self.conf, self.Plan,
+                                                   self.WorkItem), ]
             flush = not self.conf.controller.concurrent
             kwargs = {'transport': transport,
                       'target': target,
@@ -103,7 +109,8 @@ class ControllerServiceLauncher(object):
                        args=(self.conf,), kwargs=kwargs)
 
             kwargs = {'plan_class': self.Plan,
-                      'order_locks': self.OrderLock}
+                      'order_locks': self.OrderLock,
+                      'work_item_class': self.WorkItem}
             svcmgr.add(translator_svc.TranslatorService,
                        workers=self.conf.controller.workers,
                        args=(self.conf,), kwargs=kwargs)
@@ -24,6 +24,7 @@ import json
 import os
 import uuid
 
+import futurist
 from oslo_config import cfg
 from oslo_log import log
 import six
@@ -56,6 +57,16 @@ LOG = log.getLogger(__name__)
 
 CONF = cfg.CONF
 
+TRANSLATOR_OPTS = [
+    cfg.IntOpt('resolve_demands_workers',
+               default=10,
+               min=1,
+               help='Number of demands of a plan the translator asks the '
+                    'data service to resolve at once.'),
+]
+
+CONF.register_opts(TRANSLATOR_OPTS, group='controller')
+
 
 class Translator(object):
     """Template translator.
@@ -304,6 +315,7 @@ class Translator(object):
         # Look at each demand
         demands_copy = copy.deepcopy(demands)
         parsed = {}
+        demand_calls = []
         for name, requirements in demands_copy.items():
             inventory_candidates = []
             for requirement in requirements:
@@ -463,15 +475,21 @@ class Translator(object):
                         " list are not mutually exclusive for demand"
                         " {}".format(name)
                     )
-            response = self.data_service.call(
-                ctxt=ctxt,
-                method="resolve_demands",
-                args=args)
+            demand_calls.append((name, inventory_candidates, ctxt, args))
+
+        # Ask conductor-data for the candidates of all demands at once,
+        # then handle the responses in demand order.
+        responses = self._resolve_demands_all(
+            [(ctxt, args) for _, _, ctxt, args in demand_calls])
+        triage_data = []
+        triage_data_trans = None
+        for (name, inventory_candidates, _, _), response in \
+                zip(demand_calls, responses):
+            triage_data.append(response and response.get('trans'))
+            triage_data_trans = self._merge_triage_data(triage_data)
 
             resolved_demands = \
                 response and response.get('resolved_demands')
-            triage_data_trans = \
-                response and response.get('trans')
 
             required_candidates = resolved_demands \
                 .get('required_candidates')
@@ -505,6 +523,46 @@ class Translator(object):
         self.triageTranslator.thefinalCallTrans(triage_data_trans)
         return parsed
 
+    def _resolve_demands_all(self, calls):
+        """Call resolve_demands of the data service concurrently.
+
+        :param calls: list of (ctxt, args) of each call
+        :return: list of the responses, in call order
+        """
+        if not calls:
+            return []
+        workers = min(self.conf.controller.resolve_demands_workers,
+                      len(calls))
+        executor = futurist.ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(self.data_service.call, ctxt=ctxt,
+                                       method="resolve_demands", args=args)
+                       for ctxt, args in calls]
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _merge_triage_data(triage_data):
+        """Merge the triage data returned for several demands.
+
+        The data service returns the dropped candidates of all the demands
+        of the plan it has resolved so far, so the same entries can come
+        back in more than one response.
+        """
+        merged = None
+        for trans in triage_data:
+            if not trans:
+                continue
+            if merged is None:
+                merged = {'plan_id': trans.get('plan_id'),
+                          'plan_name': trans.get('plan_name'),
+                          'translator_triage': []}
+            for dropped in trans.get('translator_triage', []):
+                if dropped not in merged['translator_triage']:
+                    merged['translator_triage'].append(dropped)
+        return merged
+
     def validate_hpa_constraints(self, req_prop, value):
         for para in value.get(req_prop):
             # Make sure there is at least one
@@ -27,6 +27,8 @@ from oslo_config import cfg
 from oslo_log import log
 
 from conductor.common.config_loader import load_config_file
+from conductor.common import poller
+from conductor.common import work_queue
 from conductor.common.music import api
 from conductor.common.music import messaging as music_messaging
 from conductor.common.utils import conductor_logging_util as log_util
@@ -105,9 +107,21 @@ class TranslatorService(cotyledon.Service):
         if not self.conf.controller.concurrent:
             self._reset_template_status()
 
+        self.poller = poller.AdaptivePoller(
+            conf, "translator", self.conf.controller.polling_interval)
+
+        self.work_queue = None
+        if kwargs.get('work_item_class'):
+            self.work_queue = work_queue.WorkQueue(
+                conf, kwargs.get('work_item_class'), self.Plan,
+                work_queue.TRANSLATOR)
+            if not self.conf.controller.concurrent:
+                self.work_queue.backfill()
+
     def _gracefully_stop(self):
         """Gracefully stop working on things"""
-        pass
+        if self.work_queue:
+            self.work_queue.stop()
 
     def millisec_to_sec(self, millisec):
         """Convert milliseconds to seconds"""
@@ -191,18 +205,25 @@ class TranslatorService(cotyledon.Service):
     def __check_for_templates(self):
         """Wait for the polling interval, then do the real template check."""
 
-        # Wait for at least poll_interval sec
-        polling_interval = self.conf.controller.polling_interval
-        time.sleep(polling_interval)
+        # Wait for at least poll_interval sec, or less while plans keep
+        # arriving if adaptive polling is enabled
+        self.poller.wait()
         # Look for plans with the status set to TEMPLATE
 
-        # Instead of using the query.all() method, now creating an index for 'status'
-        # field in conductor.plans table, and query plans by status columns
-        template_plans = self.Plan.query.get_plan_by_col("status", self.Plan.TEMPLATE)
-        translating_plans = self.Plan.query.get_plan_by_col("status", self.Plan.TRANSLATING)
+        if self.work_queue:
+            # Only look at plans claimed from the translator work queue
+            plans = self.work_queue.claim_plans()
+        else:
+            # Instead of using the query.all() method, now creating an index for 'status'
+            # field in conductor.plans table, and query plans by status columns
+            template_plans = self.Plan.query.get_plan_by_col("status", self.Plan.TEMPLATE)
+            translating_plans = self.Plan.query.get_plan_by_col("status", self.Plan.TRANSLATING)
+
+            # combine the plans with status = 'template' and 'translating' together
+            plans = template_plans + translating_plans
 
-        # combine the plans with status = 'template' and 'translating' together
-        plans = template_plans + translating_plans
+        self.poller.record(any(plan.status == self.Plan.TEMPLATE
+                               for plan in plans))
 
         for plan in plans:
             # If there's a template to be translated, do it!
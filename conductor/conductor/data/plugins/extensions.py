@@ -0,0 +1,96 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+"""Extension manager calling its extensions concurrently."""
+
+import concurrent.futures
+import time
+
+import futurist
+from oslo_log import log
+import stevedore
+from stevedore import exception
+
+from conductor.i18n import _LE
+
+LOG = log.getLogger(__name__)
+
+
+class ConcurrentManager(stevedore.named.NamedExtensionManager):
+    """Named extension manager whose map calls extensions concurrently.
+
+    Every extension is given its own timeout, taken from the
+    extension_timeouts and map_timeout options of the group. An
+    extension that does not answer in time is logged and left out of
+    the results, whether map exceptions are propagated or not. The
+    results keep the order of the extensions.
+
+    Every map runs the extensions in a thread pool of its own, with one
+    thread per extension. An extension that timed out is not cancelled:
+    it keeps running until it returns, but the pool is not waited for,
+    so a hung extension cannot hold up or starve later maps.
+    """
+
+    def __init__(self, group_conf, namespace, names, **kwargs):
+        self.group_conf = group_conf
+        super(ConcurrentManager, self).__init__(namespace, names, **kwargs)
+
+    def timeout(self, name):
+        """Seconds to wait for extension name, None to wait forever"""
+        timeout = self.group_conf.extension_timeouts.get(
+            name, self.group_conf.map_timeout)
+        return float(timeout) or None
+
+    def map(self, func, *args, **kwds):
+        if not self.extensions:
+            raise exception.NoMatches(
+                'No %s extensions found' % self.namespace)
+        timeouts = [self.timeout(e.name) for e in self.extensions]
+        if not self.group_conf.concurrent_map or (
+                len(self.extensions) == 1 and timeouts[0] is None):
+            return super(ConcurrentManager, self).map(func, *args, **kwds)
+
+        executor = futurist.ThreadPoolExecutor(
+            max_workers=len(self.extensions))
+        try:
+            return self._map(executor, timeouts, func, *args, **kwds)
+        finally:
+            executor.shutdown(wait=False)
+
+    def _map(self, executor, timeouts, func, *args, **kwds):
+        start = time.time()
+        futures = [executor.submit(func, e, *args, **kwds)
+                   for e in self.extensions]
+        response = []
+        for e, future, timeout in zip(self.extensions, futures, timeouts):
+            if timeout is not None:
+                timeout = max(start + timeout - time.time(), 0)
+            try:
+                response.append(future.result(timeout=timeout))
+            except concurrent.futures.TimeoutError:
+                LOG.error(_LE("Extension {} did not answer within {} "
+                              "seconds, leaving it out").format(
+                    e.name, self.timeout(e.name)))
+            except Exception:
+                if self.propagate_map_exceptions:
+                    raise
+                LOG.exception(_LE("Error calling extension {}, leaving "
+                                  "it out").format(e.name))
+        return response
@@ -19,16 +19,23 @@
 #
 
 import copy
+import fcntl
 import json
+import os
 import re
+import threading
 import time
 import uuid
 
+import futurist
 from oslo_config import cfg
 from oslo_log import log
 
 
+import conductor.common.prometheus_metrics as PC
+from conductor.common import lru_cache
 from conductor.common import rest
+from conductor.common import single_flight
 from conductor.data.plugins import constants
 from conductor.data.plugins.inventory_provider import base
 from conductor.data.plugins.inventory_provider.candidates.candidate import Candidate
@@ -39,6 +46,7 @@ from conductor.data.plugins.inventory_provider.candidates.transport_candidate im
 from conductor.data.plugins.inventory_provider.candidates.vfmodule_candidate import VfModule
 from conductor.data.plugins.inventory_provider import hpa_utils
 from conductor.data.plugins.inventory_provider.utils import aai_utils
+from conductor.data.plugins.inventory_provider.utils import cache_snapshot
 from conductor.data.plugins.triage_translator.triage_translator import TraigeTranslator
 from conductor.i18n import _LE
 from conductor.i18n import _LI
@@ -54,8 +62,103 @@ AAI_OPTS = [
                     'in minutes.'),
     cfg.IntOpt('complex_cache_refresh_interval',
                default=1440,
-               help='Interval with which to refresh the local complex cache, '
+               help='Time complexes are kept in the A&AI object cache, '
                     'in minutes.'),
+    cfg.IntOpt('object_cache_size',
+               default=1000,
+               min=0,
+               help='Maximum number of A&AI objects kept in the object '
+                    'cache, keyed by their link. The least recently used '
+                    'object is evicted first. 0 disables the cache.'),
+    cfg.IntOpt('object_cache_ttl',
+               default=30,
+               min=0,
+               help='Time vservers, pservers and generic VNFs read by '
+                    'their link are kept in the object cache, in seconds. '
+                    'Searches and other queries are never cached. 0 '
+                    'disables the cache.'),
+    cfg.BoolOpt('flavor_catalog_references',
+                default=True,
+                help='Set to True to have cloud candidates carry a '
+                     'reference to the flavors of their cloud region '
+                     '(flavor_catalog) instead of the flavors. HPA '
+                     'constraints then match the flavors cached by the '
+                     'data service.'),
+    cfg.IntOpt('hpa_match_cache_ttl',
+               default=3600,
+               min=0,
+               help='Time the flavor matched to an HPA requirement in a '
+                    'cloud region is cached, in seconds. Results are '
+                    'matched again when the flavors of the region change. '
+                    '0 disables the cache.'),
+    cfg.IntOpt('role_cache_ttl',
+               default=300,
+               min=0,
+               help='Time the cloud regions of a network role and the '
+                    'replication role of a candidate host are cached, in '
+                    'seconds. 0 disables the cache.'),
+    cfg.IntOpt('cache_refresh_workers',
+               default=10,
+               min=1,
+               help='Number of complex and flavor requests issued at once '
+                    'while refreshing the local cache, and of candidate '
+                    'role requests issued at once.'),
+    cfg.FloatOpt('cache_refresh_timeout',
+                 default=30.0,
+                 min=0,
+                 help='Read timeout in seconds of each complex and flavor '
+                      'request issued while refreshing the local cache.'),
+    cfg.IntOpt('resolve_workers',
+               default=10,
+               min=1,
+               help='Number of generic VNFs of a service or vfmodule '
+                    'demand resolved at once.'),
+    cfg.BoolOpt('cache_background_refresh',
+                default=True,
+                help='Set to True to refresh the local cache in a '
+                     'background thread of each worker, and keep serving '
+                     'the current cache while it refreshes. When False, '
+                     'the request that finds the cache expired refreshes '
+                     'it and waits for the refresh.'),
+    cfg.IntOpt('cache_refresh_retry_interval',
+               default=60,
+               min=1,
+               help='Seconds the background refresher waits before '
+                    'retrying a failed refresh of the local cache. With '
+                    'cache_shared, also the seconds between checks of the '
+                    'snapshot by the workers that do not refresh it.'),
+    cfg.BoolOpt('cache_incremental_refresh',
+                default=True,
+                help='Set to True to only fetch the complex and flavors '
+                     'of cloud regions that are new or whose '
+                     'resource-version changed when refreshing the local '
+                     'cache. The whole cache is still rebuilt every '
+                     'cache_full_refresh_interval minutes.'),
+    cfg.IntOpt('cache_full_refresh_interval',
+               default=10080,
+               min=0,
+               help='Interval with which to rebuild the whole local cache '
+                    'when cache_incremental_refresh is set, in minutes. '
+                    'Keep it a multiple of cache_refresh_interval: if it '
+                    'is not larger, every refresh is a full one.'),
+    cfg.StrOpt('cache_snapshot_file',
+               default='',
+               help='File the local cache is saved to after each refresh, '
+                    'and loaded from at startup so the data service can '
+                    'answer before its first refresh completes. Leave '
+                    'empty to not keep a snapshot.'),
+    cfg.BoolOpt('cache_shared',
+                default=False,
+                help='Set to True to have a single data service worker '
+                     'refresh the local cache from A&AI and save it to '
+                     'cache_snapshot_file, and the other workers load it '
+                     'from there. Requires cache_snapshot_file and '
+                     'cache_background_refresh.'),
+    cfg.IntOpt('cache_snapshot_max_age',
+               default=1440,
+               min=0,
+               help='Age in minutes beyond which the cache snapshot is not '
+                    'loaded at startup.'),
     cfg.StrOpt('table_prefix',
                default='aai',
                help='Data Store table prefix.'),
@@ -95,6 +198,22 @@ AAI_OPTS = [
 ]
 
 CONF.register_opts(AAI_OPTS, group='aai')
+CONF.register_opts(rest.POOL_OPTS, group='aai')
+
+
+class CachedResponse(object):
+    """Successful A&AI response served from the object cache"""
+
+    status_code = 200
+    reason = 'OK'
+
+    def __init__(self, body):
+        """Initializer"""
+        self._body = body
+
+    def json(self):
+        # Callers may change what they get, so hand out a copy
+        return copy.deepcopy(self._body)
 
 
 class AAI(base.InventoryProviderBase):
@@ -113,9 +232,10 @@ class AAI(base.InventoryProviderBase):
         self.verify = self.conf.aai.certificate_authority_bundle_file
         self.cache_refresh_interval = self.conf.aai.cache_refresh_interval
         self.last_refresh_time = None
+        self.last_full_refresh_time = None
         self.complex_cache_refresh_interval = \
             self.conf.aai.complex_cache_refresh_interval
-        self.complex_last_refresh_time = None
+        self.object_cache_ttl = self.conf.aai.object_cache_ttl
         self.timeout = self.conf.aai.aai_rest_timeout
         self.retries = self.conf.aai.aai_retries
         self.username = self.conf.aai.username
@@ -124,7 +244,28 @@ class AAI(base.InventoryProviderBase):
 
         # Cache is initially empty
         self._aai_cache = {}
-        self._aai_complex_cache = {}
+        self._calls = single_flight.SingleFlight('aai')
+        self._object_cache = lru_cache.LRUCache(
+            'aai', self.conf.aai.object_cache_size,
+            self.conf.aai.object_cache_ttl)
+        self._flavor_indexes = {}
+        self._hpa_match_cache = lru_cache.LRUCache(
+            'aai_hpa_matches', self.conf.aai.object_cache_size,
+            self.conf.aai.hpa_match_cache_ttl)
+        self._role_cache = lru_cache.LRUCache(
+            'aai_roles', self.conf.aai.object_cache_size,
+            self.conf.aai.role_cache_ttl)
+        self._refresh_lock = threading.Lock()
+
+        # Background refresher, started in each worker process
+        self._refresher_lock = threading.Lock()
+        self._refresher_pid = None
+        self._refresher_thread = None
+        self._leader_file = None
+        self._leader_pid = None
+        self._snapshot_mtime = None
+        self._refresher_stop = threading.Event()
+        PC.AAI_CACHE_AGE.set_function(self._cache_age)
 
     def initialize(self):
 
@@ -132,28 +273,73 @@ class AAI(base.InventoryProviderBase):
         # Initialize the Python requests
         self._init_python_request()
 
-        # Refresh the cache once for now
-        self._refresh_cache()
-
-        # TODO(jdandrea): Make this periodic, and without a True condition!
-        # executor = futurist.ThreadPoolExecutor()
-        # while True:
-        #     fut = executor.submit(self.refresh_cache)
-        #     fut.result()
-        #
-        #     # Now wait for the next time.
-        #     # FIXME(jdandrea): Put inside refresh_cache()?
-        #     refresh_interval = self.conf.aai.cache_refresh_interval
-        #     time.sleep(refresh_interval)
-        # executor.shutdown()
+        # Load the cache once, from the snapshot of a previous run if
+        # there is one. With cache_background_refresh, each worker then
+        # keeps it up to date in a background thread.
+        if not self._load_snapshot():
+            self._refresh_cache()
 
     def name(self):
         """Return human-readable name."""
         return "A&AI"
 
     def invoke_method(self, arg):
-        if arg.pop('method_name') == "get_candidates_with_hpa":
-            return hpa_utils.get_candidates_with_hpa(arg)
+        method_name = arg.pop('method_name')
+        if method_name == "get_candidates_with_hpa":
+            return hpa_utils.get_candidates_with_hpa(
+                arg, self._get_flavor_index, self._hpa_match_cache)
+        elif method_name == "get_hpa_flavor_mappings":
+            return hpa_utils.get_hpa_flavor_mappings(
+                arg, self._get_flavor_index, self._hpa_match_cache)
+
+    def _get_flavor_index(self, candidate):
+        """Return the HPA flavor index of the cloud region of candidate.
+
+        The index is built once per cached region entry, so again only
+        when a refresh changed the region. The region is the one of the
+        flavor_catalog reference of the candidate, if any. None when the
+        region is not cached, or when the candidate carries flavors other
+        than the ones of the cached region. A flavor_catalog reference to
+        flavors a refresh has since changed is moved to the current ones,
+        so the candidate is matched and versioned against them.
+        """
+        catalog = candidate.get('flavor_catalog')
+        region_id = catalog.get('cloud_region_id') if catalog \
+            else candidate.get('candidate_id')
+        entry = self._aai_cache.get('cloud_region', {}).get(region_id)
+        if not entry or not isinstance(entry.get('flavors'), dict):
+            if catalog:
+                LOG.error(_LE("Flavors of cloud region {} are not in the "
+                              "cache").format(region_id))
+            return None
+        if not catalog and candidate.get('flavors') != entry['flavors']:
+            return None
+        indexed = self._flavor_indexes.get(region_id)
+        if indexed is None or indexed[0] is not entry:
+            indexed = (entry, hpa_utils.FlavorIndex(
+                entry['flavors'].get('flavor') or [],
+                entry.get('flavors_version')))
+            self._flavor_indexes[region_id] = indexed
+        index = indexed[1]
+        if catalog and catalog.get('version') != index.fingerprint:
+            LOG.info(_LI("Flavors of cloud region {} changed since the "
+                         "candidate was resolved, matching the current "
+                         "ones").format(region_id))
+            catalog['version'] = index.fingerprint
+        return index
+
+    def _set_cache(self, cache):
+        """Swap in a new A&AI cache.
+
+        Flavor indexes of regions the new cache dropped or replaced are
+        dropped too.
+        """
+        self._aai_cache = cache
+        regions = cache.get('cloud_region', {})
+        self._flavor_indexes = {
+            region_id: indexed
+            for region_id, indexed in list(self._flavor_indexes.items())
+            if regions.get(region_id) is indexed[0]}
 
     @staticmethod
     def _get_version_from_string(string):
@@ -164,9 +350,9 @@ class AAI(base.InventoryProviderBase):
         """Return a URL path with the A&AI version prepended"""
         return '/{}/{}'.format(self.version, path.lstrip('/'))
 
-    def _request(self, method='get', path='/', data=None,
-                 context=None, value=None):
-        """Performs HTTP request."""
+    @staticmethod
+    def _request_kwargs(method='get', path='/', data=None, timeout=None):
+        """Keyword args of the REST request for an A&AI call"""
         headers = {
             'X-FromAppId': 'CONDUCTOR',
             'X-TransactionId': str(uuid.uuid4()),
@@ -177,6 +363,42 @@ class AAI(base.InventoryProviderBase):
             "headers": headers,
             "data": data,
         }
+        if timeout:
+            kwargs["timeout"] = timeout
+        return kwargs
+
+    def _request(self, method='get', path='/', data=None,
+                 context=None, value=None, timeout=None, cache_ttl=None):
+        """Performs HTTP request.
+
+        If cache_ttl is given, the body of a successful GET without data
+        is kept in the object cache for cache_ttl seconds. Only pass it
+        when reading an object by its link. Concurrent GET requests of
+        the same path share one A&AI request.
+        """
+        cached = method == 'get' and data is None and cache_ttl is not None
+        if cached:
+            body = self._object_cache.get(path)
+            if body is not None:
+                return CachedResponse(body)
+
+        if method == 'get' and data is None:
+            response = self._calls.do(path, self._send, method, path, data,
+                                      context, value, timeout)
+        else:
+            response = self._send(method, path, data, context, value,
+                                  timeout)
+        if cached and response is not None and response.status_code == 200:
+            try:
+                self._object_cache.put(path, response.json(), cache_ttl)
+            except ValueError:
+                LOG.debug("A&AI response of {} is not JSON, not "
+                          "cached".format(path))
+        return response
+
+    def _send(self, method, path, data, context, value, timeout):
+        """Sends an HTTP request to A&AI"""
+        kwargs = self._request_kwargs(method, path, data, timeout)
 
         # TODO(jdandrea): Move timing/response logging into the rest helper?
         start_time = time.time()
@@ -184,7 +406,11 @@ class AAI(base.InventoryProviderBase):
         elapsed = time.time() - start_time
         LOG.debug("Total time for A&AI request "
                   "({0:}: {1:}): {2:.3f} sec".format(context, value, elapsed))
+        self._log_response(response, path, context, value)
+        return response
 
+    def _log_response(self, response, path, context, value):
+        """Log a missing or unsuccessful A&AI response"""
         if response is None:
             LOG.error(_LE("No response from A&AI ({}: {})").
                       format(context, value))
@@ -194,7 +420,6 @@ class AAI(base.InventoryProviderBase):
                       format(context, value,
                              response.status_code, response.reason,
                              self.base, path))
-        return response
 
     def _init_python_request(self):
 
@@ -208,138 +433,389 @@ class AAI(base.InventoryProviderBase):
             "ca_bundle_file": self.verify,
             "log_debug": self.conf.debug,
             "read_timeout": self.timeout,
+            "name": "aai",
         }
+        kwargs.update(rest.pool_kwargs(self.conf.aai))
         self.rest = rest.REST(**kwargs)
 
+    def _cache_expired(self):
+        """Return True if the A&AI cache is due for a refresh"""
+        return not self.last_refresh_time or \
+            (time.time() - self.last_refresh_time) > \
+            self.cache_refresh_interval * 60
+
     def _refresh_cache(self):
         """Refresh the A&AI cache."""
-        if not self.last_refresh_time or \
-                (time.time() - self.last_refresh_time) > \
-                self.cache_refresh_interval * 60:
-            # TODO(jdandrea): This is presently brute force.
-            # It does not persist to Music. A general purpose ORM caching
-            # object likely needs to be made, with a key (hopefully we
-            # can use one that is not just a UUID), a value, and a
-            # timestamp. The other alternative is to not use the ORM
-            # layer and call the API directly, but that is
-            # also trading one set of todos for another ...
-
-            # Get all A&AI sites
-            LOG.info(_LI("**** Refreshing A&AI cache *****"))
-            path = self._aai_versioned_path(
-                '/cloud-infrastructure/cloud-regions/?depth=0')
-            response = self._request(
-                path=path, context="cloud regions", value="all")
-            if response is None:
+        if not self._cache_expired():
+            return
+        with self._refresh_lock:
+            # Another caller may have refreshed it while we waited
+            if not self._cache_expired():
                 return
-            regions = {}
-            if response.status_code == 200:
-                body = response.json()
-                regions = body.get('cloud-region', {})
-            if not regions:
-                # Nothing to update the cache with
-                LOG.error(_LE("A&AI returned no regions, link: {}{}").
-                          format(self.base, path))
+
+            start_time = time.time()
+            refreshed = self._load_cache()
+            elapsed = time.time() - start_time
+            PC.AAI_CACHE_REFRESHES.labels(
+                'success' if refreshed else 'failure').inc()
+            PC.AAI_CACHE_REFRESH_DURATION.set(elapsed)
+            if refreshed:
+                LOG.info(_LI("**** A&AI cache refresh complete "
+                             "({0:.3f} sec) *****").format(elapsed))
+                self._save_snapshot()
+
+    def _load_cache(self):
+        """Load the A&AI cache. Returns True if it was replaced."""
+        # TODO(jdandrea): This is presently brute force.
+        # It does not persist to Music. A general purpose ORM caching
+        # object likely needs to be made, with a key (hopefully we
+        # can use one that is not just a UUID), a value, and a
+        # timestamp. The other alternative is to not use the ORM
+        # layer and call the API directly, but that is
+        # also trading one set of todos for another ...
+
+        # Get all A&AI sites
+        LOG.info(_LI("**** Refreshing A&AI cache *****"))
+        path = self._aai_versioned_path(
+            '/cloud-infrastructure/cloud-regions/?depth=0')
+        response = self._request(
+            path=path, context="cloud regions", value="all")
+        if response is None:
+            return False
+        regions = {}
+        if response.status_code == 200:
+            body = response.json()
+            regions = body.get('cloud-region', {})
+        if not regions:
+            # Nothing to update the cache with
+            LOG.error(_LE("A&AI returned no regions, link: {}{}").
+                      format(self.base, path))
+            return False
+
+        # Unchanged regions are reused, except on a full refresh, which
+        # also picks up complex and flavor changes that do not change the
+        # resource-version of their region.
+        full = self._full_refresh_due()
+        previous = {} if full else self._aai_cache.get('cloud_region', {})
+
+        # The cache is built aside and swapped in when complete, so
+        # readers keep using the previous one until then.
+        cache = {
+            'cloud_region': self._get_cloud_regions(regions, previous),
+            'service': {},
+        }
+        self._set_cache(cache)
+        self.last_refresh_time = time.time()
+        if full:
+            self.last_full_refresh_time = self.last_refresh_time
+        return True
+
+    def _full_refresh_due(self):
+        """Return True if the next refresh must rebuild the whole cache"""
+        if not self.conf.aai.cache_incremental_refresh or \
+                not self.last_full_refresh_time:
+            return True
+        return (time.time() - self.last_full_refresh_time) > \
+            self.conf.aai.cache_full_refresh_interval * 60
+
+    def _save_snapshot(self):
+        """Write the A&AI cache to the snapshot file, if configured"""
+        path = self.conf.aai.cache_snapshot_file
+        if not path:
+            return
+        snapshot = {
+            'last_refresh_time': self.last_refresh_time,
+            'last_full_refresh_time': self.last_full_refresh_time,
+            'cache': self._aai_cache,
+        }
+        try:
+            cache_snapshot.save(path, snapshot)
+        except (IOError, OSError) as exc:
+            LOG.error(_LE("Unable to save the A&AI cache snapshot {}: {}").
+                      format(path, exc))
+
+    def _load_snapshot(self):
+        """Load the A&AI cache from the snapshot file, if usable.
+
+        The snapshot keeps its refresh times, so an expired one is served
+        until the next refresh reconciles it with A&AI.
+        """
+        path = self.conf.aai.cache_snapshot_file
+        if not path:
+            return False
+        try:
+            self._snapshot_mtime = os.path.getmtime(path)
+        except OSError:
+            return False
+        snapshot = cache_snapshot.load(path)
+        if not snapshot or not snapshot.get('cache'):
+            return False
+        last_refresh_time = snapshot.get('last_refresh_time') or 0
+        max_age = self.conf.aai.cache_snapshot_max_age * 60
+        if time.time() - last_refresh_time > max_age:
+            LOG.info(_LI("A&AI cache snapshot {} is too old, "
+                         "ignoring it").format(path))
+            return False
+        # Snapshots saved before flavors were versioned
+        for region in snapshot['cache'].get('cloud_region', {}).values():
+            if region.get('flavors') and not region.get('flavors_version'):
+                region['flavors_version'] = \
+                    hpa_utils.get_fingerprint(region['flavors'])
+        self._set_cache(snapshot['cache'])
+        self.last_refresh_time = last_refresh_time
+        self.last_full_refresh_time = snapshot.get('last_full_refresh_time')
+        LOG.info(_LI("A&AI cache loaded from snapshot {} ({} regions)").
+                 format(path, len(self._aai_cache.get('cloud_region', {}))))
+        return True
+
+    def _cache_age(self):
+        """Seconds since the A&AI cache was loaded, 0 if never"""
+        if not self.last_refresh_time:
+            return 0
+        return time.time() - self.last_refresh_time
+
+    def _start_refresher(self):
+        """Start the background cache refresher of this process.
+
+        Plugins are initialized before the data service forks its
+        workers, and threads do not survive a fork, so each worker
+        starts its own refresher the first time it reads the cache.
+        """
+        pid = os.getpid()
+        if self._refresher_pid == pid:
+            return
+        with self._refresher_lock:
+            if self._refresher_pid == pid:
                 return
-            cache = {
-                'cloud_region': {},
-                'service': {},
-            }
-            for region in regions:
-                cloud_region_id = region.get('cloud-region-id')
-
-                LOG.debug("Working on region '{}' ".format(cloud_region_id))
-
-                cloud_region_version = region.get('cloud-region-version')
-                cloud_owner = region.get('cloud-owner')
-                cloud_type = region.get('cloud-type')
-                cloud_zone = region.get('cloud-zone')
-
-                physical_location_list = self._get_aai_rel_link_data(data=region, related_to='complex',
-                                                                     search_key='complex.physical-location-id')
-                if len(physical_location_list) > 0:
-                    physical_location_id = physical_location_list[0].get('d_value')
-
-                if not (cloud_region_version and cloud_region_id):
-                    continue
-                rel_link_data_list = \
-                    self._get_aai_rel_link_data(
-                        data=region,
-                        related_to='complex',
-                        search_key='complex.physical-location-id')
-                if len(rel_link_data_list) > 1:
-                    LOG.error(_LE("Region {} has more than one complex").
-                              format(cloud_region_id))
-                    LOG.debug("Region {}: {}".format(cloud_region_id, region))
-
-                    continue
-                rel_link_data = rel_link_data_list[0]
-                complex_id = rel_link_data.get("d_value")
-                complex_link = rel_link_data.get("link")
-                if complex_id and complex_link:
-                    complex_info = self._get_complex(
-                        complex_link=complex_link,
-                        complex_id=complex_id)
-                else:  # no complex information
-                    LOG.error(_LE("Region {} does not reference a complex").
-                              format(cloud_region_id))
-                    continue
-                if not complex_info:
-                    LOG.error(_LE("Region {}, complex {} info not found, "
-                                  "link {}").format(cloud_region_id,
-                                                    complex_id, complex_link))
-                    continue
-
-                latitude = complex_info.get('latitude')
-                longitude = complex_info.get('longitude')
-                city = complex_info.get('city')
-                state = complex_info.get('state')
-                region = complex_info.get('region')
-                country = complex_info.get('country')
-                complex_name = complex_info.get('complex-name')
-
-                if not (latitude and longitude and city and country and complex_name):
-                    keys = ('latitude', 'longitude', 'city', 'country',
-                            'complex_name')
-                    missing_keys = \
-                        list(set(keys).difference(
-                            list(complex_info.keys())))  # Python 3 Conversion -- dict object to list object
-                    LOG.error(_LE("Complex {} is missing {}, link: {}").
-                              format(complex_id, missing_keys, complex_link))
-                    LOG.debug("Complex {}: {}".
-                              format(complex_id, complex_info))
-
-                    continue
-                cache['cloud_region'][cloud_region_id] = {
-                    'cloud_region_version': cloud_region_version,
-                    'cloud_owner': cloud_owner,
-                    'cloud_type': cloud_type,
-                    'cloud_zone': cloud_zone,
+            self._refresher_pid = pid
+            # A lock inherited from the parent may have been held by a
+            # thread that no longer exists here
+            self._refresh_lock = threading.Lock()
+            self._refresher_thread = threading.Thread(
+                target=self._refresher, name='aai-cache-refresher')
+            self._refresher_thread.daemon = True
+            self._refresher_thread.start()
+            LOG.info(_LI("A&AI cache refresher started"))
+
+    def _refresher(self):
+        """Refresh the A&AI cache whenever it expires"""
+        # Start with a refresh, to reconcile an expired snapshot right away
+        wait = 0
+        while not self._refresher_stop.wait(wait):
+            leader = True
+            try:
+                leader = self._is_cache_leader()
+                if leader:
+                    self._refresh_cache()
+                else:
+                    self._follow_snapshot()
+            except Exception as exc:
+                LOG.error(_LE("A&AI cache refresh failed: {}").format(exc))
+            if leader:
+                wait = self._refresher_wait()
+            else:
+                wait = self.conf.aai.cache_refresh_retry_interval
+
+    def _is_cache_leader(self):
+        """Return True if this process refreshes the cache from A&AI.
+
+        With cache_shared, the worker holding a lock on the snapshot file
+        refreshes it, and the others follow the snapshot. The lock is held
+        until the process exits, so another worker takes over then.
+        """
+        path = self.conf.aai.cache_snapshot_file
+        if not (self.conf.aai.cache_shared and path):
+            return True
+        if self._leader_pid == os.getpid():
+            return True
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        lock_file = open(path + '.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            lock_file.close()
+            return False
+        self._leader_file = lock_file
+        self._leader_pid = os.getpid()
+        LOG.info(_LI("This worker now refreshes the shared A&AI cache"))
+        return True
+
+    def _follow_snapshot(self):
+        """Load the snapshot file again if it was replaced"""
+        try:
+            mtime = os.path.getmtime(self.conf.aai.cache_snapshot_file)
+        except OSError:
+            return
+        if mtime != self._snapshot_mtime:
+            self._load_snapshot()
+
+    def _refresher_wait(self):
+        """Seconds until the background refresher next runs"""
+        retry_interval = self.conf.aai.cache_refresh_retry_interval
+        if not self.last_refresh_time:
+            return retry_interval
+        remaining = self.cache_refresh_interval * 60 - self._cache_age()
+        # A failed refresh leaves the cache expired; retry it later
+        return max(remaining, retry_interval)
+
+    def _fetch_all(self, fn, calls):
+        """Call fn concurrently on cache_refresh_workers workers.
+
+        :param fn: function to call
+        :param calls: dict of key: keyword args of a call to fn
+        :return: dict of key: result of the call, None if it raised
+        """
+        results = {}
+        if not calls:
+            return results
+        workers = min(self.conf.aai.cache_refresh_workers, len(calls))
+        executor = futurist.ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {key: executor.submit(fn, **kwargs)
+                       for key, kwargs in calls.items()}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as exc:
+                    LOG.error(_LE("A&AI request {} failed: "
+                                  "{}").format(key, exc))
+                    results[key] = None
+        finally:
+            # All the calls are done, idle workers exit on their own
+            executor.shutdown(wait=False)
+        return results
+
+    def _get_cloud_regions(self, regions, previous=None):
+        """Return the cloud_region cache entries of A&AI regions.
+
+        The complexes, then the flavors when HPA is enabled, are fetched
+        concurrently, each complex once however many regions share it.
+        Entries of previous whose region has the same resource-version
+        are reused as they are.
+        """
+        previous = previous or {}
+        timeout = self.conf.aai.cache_refresh_timeout
+        cloud_regions = {}
+        region_complexes = []
+        complex_calls = {}
+        for region in regions:
+            cloud_region_id = region.get('cloud-region-id')
+
+            LOG.debug("Working on region '{}' ".format(cloud_region_id))
+
+            if not (region.get('cloud-region-version') and cloud_region_id):
+                continue
+            resource_version = region.get('resource-version')
+            entry = previous.get(cloud_region_id)
+            if resource_version and entry and \
+                    entry.get('resource_version') == resource_version:
+                cloud_regions[cloud_region_id] = entry
+                continue
+            rel_link_data_list = \
+                self._get_aai_rel_link_data(
+                    data=region,
+                    related_to='complex',
+                    search_key='complex.physical-location-id')
+            if len(rel_link_data_list) > 1:
+                LOG.error(_LE("Region {} has more than one complex").
+                          format(cloud_region_id))
+                LOG.debug("Region {}: {}".format(cloud_region_id, region))
+
+                continue
+            rel_link_data = rel_link_data_list[0] \
+                if rel_link_data_list else {}
+            complex_id = rel_link_data.get("d_value")
+            complex_link = rel_link_data.get("link")
+            if not (complex_id and complex_link):  # no complex information
+                LOG.error(_LE("Region {} does not reference a complex").
+                          format(cloud_region_id))
+                continue
+            region_complexes.append((region, complex_id, complex_link))
+            complex_calls.setdefault(complex_id, {
+                'complex_link': complex_link,
+                'complex_id': complex_id,
+                'timeout': timeout,
+            })
+
+        LOG.info(_LI("A&AI cache refresh reuses {} unchanged regions, "
+                     "fetches {}").format(len(cloud_regions),
+                                          len(region_complexes)))
+        complexes = self._fetch_all(self._get_complex, complex_calls)
+
+        fetched = []
+        for region, complex_id, complex_link in region_complexes:
+            cloud_region_id = region.get('cloud-region-id')
+            complex_info = complexes.get(complex_id)
+            if not complex_info:
+                LOG.error(_LE("Region {}, complex {} info not found, "
+                              "link {}").format(cloud_region_id,
+                                                complex_id, complex_link))
+                continue
+
+            latitude = complex_info.get('latitude')
+            longitude = complex_info.get('longitude')
+            city = complex_info.get('city')
+            state = complex_info.get('state')
+            complex_region = complex_info.get('region')
+            country = complex_info.get('country')
+            complex_name = complex_info.get('complex-name')
+
+            if not (latitude and longitude and city and country and complex_name):
+                keys = ('latitude', 'longitude', 'city', 'country',
+                        'complex_name')
+                missing_keys = \
+                    list(set(keys).difference(
+                        list(complex_info.keys())))  # Python 3 Conversion -- dict object to list object
+                LOG.error(_LE("Complex {} is missing {}, link: {}").
+                          format(complex_id, missing_keys, complex_link))
+                LOG.debug("Complex {}: {}".
+                          format(complex_id, complex_info))
+
+                continue
+            fetched.append(cloud_region_id)
+            cloud_regions[cloud_region_id] = {
+                'resource_version': region.get('resource-version'),
+                'cloud_region_version': region.get('cloud-region-version'),
+                'cloud_owner': region.get('cloud-owner'),
+                'cloud_type': region.get('cloud-type'),
+                'cloud_zone': region.get('cloud-zone'),
+                'complex_name': complex_name,
+                'physical_location_id': complex_id,
+                'complex': {
+                    'complex_id': complex_id,
                     'complex_name': complex_name,
-                    'physical_location_id': physical_location_id,
-                    'complex': {
-                        'complex_id': complex_id,
-                        'complex_name': complex_name,
-                        'latitude': latitude,
-                        'longitude': longitude,
-                        'city': city,
-                        'state': state,
-                        'region': region,
-                        'country': country,
-                    }
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'city': city,
+                    'state': state,
+                    'region': complex_region,
+                    'country': country,
                 }
+            }
 
-                # Added for HPA support
-                if self.conf.HPA_enabled:
-                    flavors = self._get_flavors(cloud_owner, cloud_region_id)
-                    cache['cloud_region'][cloud_region_id]['flavors'] = flavors
+            LOG.debug("Candidate with cloud_region_id '{}' selected "
+                      "as a potential candidate - ".format(cloud_region_id))
 
-                LOG.debug("Candidate with cloud_region_id '{}' selected "
-                          "as a potential candidate - ".format(cloud_region_id))
-            LOG.debug("Done with region '{}' ".format(cloud_region_id))
-            self._aai_cache = cache
-            self.last_refresh_time = time.time()
-            LOG.info(_LI("**** A&AI cache refresh complete *****"))
+        # Added for HPA support
+        if self.conf.HPA_enabled:
+            flavor_calls = {
+                cloud_region_id: {
+                    'cloud_owner': cloud_regions[cloud_region_id]['cloud_owner'],
+                    'cloud_region_id': cloud_region_id,
+                    'timeout': timeout,
+                }
+                for cloud_region_id in fetched}
+            flavors = self._fetch_all(self._get_flavors, flavor_calls)
+            for cloud_region_id in fetched:
+                cloud_regions[cloud_region_id]['flavors'] = \
+                    flavors.get(cloud_region_id)
+                if flavors.get(cloud_region_id):
+                    cloud_regions[cloud_region_id]['flavors_version'] = \
+                        hpa_utils.get_fingerprint(flavors[cloud_region_id])
+
+        return cloud_regions
 
     @staticmethod
     def _get_aai_rel_link(data, related_to):
@@ -413,50 +889,47 @@ class AAI(base.InventoryProviderBase):
                 return True
         return False
 
-    def _get_complex(self, complex_link, complex_id=None):
+    def _get_complex(self, complex_link, complex_id=None, timeout=None):
 
-        if not self.complex_last_refresh_time or \
-                (time.time() - self.complex_last_refresh_time) > \
-                self.complex_cache_refresh_interval * 60:
-            self._aai_complex_cache.clear()
-        if complex_id and complex_id in self._aai_complex_cache:
-            return self._aai_complex_cache[complex_id]
-        else:
-            path = self._aai_versioned_path(self._get_aai_path_from_link(complex_link))
-            response = self._request(path=path, context="complex", value=complex_id)
-            if response is None:
+        path = self._aai_versioned_path(self._get_aai_path_from_link(complex_link))
+        response = self._request(
+            path=path, context="complex", value=complex_id,
+            timeout=timeout,
+            cache_ttl=self.complex_cache_refresh_interval * 60)
+        if response is None:
+            return
+        if response.status_code == 200:
+            complex_info = response.json()
+            if 'complex' in complex_info:
+                complex_info = complex_info.get('complex')
+
+            latitude = complex_info.get('latitude')
+            longitude = complex_info.get('longitude')
+            city = complex_info.get('city')
+            country = complex_info.get('country')
+            # removed the state check for countries in Europe that do not always enter states
+            if not (latitude and longitude and city and country):
+                keys = ('latitude', 'longitude', 'city', 'country')
+                missing_keys = \
+                    list(set(keys).difference(set(complex_info.keys())))
+                LOG.error(_LE("Complex {} is missing {}, link: {}").
+                          format(complex_id, missing_keys, complex_link))
+                LOG.debug("Complex {}: {}".format(complex_id, complex_info))
                 return
-            if response.status_code == 200:
-                complex_info = response.json()
-                if 'complex' in complex_info:
-                    complex_info = complex_info.get('complex')
-
-                latitude = complex_info.get('latitude')
-                longitude = complex_info.get('longitude')
-                city = complex_info.get('city')
-                country = complex_info.get('country')
-                # removed the state check for countries in Europe that do not always enter states
-                if not (latitude and longitude and city and country):
-                    keys = ('latitude', 'longitude', 'city', 'country')
-                    missing_keys = \
-                        list(set(keys).difference(set(complex_info.keys())))
-                    LOG.error(_LE("Complex {} is missing {}, link: {}").
-                              format(complex_id, missing_keys, complex_link))
-                    LOG.debug("Complex {}: {}".format(complex_id, complex_info))
-                    return
-
-                if complex_id:  # cache only if complex_id is given
-                    self._aai_complex_cache[complex_id] = response.json()
-                    self.complex_last_refresh_time = time.time()
-
-                return complex_info
+
+            return complex_info
 
     def _get_regions(self):
-        self._refresh_cache()
+        if self.conf.aai.cache_background_refresh and self._aai_cache:
+            # Serve the current snapshot, even if a refresh is due or in
+            # progress; the refresher keeps it up to date.
+            self._start_refresher()
+        else:
+            self._refresh_cache()
         regions = self._aai_cache.get('cloud_region', {})
         return regions
 
-    def _get_flavors(self, cloud_owner, cloud_region_id):
+    def _get_flavors(self, cloud_owner, cloud_region_id, timeout=None):
         '''Fetch all flavors of a given cloud regions specified using {cloud-owner}/{cloud-region-id} composite key
 
         :return flavors_info json object which list of flavor nodes and its children - HPACapabilities:
@@ -467,7 +940,8 @@ class AAI(base.InventoryProviderBase):
         path = self._aai_versioned_path(flavor_path)
         LOG.debug("Flavors path '{}' ".format(path))
 
-        response = self._request(path=path, context="flavors", value="all")
+        response = self._request(path=path, context="flavors", value="all",
+                                 timeout=timeout)
         if response is None:
             return
         if response.status_code == 200:
@@ -494,7 +968,35 @@ class AAI(base.InventoryProviderBase):
         else:
             return "{}".format(path[1])
 
+    def check_candidate_roles(self, host_ids=None):
+        """Return the replication role of each candidate host.
+
+        Hosts not in the role cache are looked up concurrently.
+
+        :param host_ids: list of candidate host ids
+        :return: dict of host id: role, None if it could not be found
+        """
+        roles = {}
+        calls = {}
+        for host_id in set(host_ids or []):
+            role = self._role_cache.get(('candidate_role', host_id))
+            if role is None:
+                calls[host_id] = {'host_id': host_id}
+            else:
+                roles[host_id] = role
+        roles.update(self._fetch_all(self.check_candidate_role, calls))
+        return roles
+
     def check_candidate_role(self, host_id=None):
+        key = ('candidate_role', host_id)
+        role = self._role_cache.get(key)
+        if role is None:
+            role = self._check_candidate_role(host_id)
+            if role is not None:
+                self._role_cache.put(key, role)
+        return role
+
+    def _check_candidate_role(self, host_id):
 
         vnf_name_uri = '/network/generic-vnfs/?vnf-name=' + host_id + '&depth=0'
         path = self._aai_versioned_path(vnf_name_uri)
@@ -543,6 +1045,15 @@ class AAI(base.InventoryProviderBase):
             return role
 
     def check_network_roles(self, network_role_id=None):
+        key = ('network_role', network_role_id)
+        region_ids = self._role_cache.get(key)
+        if region_ids is None:
+            region_ids = self._check_network_roles(network_role_id)
+            if region_ids is not None:
+                self._role_cache.put(key, region_ids)
+        return region_ids
+
+    def _check_network_roles(self, network_role_id):
         # the network role query from A&AI is not using
         # the version number in the query
         network_role_uri = \
@@ -642,8 +1153,10 @@ class AAI(base.InventoryProviderBase):
         clli_uri = '/cloud-infrastructure/complexes/complex/' + clli_name
         path = self._aai_versioned_path(clli_uri)
 
-        response = self._request('get', path=path, data=None,
-                                 context="clli name", value=clli_name)
+        response = self._request(
+            'get', path=path, data=None, context="clli name",
+            value=clli_name,
+            cache_ttl=self.complex_cache_refresh_interval * 60)
         if response is None or response.status_code != 200:
             return None
 
@@ -810,7 +1323,8 @@ class AAI(base.InventoryProviderBase):
         path = self._aai_versioned_path(vs_path)
         response = self._request(
             path=path, context="demand, VSERVER",
-            value="{}, {}".format(demand_name, vs_path))
+            value="{}, {}".format(demand_name, vs_path),
+            cache_ttl=self.object_cache_ttl)
         if response is None or response.status_code != 200:
             self.triage_translator.collectDroppedCandiate(candidate_id,
                                                           location_id, demand_name,
@@ -823,7 +1337,8 @@ class AAI(base.InventoryProviderBase):
         raw_path = '/network/generic-vnfs/generic-vnf/{}?depth=1'.format(vnf.get("vnf-id"))
         path = self._aai_versioned_path(raw_path)
 
-        response = self._request('get', path=path, data=None)
+        response = self._request('get', path=path, data=None,
+                                 cache_ttl=self.object_cache_ttl)
         if response is None or response.status_code != 200:
             self.triage_translator.collectDroppedCandiate(candidate_id, location_id, demand_name,
                                                           triage_translator_data, reason=response)
@@ -961,7 +1476,8 @@ class AAI(base.InventoryProviderBase):
                 return None  # move ahead with the next vnf
             path = self._aai_versioned_path(ps_path)
             response = self._request(
-                path=path, context="PSERVER", value=ps_path)
+                path=path, context="PSERVER", value=ps_path,
+                cache_ttl=self.object_cache_ttl)
             if response is None or response.status_code != 200:
                 # Triage Tool Feature Changes
                 self.triage_translator.collectDroppedCandiate(candidate_id, cloud_region_id, demand_name,
@@ -1120,6 +1636,49 @@ class AAI(base.InventoryProviderBase):
             complex_info = self.build_complex_dict(complex_info, '')
             return complex_info
 
+    def _resolve_vnfs(self, resolve_vnf, generic_vnfs, name,
+                      triage_translator_data):
+        """Call resolve_vnf on each generic vnf concurrently.
+
+        Generic vnfs listed more than once are resolved once. Each call
+        collects its dropped candidates apart, and they are added to
+        triage_translator_data in generic vnf order afterwards, so the
+        results and the triage report are the same as when resolved one
+        after the other.
+
+        :param resolve_vnf: function(vnf, triage_translator_data)
+        :return: list of the resolve_vnf results, in generic vnf order
+        """
+        vnfs = []
+        vnf_ids = set()
+        for vnf in generic_vnfs:
+            # if this vnf already appears, skip it
+            vnf_id = vnf.get('vnf-id')
+            if vnf_id in vnf_ids:
+                continue
+            vnf_ids.add(vnf_id)
+            vnfs.append(vnf)
+        if not vnfs:
+            return []
+
+        vnf_triage_data = [
+            {'dropped_candidates': [{'name': name,
+                                     'translation_dropped': []}]}
+            for _ in vnfs]
+        workers = min(self.conf.aai.resolve_workers, len(vnfs))
+        executor = futurist.ThreadPoolExecutor(max_workers=workers)
+        try:
+            results = list(executor.map(resolve_vnf, vnfs, vnf_triage_data))
+        finally:
+            executor.shutdown(wait=False)
+
+        for data in vnf_triage_data:
+            for dropped in data['dropped_candidates'][0]['translation_dropped']:
+                self.triage_translator.collectDroppedCandiate(
+                    dropped['candidate_id'], dropped['location_id'], name,
+                    triage_translator_data, reason=dropped['reason'])
+        return results
+
     def resolve_demands(self, demands, plan_info, triage_translator_data):
         """Resolve demands into inventory candidate lists"""
 
@@ -1199,7 +1758,7 @@ class AAI(base.InventoryProviderBase):
                                                               candidate_uniqueness, region_id, service_resource_id)
                         cloud = self.resolve_cloud_for_region(region, region_id)
                         complex_info = self.build_complex_dict(region['complex'], inventory_type)
-                        flavors = self.resolve_flavors_for_region(region['flavors'])
+                        flavors = self.resolve_flavors_for_region(region['flavors'], region_id, region)
                         other = dict()
                         other['vim-id'] = self.get_vim_id(cloud['cloud_owner'], cloud['location_id'])
                         if self.check_sriov_automation(cloud['cloud_region_version'], name, info['candidate_id']):
@@ -1276,33 +1835,27 @@ class AAI(base.InventoryProviderBase):
                         vnf_by_service_type = self.first_level_service_call(path, name, service_type)
 
                     generic_vnf = vnf_by_model_invariant + vnf_by_service_type
-                    vnf_dict = dict()
 
-                    for vnf in generic_vnf:
-                        # if this vnf already appears, skip it
-                        vnf_id = vnf.get('vnf-id')
-                        if vnf_id in vnf_dict:
-                            continue
-                        # add vnf (with vnf_id as key) to the dictionary
-                        vnf_dict[vnf_id] = vnf
+                    def resolve_vnf(vnf, triage_translator_data):
+                        """Return the candidate of a generic vnf, if any"""
                         vnf_info = dict()
                         vnf_info['host_id'] = vnf.get("vnf-name")
                         vlan_info = self.build_vlan_info(vlan_key, port_key)
                         cloud = self.resolve_cloud_for_vnf('', '', vnf, service_type, name, triage_translator_data)
                         if cloud['location_id'] is None or cloud['cloud_owner'] is None or \
                                 cloud['cloud_region_version'] is None:
-                            continue
+                            return []
 
                         rl_data = self.resolve_global_customer_id_for_vnf('', cloud['location_id'], vnf, customer_id,
                                                                           service_type, name, triage_translator_data)
                         if rl_data is None:
-                            continue
+                            return []
                         else:
                             vs_cust_id = rl_data.get('d_value')
                         rl_data = self.resolve_service_instance_id_for_vnf('', cloud['location_id'], vnf, customer_id,
                                                                            service_type, name, triage_translator_data)
                         if rl_data is None:
-                            continue
+                            return []
                         else:
                             vs_service_instance_id = rl_data.get('d_value')
 
@@ -1316,7 +1869,7 @@ class AAI(base.InventoryProviderBase):
                             self.triage_translator.collectDroppedCandiate('', cloud['location_id'], name,
                                                                           triage_translator_data,
                                                                           reason="vserver is for a different customer")
-                            continue
+                            return []
                         # Added vim-id for short-term workaround
                         other = dict()
                         other['vim-id'] = self.get_vim_id(cloud['cloud_owner'], cloud['location_id'])
@@ -1335,7 +1888,7 @@ class AAI(base.InventoryProviderBase):
                                                                              complex_list, service_type, name,
                                                                              triage_translator_data)
                         if "complex_name" not in complex_info:
-                            continue
+                            return []
 
                         service_candidate = Service(info=info, cloud_region=cloud, complex=complex_info,
                                                     generic_vnf=vnf_info, additional_fields=other, vlan=vlan_info)
@@ -1353,33 +1906,37 @@ class AAI(base.InventoryProviderBase):
                                                                           candidate['location_id'], name,
                                                                           triage_translator_data,
                                                                           reason="attibute check error")
-                            continue
+                            return []
                         self.assign_candidate_existing_placement(candidate, existing_placement)
 
                         # Pick only candidates not in the excluded list
                         # if excluded candidate list is provided
                         if excluded_candidates and self.match_candidate_by_list(candidate, excluded_candidates, True,
                                                                                 name, triage_translator_data):
-                            continue
+                            return []
 
                         # Pick only candidates in the required list
                         # if required candidate list is provided
                         if required_candidates and not self.match_candidate_by_list(candidate, required_candidates,
                                                                                     False, name,
                                                                                     triage_translator_data):
-                            continue
+                            return []
 
                         # add the candidate to the demand
                         # Pick only candidates from the restricted_region
                         # or restricted_complex
                         if not self.match_region(candidate, restricted_region_id, restricted_complex_id, name,
                                                  triage_translator_data):
-                            continue
+                            return []
                         else:
                             self.add_passthrough_attributes(candidate, passthrough_attributes, name)
-                            resolved_demands[name].append(candidate)
                             LOG.debug(">>>>>>> Candidate <<<<<<<")
                             LOG.debug(json.dumps(candidate, indent=4))
+                            return [candidate]
+
+                    for candidates in self._resolve_vnfs(resolve_vnf, generic_vnf, name,
+                                                         triage_translator_data):
+                        resolved_demands[name].extend(candidates)
 
                 elif (inventory_type == 'vfmodule') and customer_id:
 
@@ -1403,15 +1960,10 @@ class AAI(base.InventoryProviderBase):
                         vnf_by_service_type = self.first_level_service_call(path, name, service_type)
 
                     generic_vnf = vnf_by_model_invariant + vnf_by_service_type
-                    vnf_dict = dict()
 
-                    for vnf in generic_vnf:
-                        # if this vnf already appears, skip it
-                        vnf_id = vnf.get('vnf-id')
-                        if vnf_id in vnf_dict:
-                            continue
-                        # add vnf (with vnf_id as key) to the dictionary
-                        vnf_dict[vnf_id] = vnf
+                    def resolve_vnf(vnf, triage_translator_data):
+                        """Return the candidates of the vf-modules of a generic vnf"""
+                        candidates = []
 
                         # INFO
                         info = Candidate.build_candidate_info('aai', inventory_type,
@@ -1425,14 +1977,14 @@ class AAI(base.InventoryProviderBase):
                         rl_data = self.resolve_global_customer_id_for_vnf('', '', vnf, customer_id,
                                                                           service_type, name, triage_translator_data)
                         if rl_data is None:
-                            continue
+                            return candidates
                         else:
                             vs_cust_id = rl_data.get('d_value')
 
                         rl_data = self.resolve_service_instance_id_for_vnf('', '', vnf, customer_id,
                                                                            service_type, name, triage_translator_data)
                         if rl_data is None:
-                            continue
+                            return candidates
                         else:
                             vs_service_instance_id = rl_data.get('d_value')
 
@@ -1444,12 +1996,12 @@ class AAI(base.InventoryProviderBase):
                                                                           triage_translator_data,
                                                                           reason="candidate is for a different"
                                                                                  " customer")
-                            continue
+                            return candidates
 
                         vf_modules_list = self.resolve_vf_modules_for_generic_vnf('', '', vnf, name,
                                                                                   triage_translator_data)
                         if vf_modules_list is None:
-                            continue
+                            return candidates
 
                         for vf_module in vf_modules_list:
                             # for vfmodule demands we allow to have vfmodules from different cloud regions
@@ -1546,13 +2098,19 @@ class AAI(base.InventoryProviderBase):
                                 continue
                             else:
                                 self.add_passthrough_attributes(candidate, passthrough_attributes, name)
-                                resolved_demands[name].append(candidate)
+                                candidates.append(candidate)
                                 LOG.debug(">>>>>>> Candidate <<<<<<<")
                                 with open("vf.log", mode='w') as log_file:
                                     log_file.write(">>>>>>>Vf Candidate <<<<<<<")
                                     log_file.write(json.dumps(candidate, indent=4))
                                 LOG.debug(json.dumps(candidate, indent=4))
 
+                        return candidates
+
+                    for candidates in self._resolve_vnfs(resolve_vnf, generic_vnf, name,
+                                                         triage_translator_data):
+                        resolved_demands[name].extend(candidates)
+
                 elif inventory_type == 'transport' \
                         and customer_id and service_type and \
                         service_subscription and service_role:
@@ -1696,10 +2254,21 @@ class AAI(base.InventoryProviderBase):
         vlan_info['port_key'] = port_key
         return vlan_info
 
-    def resolve_flavors_for_region(self, flavors_obj):
+    def resolve_flavors_for_region(self, flavors_obj, region_id=None,
+                                   region=None):
         if self.conf.HPA_enabled:
             flavors = dict()
-            flavors['flavors'] = flavors_obj
+            if self.conf.aai.flavor_catalog_references and region_id:
+                # Reference the flavors kept in the cache, versioned when
+                # the cache was built
+                version = region.get('flavors_version')
+                if flavors_obj and not version:
+                    version = hpa_utils.get_fingerprint(flavors_obj)
+                flavors['flavor_catalog'] = {
+                    'cloud_region_id': region_id,
+                    'version': version}
+            else:
+                flavors['flavors'] = flavors_obj
         return flavors
 
     def resolve_v_server_and_complex_link_for_vnf(self, candidate_id, cloud, vnf, name, triage_translator_data,
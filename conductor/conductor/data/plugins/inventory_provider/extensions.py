@@ -18,9 +18,8 @@
 #
 
 from oslo_log import log
-import stevedore
-
 from conductor.conf import inventory_provider
+from conductor.data.plugins import extensions
 from conductor.i18n import _LI
 
 LOG = log.getLogger(__name__)
@@ -28,12 +27,13 @@ LOG = log.getLogger(__name__)
 inventory_provider.register_extension_manager_opts()
 
 
-class Manager(stevedore.named.NamedExtensionManager):
+class Manager(extensions.ConcurrentManager):
     """Manage Inventory Provider extensions."""
 
     def __init__(self, conf, namespace):
         super(Manager, self).__init__(
-            namespace, conf.inventory_provider.extensions,
+            conf.inventory_provider, namespace,
+            conf.inventory_provider.extensions,
             invoke_on_load=True, name_order=True, propagate_map_exceptions=True)
         LOG.info(_LI("Loaded inventory provider extensions: %s"), self.names())
 
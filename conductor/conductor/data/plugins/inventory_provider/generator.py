@@ -21,17 +21,50 @@ import itertools
 from operator import eq
 from operator import ge
 from operator import le
+import random
 import uuid
 
+from oslo_config import cfg
 from oslo_log import log
 
 from conductor.data.plugins.inventory_provider import base
 from conductor.data.plugins.inventory_provider.candidates.candidate import Candidate
+from conductor.data.plugins.inventory_provider.candidates.slice_profiles_candidate import ATTRIBUTE_AGGREGATION
+from conductor.data.plugins.inventory_provider.candidates.slice_profiles_candidate import copy_first
 from conductor.data.plugins.inventory_provider.candidates.slice_profiles_candidate import get_slice_requirements
 from conductor.data.plugins.inventory_provider.candidates.slice_profiles_candidate import SliceProfilesCandidate
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 LOG = log.getLogger(__name__)
 
+CONF = cfg.CONF
+
+GENERATOR_OPTS = [
+    cfg.IntOpt('max_slice_profile_candidates',
+               default=0,
+               min=0,
+               help='Maximum number of slice profile candidates generated '
+                    'for a demand. 0 generates all the valid '
+                    'combinations.'),
+    cfg.BoolOpt('slice_profile_sampling',
+                default=False,
+                help='Set to True to pick the max_slice_profile_candidates '
+                     'candidates at random among all the valid '
+                     'combinations. When False, the first ones are '
+                     'picked.'),
+    cfg.BoolOpt('vectorized_validation',
+                default=True,
+                help='Set to True to check the slice profiles of a subnet '
+                     'against the service profile in bulk, with NumPy '
+                     'arrays. Only used when NumPy is installed.'),
+]
+
+CONF.register_opts(GENERATOR_OPTS, group='generator')
+
 
 OPERATORS = {'gte': ge,
              'lte': le,
@@ -90,27 +123,224 @@ class Generator(base.InventoryProviderBase):
                                            'coverage_area_ta_list': {'values': ['City: Chennai']}}}
             It will generate slice profile combination from the attributes for each subnet and
             generates combination of slice profile tuples from the each subnet.
+            The combinations are generated lazily, and bounded by max_slice_profile_candidates.
         """
-        subnet_combinations = {}
-        for subnet, attributes in filtering_attributes['subnets'].items():
-            attribute_names, attribute_combinations = generate_combinations(attributes)
-            subnet_combinations[subnet] = organize_combinations(attribute_names, attribute_combinations)
+        combinations = iter_valid_combinations(filtering_attributes['subnets'],
+                                               filtering_attributes['service_profile'])
+        limit = CONF.generator.max_slice_profile_candidates
+        if limit and CONF.generator.slice_profile_sampling:
+            combinations = sample(combinations, limit)
+        elif limit:
+            combinations = itertools.islice(combinations, limit)
 
-        subnet_names, slice_profile_combinations = get_combinations_from_dict(subnet_combinations)
-        organized_combinations = organize_combinations(subnet_names, slice_profile_combinations)
         candidates = []
-        for combination in organized_combinations:
-            if is_valid(get_slice_requirements(combination), filtering_attributes['service_profile']):
-                info = Candidate.build_candidate_info(self.name(), inventory_type, 1.0, candidate_uniqueness,
-                                                      str(uuid.uuid4()))
-                candidate = SliceProfilesCandidate(info=info, subnet_requirements=combination,
-                                                   default_fields=default_fields)
-                converted_candidate = candidate.convert_nested_dict_to_dict()
-                candidates.append(converted_candidate)
+        for combination, slice_requirements in combinations:
+            info = Candidate.build_candidate_info(self.name(), inventory_type, 1.0, candidate_uniqueness,
+                                                  str(uuid.uuid4()))
+            candidate = SliceProfilesCandidate(info=info, subnet_requirements=combination,
+                                               slice_requirements=slice_requirements,
+                                               default_fields=default_fields)
+            converted_candidate = candidate.convert_nested_dict_to_dict()
+            candidates.append(converted_candidate)
 
         return candidates
 
 
+def iter_valid_combinations(subnets, service_profile):
+    """Lazily generates the slice profile combinations meeting the service profile.
+
+       Yields (combination, slice requirements) tuples, in the order of the
+       Cartesian product of the subnet combinations. Combinations are built one
+       subnet at a time, and a partial combination is dropped as soon as no
+       combination completing it can meet the service profile.
+    """
+    subnet_values = {subnet: get_attribute_values(attributes)
+                     for subnet, attributes in subnets.items()}
+    subnet_names = list(subnet_values.keys())
+    if np is not None and CONF.generator.vectorized_validation:
+        grids = {subnet: ProfileGrid(values) for subnet, values in subnet_values.items()}
+    else:
+        grids = None
+    # bounds of the aggregated values of the subnets left, from each subnet
+    remaining_bounds = [get_aggregation_bounds([subnet_values[subnet] for subnet in subnet_names[index:]],
+                                               service_profile)
+                        for index in range(1, len(subnet_names) + 1)]
+
+    def expand(index, combination):
+        if index == len(subnet_names):
+            slice_requirements = get_slice_requirements(combination)
+            if is_valid(slice_requirements, service_profile):
+                yield dict(combination), slice_requirements
+            return
+        subnet = subnet_names[index]
+        if grids:
+            slice_profiles = grids[subnet].feasible_profiles(combination, remaining_bounds[index],
+                                                             service_profile)
+        else:
+            slice_profiles = iter_combinations(subnet_values[subnet])
+        for slice_profile in slice_profiles:
+            combination[subnet] = slice_profile
+            if grids or may_be_valid(combination, remaining_bounds[index], service_profile):
+                yield from expand(index + 1, combination)
+            del combination[subnet]
+
+    return expand(0, {})
+
+
+def get_aggregation_bounds(subnet_values, service_profile):
+    """Bounds of the sum and min aggregated values of service profile attributes.
+
+       Returns {attribute: (low, high)} over the given subnet values. Attributes
+       whose bounds are unknown are left out.
+    """
+    bounds = {}
+    for attr in service_profile:
+        aggregation = ATTRIBUTE_AGGREGATION.get(attr)
+        if aggregation not in (sum, min):
+            continue
+        try:
+            ranges = [(min(values[attr]), max(values[attr])) for values in subnet_values]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if aggregation is sum:
+            bounds[attr] = (sum(r[0] for r in ranges), sum(r[1] for r in ranges))
+        else:
+            bounds[attr] = (min([r[0] for r in ranges], default=float('inf')),
+                            min([r[1] for r in ranges], default=float('inf')))
+    return bounds
+
+
+def may_be_valid(combination, remaining_bounds, service_profile):
+    """Whether a combination completed with the remaining subnets may be valid"""
+    for attr, attr_value in service_profile.items():
+        aggregation = ATTRIBUTE_AGGREGATION.get(attr)
+        values = [slice_profile.get(attr) for slice_profile in combination.values()]
+        try:
+            if aggregation is copy_first:
+                values = list(filter(None, values))
+                if not values:
+                    continue
+                low = high = values[0]
+            elif aggregation in (sum, min) and attr in remaining_bounds:
+                remaining_low, remaining_high = remaining_bounds[attr]
+                if aggregation is sum:
+                    low, high = sum(values) + remaining_low, sum(values) + remaining_high
+                else:
+                    low, high = min(values + [remaining_low]), min(values + [remaining_high])
+            else:
+                continue
+            if not check_bounds(low, high, attr_value['operator'], attr_value['value']):
+                return False
+        except TypeError:
+            continue
+    return True
+
+
+class ProfileGrid(object):
+    """Slice profiles of a subnet, with the values of each attribute as a NumPy array.
+
+       The profiles are numbered in the order of iter_combinations(), and only
+       built for the positions left by the bulk checks.
+    """
+
+    def __init__(self, attr_values):
+        self.names = list(attr_values.keys())
+        self.values = [list(values) for values in attr_values.values()]
+        self.shape = tuple(len(values) for values in self.values)
+        self.size = int(np.prod(self.shape))
+        self._columns = {}
+
+    def column(self, attr):
+        """Values of attr in all the profiles, None if the subnet has no attr"""
+        if attr not in self._columns:
+            column = None
+            if attr in self.names:
+                position = self.names.index(attr)
+                values = np.asarray(self.values[position])
+                if values.ndim != 1 or values.dtype.kind not in 'iufU':
+                    values = np.empty(len(self.values[position]), dtype=object)
+                    values[:] = self.values[position]
+                shape = [1] * len(self.shape)
+                shape[position] = len(values)
+                column = np.broadcast_to(values.reshape(shape), self.shape).ravel()
+            self._columns[attr] = column
+        return self._columns[attr]
+
+    def profile(self, position):
+        """Slice profile at position"""
+        indexes = np.unravel_index(position, self.shape)
+        return {name: values[int(index)]
+                for name, values, index in zip(self.names, self.values, indexes)}
+
+    def feasible_profiles(self, combination, remaining_bounds, service_profile):
+        """Profiles that may complete combination into a valid one.
+
+           Same checks as may_be_valid(), as boolean masks over all the profiles.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for attr, attr_value in service_profile.items():
+            try:
+                mask &= self._check(attr, attr_value, combination, remaining_bounds)
+            except TypeError:
+                continue
+        return (self.profile(position) for position in np.flatnonzero(mask))
+
+    def _check(self, attr, attr_value, combination, remaining_bounds):
+        aggregation = ATTRIBUTE_AGGREGATION.get(attr)
+        values = [slice_profile.get(attr) for slice_profile in combination.values()]
+        column = self.column(attr)
+        value = attr_value['value']
+        if aggregation is copy_first:
+            values = list(filter(None, values))
+            if values:
+                return check_bounds(values[0], values[0], attr_value['operator'], value)
+            if column is None or not is_comparable(column, value):
+                return True
+            truthy = np.frompyfunc(bool, 1, 1)(column).astype(bool)
+            return check_bounds(column, column, attr_value['operator'], value) | ~truthy
+        if aggregation not in (sum, min) or attr not in remaining_bounds \
+                or column is None or not is_comparable(column, value):
+            return True
+        remaining_low, remaining_high = remaining_bounds[attr]
+        if aggregation is sum:
+            low, high = sum(values) + remaining_low + column, sum(values) + remaining_high + column
+        else:
+            low = np.minimum(column, min(values + [remaining_low]))
+            high = np.minimum(column, min(values + [remaining_high]))
+        return check_bounds(low, high, attr_value['operator'], value)
+
+
+def is_comparable(column, value):
+    """Whether the values of column can be compared to value in bulk"""
+    if column.dtype.kind in 'iuf':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return column.dtype.kind == 'U' and isinstance(value, str)
+
+
+def check_bounds(low, high, operator, value):
+    """Whether a value between low and high may meet the operator"""
+    if operator == 'lte':
+        return low <= value
+    if operator == 'gte':
+        return high >= value
+    if operator == 'eq':
+        return (low <= value) & (high >= value)
+    return True
+
+
+def sample(iterable, size):
+    """Picks size items at random from iterable, in a single pass"""
+    items = []
+    for index, item in enumerate(iterable):
+        if index < size:
+            items.append(item)
+        else:
+            position = random.randint(0, index)
+            if position < size:
+                items[position] = item
+    return items
+
+
 def is_valid(converted_candidate, service_profile):
     for attr, attr_value in service_profile.items():
         if not OPERATORS[attr_value['operator']](converted_candidate[attr], attr_value['value']):
@@ -124,6 +354,11 @@ def generate_combinations(attributes):
        The params can have a values list or range(min, max)
        from which the combinations are generated.
     """
+    return get_combinations_from_dict(get_attribute_values(attributes))
+
+
+def get_attribute_values(attributes):
+    """Returns the values list or range(min, max) of each attribute"""
     attr = dict()
     for attribute, attr_params in attributes.items():
         values = attr_params.get('values')
@@ -131,8 +366,14 @@ def generate_combinations(attributes):
             values = range(attr_params.get('min', 1), attr_params.get('max'),
                            attr_params.get('steps', 1))
         attr[attribute] = values
+    return attr
 
-    return get_combinations_from_dict(attr)
+
+def iter_combinations(attr):
+    """Lazily generates the combinations of a dictionary containing lists as dicts"""
+    attribute_names = list(attr.keys())
+    for combination in itertools.product(*attr.values()):
+        yield dict(zip(attribute_names, combination))
 
 
 def get_combinations_from_dict(attr):
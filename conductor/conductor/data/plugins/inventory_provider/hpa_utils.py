@@ -21,6 +21,9 @@
 """Utility functions for
    Hardware Platform Awareness (HPA) constraint plugin"""
 
+import copy
+import hashlib
+import json
 import operator
 import yaml
 
@@ -34,6 +37,9 @@ from conductor.i18n import _LW
 
 LOG = log.getLogger(__name__)
 
+# Candidate fields set by get_candidates_with_hpa
+HPA_MAPPING_KEYS = ('flavor_map', 'all_directives', 'hpa_score')
+
 
 def match_all_operator(big_list, small_list):
     """Match ALL operator for HPA Check if smaller list is a subset of bigger list
@@ -51,11 +57,14 @@ def match_all_operator(big_list, small_list):
     return small_set.issubset(big_set)
 
 
-def get_candidates_with_hpa(arg):
+def get_candidates_with_hpa(arg, flavor_index=None, match_cache=None):
     """RPC for getting candidates flavor mapping for matching hpa
 
     :param ctx: context
     :param arg: contains input passed from client side for RPC call
+    :param flavor_index: function returning the FlavorIndex of the
+                         flavors of a candidate, or None
+    :param match_cache: cache of the match_hpa results
     :return: response candidate_list with matching label to flavor mapping
     """
     candidate_list = arg["candidate_list"]
@@ -80,7 +89,10 @@ def get_candidates_with_hpa(arg):
             continue
 
         # RPC call to inventory provider for matching hpa capabilities
-        result = match_hpa(candidate=candidate_list[i], features=flavorProperties)
+        result = match_hpa(
+            candidate=candidate_list[i], features=flavorProperties,
+            flavor_index=flavor_index and flavor_index(candidate_list[i]),
+            match_cache=match_cache)
 
         flavor_name = None
         if result:
@@ -137,6 +149,36 @@ def get_candidates_with_hpa(arg):
     return candidate_list
 
 
+def get_hpa_flavor_mappings(arg, flavor_index=None, match_cache=None):
+    """RPC for matching the hpa of all the VM labels of a demand at once
+
+    :param arg: candidate_list, and vm_labels with the id, type,
+                directives and flavorProperties of each VM label
+    :param flavor_index: function returning the FlavorIndex of the
+                         flavors of a candidate, or None
+    :param match_cache: cache of the match_hpa results
+    :return: for each candidate matching all the VM labels, its index
+             in candidate_list with its flavor_map, all_directives and
+             hpa_score
+    """
+    candidate_list = arg["candidate_list"]
+    positions = {id(candidate): index
+                 for index, candidate in enumerate(candidate_list)}
+    for vm_label in arg["vm_labels"]:
+        label_arg = dict(vm_label, candidate_list=candidate_list)
+        get_candidates_with_hpa(label_arg, flavor_index, match_cache)
+        if not candidate_list:
+            break
+
+    mappings = []
+    for candidate in candidate_list:
+        mapping = {key: candidate[key] for key in HPA_MAPPING_KEYS
+                   if key in candidate}
+        mapping["index"] = positions[id(candidate)]
+        mappings.append(mapping)
+    return mappings
+
+
 def merge_directives(candidate_list, index, id, type, directives, feature_directives):
     """Merge the flavor_directives with other diectives listed under hpa capabilities in the policy
 
@@ -169,25 +211,220 @@ def merge_directives(candidate_list, index, id, type, directives, feature_direct
     candidate_list[index]["all_directives"]["directives"].append(directive)
 
 
-def match_hpa(candidate, features):
-    """Match HPA features requirement with the candidate flavors """
-    hpa_provider = HpaMatchProvider(candidate, features)
+def match_hpa(candidate, features, flavor_index=None, match_cache=None):
+    """Match HPA features requirement with the candidate flavors
+
+    With both a flavor_index and a match_cache, the result is cached
+    by cloud region, flavors fingerprint and requirement, so the same
+    requirement is matched once per version of the region flavors.
+
+    :param candidate: cloud candidate with its flavors
+    :param features: required HPA capabilities
+    :param flavor_index: FlavorIndex of the candidate flavors, built
+                         from them when not given
+    :param match_cache: LRUCache of the results
+    """
+    key = None
+    if flavor_index is not None and match_cache is not None:
+        key = (candidate.get('candidate_id'), flavor_index.fingerprint,
+               get_fingerprint(features))
+        cached = match_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached[0])
+
+    hpa_provider = HpaMatchProvider(candidate, features, flavor_index)
     if hpa_provider.init_verify():
         directives = hpa_provider.match_flavor()
     else:
         directives = None
+    if key is not None:
+        match_cache.put(key, (copy.deepcopy(directives),))
     return directives
 
 
+def get_fingerprint(data):
+    """Digest of the JSON serializable data"""
+    text = json.dumps(data, sort_keys=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+UNIT_FACTORS = {
+    'KB': 1024,
+    'MB': 1024 * 1024,
+    'GB': 1024 * 1024 * 1024,
+}
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _get_int(value):
+    """Integer of a digit string or an integer, None otherwise"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _get_normalized_value(value, unit):
+    """Return (value, integer value) of an attribute value.
+
+    Integer values are converted to bytes using unit.
+    """
+    int_value = _get_int(value)
+    if int_value is None:
+        return value, None
+    if unit:
+        int_value = int_value * UNIT_FACTORS.get(unit, 1)
+    return str(int_value), int_value
+
+
+def _get_flavor_attribute(flavor_attr):
+    """Parse the value of a flavor attribute, None if invalid"""
+    try:
+        attrib_value = yaml.safe_load(flavor_attr['hpa-attribute-value'])
+    except Exception:
+        return None
+    if not isinstance(attrib_value, dict) or \
+            attrib_value.get('value') is None:
+        return None
+    return _get_normalized_value(attrib_value['value'],
+                                 attrib_value.get('unit'))
+
+
+def _get_req_attribute(req_attr):
+    """Parse a required attribute to (operator, value, integer value)"""
+    try:
+        c_op = req_attr['operator']
+        c_value = req_attr['hpa-attribute-value']
+    except KeyError:
+        LOG.info(_LI("invalid JSON "))
+        return None
+    if c_value is None:
+        return None
+    if req_attr.get('unit'):
+        return (c_op,) + _get_normalized_value(c_value, req_attr['unit'])
+    return c_op, c_value, _get_int(c_value)
+
+
+def _compare_attribute(flavor_attr, req_attr):
+    """Compare a parsed flavor attribute with a parsed requirement"""
+    if flavor_attr is None or req_attr is None:
+        return False
+    flavor_value, flavor_int = flavor_attr
+    req_op, req_value, req_int = req_attr
+
+    # Compare operators only valid for Integers
+    if req_op in OPERATORS:
+        if req_int is None or flavor_int is None:
+            return False
+        return OPERATORS[req_op](flavor_int, req_int)
+
+    if req_op == 'ALL':
+        # All is valid only for lists
+        return isinstance(req_value, list) and \
+            isinstance(flavor_value, list) and \
+            match_all_operator(flavor_value, req_value)
+
+    if req_op == '=':
+        # if values are not both integers compare them as they are
+        if req_int is None or flavor_int is None:
+            return req_value == flavor_value
+        return flavor_int == req_int
+
+    return False
+
+
+class FlavorIndex(object):
+    """HPA capabilities of a flavor list, parsed once.
+
+    Flavors are indexed by feature, architecture and version, and the
+    values of their attributes are parsed and normalized, so matching a
+    requirement does not rescan the flavors nor parse them again.
+    """
+
+    def __init__(self, flavors_list, fingerprint=None):
+        self.flavors = flavors_list
+        self._fingerprint = fingerprint
+        # feature -> architecture -> version -> flavor positions
+        self.index = {}
+        # feature -> attribute lists of each flavor, None without HPA
+        self.features = []
+        for position, flavor in enumerate(flavors_list):
+            if 'hpa-capabilities' not in flavor:
+                self.features.append(None)
+                continue
+            features = {}
+            for capability in CapabilityDataParser.get_item(
+                    flavor['hpa-capabilities'] or {}, 'hpa-capability'):
+                feature = capability.get_feature()
+                self.index.setdefault(feature, {}).setdefault(
+                    capability.item.get('architecture'), {}).setdefault(
+                    capability.item.get('hpa-version'), set()).add(position)
+                attributes = {}
+                for attr in capability.get_feature_attributes() or []:
+                    key = attr.get('hpa-attribute-key')
+                    if key not in attributes:
+                        attributes[key] = _get_flavor_attribute(attr)
+                features.setdefault(feature, []).append(attributes)
+            self.features.append(features)
+
+    @property
+    def fingerprint(self):
+        """Digest of the flavors, computed on first use"""
+        if self._fingerprint is None:
+            self._fingerprint = get_fingerprint(self.flavors)
+        return self._fingerprint
+
+    def find(self, feature, architecture, version):
+        """Positions of the flavors having the capability"""
+        return self.index.get(feature, {}).get(
+            architecture, {}).get(version, set())
+
+
+class HpaRequirement(object):
+    """Required HPA capability, with its attributes parsed"""
+
+    def __init__(self, item):
+        self.item = item
+        self.feature = item.get('hpa-feature')
+        self.architecture = item.get('architecture')
+        self.version = item.get('hpa-version')
+        self.mandatory = item['mandatory'].lower() == 'true'
+        self.optional = item['mandatory'].lower() == 'false'
+        self.attributes = [
+            (attr.get('hpa-attribute-key'), _get_req_attribute(attr))
+            for attr in item.get('hpa-feature-attributes') or []]
+
+    def match(self, flavor_features):
+        """Whether a capability of the flavor has all the attributes"""
+        for flavor_attributes in flavor_features.get(self.feature, []):
+            if all(_compare_attribute(flavor_attributes.get(key), req_attr)
+                   for key, req_attr in self.attributes):
+                return True
+        return False
+
+
 class HpaMatchProvider(object):
 
-    def __init__(self, candidate, req_cap_list):
+    def __init__(self, candidate, req_cap_list, flavor_index=None):
         self.flavors_list = None
         if isinstance(candidate.get('flavors'), dict) \
                 and candidate.get('flavors').get('flavor'):
             self.flavors_list = candidate.get('flavors').get('flavor')
+        elif flavor_index is not None and flavor_index.flavors:
+            # flavors referenced by the candidate flavor_catalog
+            self.flavors_list = flavor_index.flavors
         self.req_cap_list = req_cap_list
         self.m_vim_id = candidate.get('vim-id')
+        self.flavor_index = flavor_index
 
     # Find out whether there is flavor info inside the candidate
     def init_verify(self):
@@ -198,230 +435,76 @@ class HpaMatchProvider(object):
 
     # Find the flavor which has all the required capabilities
     def match_flavor(self):
-        # Keys to find capability match
-        hpa_keys = ['hpa-feature', 'architecture', 'hpa-version']
-        req_filter_list = []
-        for capability in CapabilityDataParser.get_item(self.req_cap_list,
-                                                        None):
-            if capability.item['mandatory'].lower() == 'true':
-                hpa_list = {k: capability.item[k]
-                            for k in hpa_keys if k in capability.item}
-                if hpa_list not in req_filter_list:
-                    req_filter_list.append(hpa_list)
+        index = self.flavor_index or FlavorIndex(self.flavors_list)
+        requirements = [HpaRequirement(capability.item) for capability in
+                        CapabilityDataParser.get_item(self.req_cap_list,
+                                                      None)]
+        # Flavors having all the mandatory capabilities
+        supported = set(position for position, features
+                        in enumerate(index.features) if features is not None)
+        for requirement in requirements:
+            if requirement.mandatory:
+                supported &= index.find(requirement.feature,
+                                        requirement.architecture,
+                                        requirement.version)
+        req_directives = self._get_directives() if supported else None
+
         max_score = -1
         directives = None
-        for flavor in self.flavors_list:
-            flavor_filter_list = []
-            try:
-                flavor_cap_list = flavor['hpa-capabilities']
-            except KeyError:
+        for position, flavor in enumerate(index.flavors):
+            m_flavor_name = flavor['flavor-name']
+            if index.features[position] is None:
                 LOG.info(_LI("hpa-capabilities not found in flavor "))
-                # Metrics to Prometheus
-                m_flavor_name = flavor['flavor-name']
-                PC.HPA_FLAVOR_MATCH_UNSUCCESSFUL.labels('ONAP', 'N/A', 'N/A',
-                                                        'N/A', self.m_vim_id,
-                                                        m_flavor_name).inc()
-                continue
-            for capability in CapabilityDataParser.get_item(flavor_cap_list,
-                                                            'hpa-capability'):
-                hpa_list = {k: capability.item[k]
-                            for k in hpa_keys if k in capability.item}
-                flavor_filter_list.append(hpa_list)
-            # if flavor has the matching capability compare attributes
-            if self._is_cap_supported(flavor_filter_list, req_filter_list):
-                match_found, score, req_directives = self._compare_feature_attributes(flavor_cap_list)
-                if match_found:
+            elif position in supported:
+                # flavor has the matching capability compare attributes
+                score = self._get_score(index.features[position],
+                                        requirements)
+                if score is not None:
                     LOG.info(_LI("Matching Flavor found '{}' for request - {}").
-                             format(flavor['flavor-name'], self.req_cap_list))
+                             format(m_flavor_name, self.req_cap_list))
                     # Metrics to Prometheus
-                    m_flavor_name = flavor['flavor-name']
                     PC.HPA_FLAVOR_MATCH_SUCCESSFUL.labels('ONAP', 'N/A', 'N/A',
                                                           'N/A', self.m_vim_id,
                                                           m_flavor_name).inc()
                     if score > max_score:
                         max_score = score
                         flavor_map = {"flavor-id": flavor['flavor-id'],
-                                      "flavor-name": flavor['flavor-name'],
+                                      "flavor-name": m_flavor_name,
                                       "score": max_score}
                         directives = {"flavor_map": flavor_map,
                                       "directives": req_directives}
-                else:
-                    # Metrics to Prometheus
-                    m_flavor_name = flavor['flavor-name']
-                    PC.HPA_FLAVOR_MATCH_UNSUCCESSFUL.labels('ONAP', 'N/A',
-                                                            'N/A', 'N/A',
-                                                            self.m_vim_id,
-                                                            m_flavor_name).inc()
-            else:
-                # Metrics to Prometheus
-                m_flavor_name = flavor['flavor-name']
-                PC.HPA_FLAVOR_MATCH_UNSUCCESSFUL.labels('ONAP', 'N/A',
-                                                        'N/A', 'N/A',
-                                                        self.m_vim_id,
-                                                        m_flavor_name).inc()
+                    continue
+            # Metrics to Prometheus
+            PC.HPA_FLAVOR_MATCH_UNSUCCESSFUL.labels('ONAP', 'N/A',
+                                                    'N/A', 'N/A',
+                                                    self.m_vim_id,
+                                                    m_flavor_name).inc()
         return directives
 
-    def _is_cap_supported(self, flavor, cap):
-        try:
-            for elem in cap:
-                flavor.remove(elem)
-        except ValueError:
-            return False
-        # Found all capabilities in Flavor
-        return True
-
-    # Convert to bytes value using unit
-    def _get_normalized_value(self, unit, value):
-
-        if not value.isdigit():
-            return value
-        value = int(value)
-        if unit == 'KB':
-            value = value * 1024
-        elif unit == 'MB':
-            value = value * 1024 * 1024
-        elif unit == 'GB':
-            value = value * 1024 * 1024 * 1024
-        return str(value)
-
-    def _get_req_attribute(self, req_attr):
-        try:
-            c_op = req_attr['operator']
-            c_value = req_attr['hpa-attribute-value']
-            c_unit = None
-            if 'unit' in req_attr:
-                c_unit = req_attr['unit']
-        except KeyError:
-            LOG.info(_LI("invalid JSON "))
-            return None
-
-        if c_unit:
-            c_value = self._get_normalized_value(c_unit, c_value)
-        return c_value, c_op
-
-    def _get_flavor_attribute(self, flavor_attr):
-        try:
-            attrib_value = yaml.load(flavor_attr['hpa-attribute-value'])
-        except Exception:
-            return None
-
-        f_unit = None
-        f_value = None
-        for key, value in attrib_value.items():
-            if key == 'value':
-                f_value = value
-            elif key == 'unit':
-                f_unit = value
-        if f_unit:
-            f_value = self._get_normalized_value(f_unit, f_value)
-        return f_value
-
-    def _get_operator(self, req_op):
-
-        operator_list = ['=', '<', '>', '<=', '>=', 'ALL']
-
-        if req_op not in operator_list:
-            return None
-
-        if req_op == ">":
-            op = operator.gt
-        elif req_op == ">=":
-            op = operator.ge
-        elif req_op == "<":
-            op = operator.lt
-        elif req_op == "<=":
-            op = operator.le
-        elif req_op == "=":
-            op = operator.eq
-        elif req_op == 'ALL':
-            op = match_all_operator
-
-        return op
-
-    def _compare_attribute(self, flavor_attr, req_attr):
-
-        req_value, req_op = self._get_req_attribute(req_attr)
-        flavor_value = self._get_flavor_attribute(flavor_attr)
-
-        if req_value is None or flavor_value is None:
-            return False
-
-        # Compare operators only valid for Integers
-        if req_op in ['<', '>', '<=', '>=']:
-            if not req_value.isdigit() or not flavor_value.isdigit():
-                return False
-
-        op = self._get_operator(req_op)
-        if not op:
-            return False
-
-        if req_op == 'ALL':
-            # All is valid only for lists
-            if isinstance(req_value, list) and isinstance(flavor_value, list):
-                return op(flavor_value, req_value)
-
-        # if values are string compare them as strings
-        if req_op == '=':
-            if not req_value.isdigit() or not flavor_value.isdigit():
-                return op(req_value, flavor_value)
-
-        # Only integers left to compare
-        if req_op in ['<', '>', '<=', '>=', '=']:
-            return op(int(flavor_value), int(req_value))
-
-        return False
-
-    # for the feature get the capabilty feature attribute list
-    def _get_flavor_cfa_list(self, feature, flavor_cap_list):
-        feature_attr_list = []
-        for capability in CapabilityDataParser.get_item(flavor_cap_list,
-                                                        'hpa-capability'):
-            flavor_feature, feature_attributes = capability.get_fields()
-            # Multiple features that match this condition will be filtered
-            if feature == flavor_feature:
-                feature_attr_list.append(feature_attributes)
-        return feature_attr_list
-
-    # flavor has all the required capabilties
-    # For each required capability find capability in flavor
-    # and compare each attribute
-    def _compare_feature_attributes(self, flavor_cap_list):
-        score = 0
+    # directives of all the required capabilities
+    def _get_directives(self):
         directives = []
         for capability in CapabilityDataParser.get_item(self.req_cap_list, None):
-            hpa_feature, req_cfa_list = capability.get_fields()
             feature_directive = capability.get_directives()
             if feature_directive:
                 feature_directive[:] = [d for d in feature_directive
                                         if d.get("type") != ""]
                 for item in feature_directive:
                     directives.append(item)
-            flavor_cfa_list = self._get_flavor_cfa_list(hpa_feature, flavor_cap_list)
-            req_flag = False
-            if flavor_cfa_list is not None:
-                for flavor_cfa in flavor_cfa_list:
-                    flavor_flag = True
-                    for req_feature_attr in req_cfa_list:
-                        req_attr_key = req_feature_attr['hpa-attribute-key']
-                        # filter to get the attribute being compared
-                        flavor_feature_attr = \
-                            filter(lambda ele: ele['hpa-attribute-key'] ==
-                                   req_attr_key, flavor_cfa)
-                        if not flavor_feature_attr:
-                            flavor_flag = False
-                        elif not self._compare_attribute(list(flavor_feature_attr)[0],
-                                                         req_feature_attr):
-                            flavor_flag = False
-                    if not flavor_flag:
-                        continue
-                    else:
-                        req_flag = True
-                        break
-            if not req_flag and capability.item['mandatory'].lower() == 'true':
-                return False, 0, None
-            if req_flag and capability.item['mandatory'].lower() == 'false':
-                score = score + int(capability.item['score'])
-        return True, score, directives
+        return directives
+
+    # flavor has all the required capabilties
+    # For each required capability find capability in flavor
+    # and compare each attribute
+    def _get_score(self, flavor_features, requirements):
+        score = 0
+        for requirement in requirements:
+            req_flag = requirement.match(flavor_features)
+            if not req_flag and requirement.mandatory:
+                return None
+            if req_flag and requirement.optional:
+                score = score + int(requirement.item['score'])
+        return score
 
 
 class CapabilityDataParser(object):
@@ -0,0 +1,74 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""On-disk snapshots of inventory provider caches.
+
+A snapshot file holds a header line followed by zlib compressed JSON.
+It is written to a temporary file that is then renamed over the
+previous snapshot, so readers never see a partial file.
+"""
+
+import json
+import os
+import zlib
+
+from oslo_log import log
+
+from conductor.i18n import _LE
+
+LOG = log.getLogger(__name__)
+
+HEADER = b'conductor-cache-snapshot-v1\n'
+
+
+def save(path, snapshot, level=6):
+    """Write the snapshot dict to path"""
+    data = zlib.compress(json.dumps(snapshot).encode('utf-8'), level)
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as snapshot_file:
+            snapshot_file.write(HEADER)
+            snapshot_file.write(data)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load(path):
+    """Read the snapshot dict from path, None if missing or unreadable"""
+    try:
+        with open(path, 'rb') as snapshot_file:
+            content = snapshot_file.read()
+    except (IOError, OSError):
+        return None
+    if not content.startswith(HEADER):
+        LOG.error(_LE("{} is not a cache snapshot").format(path))
+        return None
+    try:
+        data = zlib.decompress(content[len(HEADER):])
+        return json.loads(data.decode('utf-8'))
+    except (zlib.error, ValueError) as exc:
+        LOG.error(_LE("Cache snapshot {} is corrupt: {}").format(path, exc))
+        return None
@@ -18,9 +18,8 @@
 #
 
 from oslo_log import log
-import stevedore
-
 from conductor.conf import service_controller
+from conductor.data.plugins import extensions
 from conductor.i18n import _LI
 
 LOG = log.getLogger(__name__)
@@ -28,12 +27,13 @@ LOG = log.getLogger(__name__)
 service_controller.register_extension_manager_opts()
 
 
-class Manager(stevedore.named.NamedExtensionManager):
+class Manager(extensions.ConcurrentManager):
     """Manage Service Controller extensions."""
 
     def __init__(self, conf, namespace):
         super(Manager, self).__init__(
-            namespace, conf.service_controller.extensions,
+            conf.service_controller, namespace,
+            conf.service_controller.extensions,
             invoke_on_load=True, name_order=True, propagate_map_exceptions=True)
         LOG.info(_LI("Loaded service controller extensions: %s"), self.names())
 
@@ -55,6 +55,7 @@ SDNC_OPTS = [
 ]
 
 CONF.register_opts(SDNC_OPTS, group='sdnc')
+CONF.register_opts(rest.POOL_OPTS, group='sdnc')
 
 
 class SDNC(base.ServiceControllerBase):
@@ -80,7 +81,9 @@ class SDNC(base.ServiceControllerBase):
             "password": self.password,
             "log_debug": self.conf.debug,
             "read_timeout": self.timeout,
+            "name": "sdnc",
         }
+        kwargs.update(rest.pool_kwargs(self.conf.sdnc))
         self.rest = rest.REST(**kwargs)
 
         # Not sure what info from SDNC is cacheable
@@ -18,9 +18,8 @@
 #
 
 from oslo_log import log
-import stevedore
-
 from conductor.conf import vim_controller
+from conductor.data.plugins import extensions
 from conductor.i18n import _LI
 
 LOG = log.getLogger(__name__)
@@ -28,12 +27,13 @@ LOG = log.getLogger(__name__)
 vim_controller.register_extension_manager_opts()
 
 
-class Manager(stevedore.named.NamedExtensionManager):
+class Manager(extensions.ConcurrentManager):
     """Manage Vim Controller extensions."""
 
     def __init__(self, conf, namespace):
         super(Manager, self).__init__(
-            namespace, conf.vim_controller.extensions,
+            conf.vim_controller, namespace,
+            conf.vim_controller.extensions,
             invoke_on_load=True, name_order=True)
         LOG.info(_LI("Loaded Vim controller extensions: %s"), self.names())
 
@@ -22,7 +22,9 @@
 import time
 import uuid
 
+from conductor.common import lru_cache
 from conductor.common import rest
+from conductor.common import single_flight
 from conductor.data.plugins.vim_controller import base
 from conductor.i18n import _LE, _LI
 from oslo_config import cfg
@@ -51,9 +53,21 @@ MULTICLOUD_OPTS = [
                     'Must contain the appropriate trust chain for the '
                     'Certificate file.'),
     cfg.BoolOpt('enable_https_mode', default = False, help='enable HTTPs mode for multicloud connection'),
+    cfg.IntOpt('capacity_cache_ttl',
+               default=5,
+               min=0,
+               help='Time in seconds the VIMs with capacity for a request '
+                    'are cached. Concurrent identical requests are also '
+                    'sent once. 0 disables the cache.'),
+    cfg.IntOpt('capacity_cache_size',
+               default=1000,
+               min=0,
+               help='Maximum number of VIM capacity requests cached. '
+                    '0 disables the cache.'),
 ]
 
 CONF.register_opts(MULTICLOUD_OPTS, group='multicloud')
+CONF.register_opts(rest.POOL_OPTS, group='multicloud')
 
 
 class MULTICLOUD(base.VimControllerBase):
@@ -66,6 +80,11 @@ class MULTICLOUD(base.VimControllerBase):
         self.version = self.conf.multicloud.server_url_version.rstrip('/')
         self.timeout = self.conf.multicloud.multicloud_rest_timeout
         self.retries = self.conf.multicloud.multicloud_retries
+        self._capacity_cache = lru_cache.LRUCache(
+            'multicloud_capacity', self.conf.multicloud.capacity_cache_size,
+            self.conf.multicloud.capacity_cache_ttl)
+        self._capacity_calls = single_flight.SingleFlight(
+            'multicloud_capacity')
 
     def initialize(self):
         LOG.info(_LI("**** Initializing Multicloud Vim controller *****"))
@@ -113,21 +132,34 @@ class MULTICLOUD(base.VimControllerBase):
             "retries": self.retries,
             "log_debug": self.conf.debug,
             "read_timeout": self.timeout,
+            "name": "multicloud",
         }
+        kwargs.update(rest.pool_kwargs(self.conf.multicloud))
         self.rest = rest.REST(**kwargs)
         if self.conf.multicloud.enable_https_mode:
             self.rest.server_url = self.base[:4]+'s'+self.base[4:]
             self.rest.session.verify =self.conf.multicloud.certificate_authority_bundle_file    
 
     def check_vim_capacity(self, vim_request):
-        LOG.debug("Invoking check_vim_capacity api")
-        path = '/{}/{}'.format(self.version, 'check_vim_capacity')
-
         data = {}
         data['vCPU'] = vim_request['vCPU']
         data['Memory'] = vim_request['Memory']['quantity']
         data['Storage'] = vim_request['Storage']['quantity']
         data['VIMs'] = vim_request['VIMs']
+
+        key = (data['vCPU'], data['Memory'], data['Storage'],
+               frozenset(data['VIMs']))
+        vims = self._capacity_cache.get(key)
+        if vims is None:
+            vims = self._capacity_calls.do(key, self._check_vim_capacity,
+                                           data)
+            if vims is not None:
+                self._capacity_cache.put(key, vims)
+        return None if vims is None else list(vims)
+
+    def _check_vim_capacity(self, data):
+        LOG.debug("Invoking check_vim_capacity api")
+        path = '/{}/{}'.format(self.version, 'check_vim_capacity')
         response = self._request('post', path=path, data=data,
                                  context="vim capacity", value="all")
         LOG.debug("Response check_vim_capacity api - {}".format(response))
@@ -396,23 +396,33 @@ class DataEndpoint(object):
 
             elif attrib == 'replication_role':
 
+                # look up the roles of all candidate hosts at once
+                host_ids = [candidate.get("host_id")
+                            for candidate in candidate_list
+                            if candidate.get("host_id")]
+                roles = None
+                if host_ids:
+                    results = self.ip_ext_manager.map_method(
+                        'check_candidate_roles',
+                        host_ids=host_ids
+                    )
+                    if results and len(results) > 0:
+                        roles = results[0]
+                    else:
+                        LOG.error(
+                            _LE("Empty response for replication roles "
+                                "{}").format(value))
+
                 for candidate in candidate_list:
 
                     host_id = candidate.get("host_id")
                     if host_id:
-                        results = self.ip_ext_manager.map_method(
-                            'check_candidate_role',
-                            host_id = host_id
-                        )
-
-                        if not results or len(results) < 1:
-                            LOG.error(
-                                _LE("Empty response for replication roles {}").format(role))
+                        if roles is None:
                             discard_set.add(candidate.get("candidate_id"))
                             continue
 
                         # compare results from A&AI with the value in attribute constraint
-                        if value and results[0] != value.upper():
+                        if value and roles.get(host_id) != value.upper():
                             discard_set.add(candidate.get("candidate_id"))
 
             elif attrib == 'complex':
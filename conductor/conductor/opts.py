@@ -22,16 +22,22 @@ import itertools
 import conductor.api.adapters.aaf.aaf_authentication
 import conductor.api.app
 import conductor.api.controllers.v1.plans
+import conductor.common.models.plan_payload
 import conductor.common.music.api
 import conductor.common.music.messaging.component
+import conductor.common.poller
 import conductor.common.prometheus_metrics
+import conductor.common.rest
 import conductor.common.sms
+import conductor.common.work_queue
 import conductor.conf.inventory_provider
 import conductor.conf.service_controller
 import conductor.conf.vim_controller
 import conductor.controller.service
+import conductor.controller.translator
 import conductor.controller.translator_svc
 import conductor.data.plugins.inventory_provider.aai
+import conductor.data.plugins.inventory_provider.generator
 import conductor.data.plugins.service_controller.sdnc
 import conductor.data.plugins.vim_controller.multicloud
 import conductor.reservation.service
@@ -49,6 +55,7 @@ def list_opts():
          conductor.api.controllers.v1.plans.CONDUCTOR_API_OPTS),
         ('controller', itertools.chain(
             conductor.controller.service.CONTROLLER_OPTS,
+            conductor.controller.translator.TRANSLATOR_OPTS,
             conductor.controller.translator_svc.CONTROLLER_OPTS)),
         ('data', conductor.data.service.DATA_OPTS),
         ('inventory_provider',
@@ -60,22 +67,35 @@ def list_opts():
         ('inventory_provider', itertools.chain(
             conductor.conf.inventory_provider.
             INV_PROVIDER_EXT_MANAGER_OPTS)),
-        ('aai', conductor.data.plugins.inventory_provider.aai.AAI_OPTS),
+        ('aai', itertools.chain(
+            conductor.data.plugins.inventory_provider.aai.AAI_OPTS,
+            conductor.common.rest.POOL_OPTS)),
         ('vim_controller', itertools.chain(
             conductor.conf.vim_controller.VIM_CONTROLLER_EXT_MANAGER_OPTS)),
-        ('multicloud',
-         conductor.data.plugins.vim_controller.multicloud.MULTICLOUD_OPTS),
+        ('multicloud', itertools.chain(
+            conductor.data.plugins.vim_controller.multicloud.MULTICLOUD_OPTS,
+            conductor.common.rest.POOL_OPTS)),
         ('service_controller', itertools.chain(
             conductor.conf.service_controller.
             SVC_CONTROLLER_EXT_MANAGER_OPTS)),
-        ('sdnc', conductor.data.plugins.service_controller.sdnc.SDNC_OPTS),
+        ('sdnc', itertools.chain(
+            conductor.data.plugins.service_controller.sdnc.SDNC_OPTS,
+            conductor.common.rest.POOL_OPTS)),
         ('messaging_server',
          conductor.common.music.messaging.component.MESSAGING_SERVER_OPTS),
-        ('music_api', conductor.common.music.api.MUSIC_API_OPTS),
+        ('music_api', itertools.chain(
+            conductor.common.music.api.MUSIC_API_OPTS,
+            conductor.common.rest.POOL_OPTS)),
+        ('generator',
+         conductor.data.plugins.inventory_provider.generator.GENERATOR_OPTS),
+        ('plan_storage',
+         conductor.common.models.plan_payload.PLAN_STORAGE_OPTS),
+        ('polling', conductor.common.poller.POLLING_OPTS),
         ('solver', conductor.solver.service.SOLVER_OPTS),
         ('reservation', conductor.reservation.service.reservation_OPTS),
         ('aaf_sms', conductor.common.sms.AAF_SMS_OPTS),
         ('aaf_api',
          conductor.api.adapters.aaf.aaf_authentication.AAF_OPTS),
         ('prometheus', conductor.common.prometheus_metrics.METRICS_OPTS),
+        ('work_queue', conductor.common.work_queue.WORK_QUEUE_OPTS),
     ]
@@ -18,6 +18,7 @@
 #
 
 import cotyledon
+import futurist
 import json
 import time
 import socket
@@ -25,6 +26,9 @@ from oslo_config import cfg
 from oslo_log import log
 
 from conductor.common.models import plan
+from conductor.common.models import work_item
+from conductor.common import poller
+from conductor.common import work_queue
 from conductor.common.music import api
 from conductor.common.music import messaging as music_messaging
 from conductor.common.music.model import base
@@ -60,7 +64,13 @@ reservation_OPTS = [
                      'orphaned reserving requests at startup.'),
     cfg.IntOpt('max_reservation_counter',
                default=1,
-               min=1)
+               min=1),
+    cfg.IntOpt('reserve_workers',
+               default=10,
+               min=1,
+               help='Number of reservations or releases of a plan the '
+                    'reservation service asks the data service for at '
+                    'once.'),
 ]
 
 CONF.register_opts(reservation_OPTS, group='reservation')
@@ -85,6 +95,10 @@ class ReservationServiceLauncher(object):
             keyspace=conf.keyspace, baseclass=plan.Plan, classname="Plan")
         self.OrderLock = base.create_dynamic_model(
             keyspace=conf.keyspace, baseclass=order_lock.OrderLock, classname="OrderLock")
+        self.WorkItem = None
+        if conf.work_queue.enabled:
+            self.WorkItem = base.create_dynamic_model(
+                keyspace=conf.keyspace, baseclass=work_item.WorkItem, classname="WorkItem")
 
         if not self.Plan:
             raise
@@ -93,7 +107,8 @@ class ReservationServiceLauncher(object):
 
     def run(self):
         kwargs = {'plan_class': self.Plan,
-                      'order_locks': self.OrderLock}
+                  'order_locks': self.OrderLock,
+                  'work_item_class': self.WorkItem}
         svcmgr = cotyledon.ServiceManager()
         svcmgr.add(ReservationService,
                    workers=self.conf.reservation.workers,
@@ -142,12 +157,30 @@ class ReservationService(cotyledon.Service):
         # Number of retries for reservation/release
         self.reservation_retries = self.conf.reservation.reserve_retries
 
+        # Reservations and releases of a plan are called through this
+        # pool, its threads are started on first use.
+        self.executor = futurist.ThreadPoolExecutor(
+            max_workers=self.conf.reservation.reserve_workers)
+
         if not self.conf.reservation.concurrent:
             self._reset_reserving_status()
 
+        self.poller = poller.AdaptivePoller(
+            conf, "reservation", self.conf.delay_time)
+
+        self.work_queue = None
+        if kwargs.get('work_item_class'):
+            self.work_queue = work_queue.WorkQueue(
+                conf, kwargs.get('work_item_class'), self.Plan,
+                work_queue.RESERVATION)
+            if not self.conf.reservation.concurrent:
+                self.work_queue.backfill()
+
     def _gracefully_stop(self):
         """Gracefully stop working on things"""
-        pass
+        if self.work_queue:
+            self.work_queue.stop()
+        self.executor.shutdown(wait=False)
 
     def current_time_seconds(self):
         """Current time in milliseconds."""
@@ -212,32 +245,56 @@ class ReservationService(cotyledon.Service):
             attempt_count += 1
         return False
 
+    def try_reservation_calls(self, method, reservation_list):
+        """Call try_reservation_call for each reservation concurrently.
+
+        :param method: reservation method, reserve or release
+        :param reservation_list: list of dicts with the candidate_list,
+            reservation_name, reservation_type, controller and request
+            of each reservation
+        :return: list of the call results, in reservation order
+        """
+        futures = [self.executor.submit(
+            self.try_reservation_call,
+            method=method,
+            candidate_list=reservation['candidate_list'],
+            reservation_name=reservation['reservation_name'],
+            reservation_type=reservation['reservation_type'],
+            controller=reservation['controller'],
+            request=reservation['request'])
+            for reservation in reservation_list]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def index_candidates(demands, demand_names):
+        """Index the translated candidates of the given demands.
+
+        :param demands: translated demands, with their candidates
+        :param demand_names: names of the demands to index
+        :return: dict of the lists of candidates by (demand name,
+            candidate id), in translation order
+        """
+        index = dict()
+        for demand_name in set(demand_names):
+            d_resource = demands.get(demand_name)
+            if not d_resource:
+                continue
+            for candidate in d_resource.get("candidates"):
+                key = (demand_name, candidate.get("candidate_id"))
+                index.setdefault(key, []).append(candidate)
+        return index
+
     def rollback_reservation(self, reservation_list):
         """Function to rollback(release) reservations"""
         # TODO(snarayanan): Need to test this once the API is ready
-        for reservation in reservation_list:
-            candidate_list = reservation['candidate_list']
-            reservation_name = reservation['reservation_name']
-            reservation_type = reservation['reservation_type']
-            controller = reservation['controller']
-            request = reservation['request']
-
-            is_success = self.try_reservation_call(
-                method="release",
-                candidate_list=candidate_list,
-                reservation_name=reservation_name,
-                reservation_type=reservation_type,
-                controller=controller,
-                request=request
-            )
+        results = self.try_reservation_calls("release", reservation_list)
+        for reservation, is_success in zip(reservation_list, results):
             if not is_success:
                 # rollback failed report error to SDNC
                 message = _LE("Unable to release reservation "
                               "{}").format(reservation)
                 LOG.error(message)
-                return False
-                # move to the next reserved candidate
-        return True
+        return all(results)
 
     def run(self):
         """Run"""
@@ -248,7 +305,7 @@ class ReservationService(cotyledon.Service):
         while self.running:
 
             # Delay time (Seconds) for MUSIC requests.
-            time.sleep(self.conf.delay_time)
+            self.poller.wait()
 
             # plans = Plan.query().all()
             # Find the first plan with a status of SOLVED.
@@ -259,13 +316,17 @@ class ReservationService(cotyledon.Service):
             p = None
             # requests_to_reserve = dict()
 
-            # Instead of using the query.all() method, now creating an index for 'status'
-            # field in conductor.plans table, and query plans by status columns
-            solved_plans = self.Plan.query.get_plan_by_col("status", self.Plan.SOLVED)
-            reserving_plans = self.Plan.query.get_plan_by_col("status", self.Plan.RESERVING)
+            if self.work_queue:
+                # Only look at plans claimed from the reservation work queue
+                plans = self.work_queue.claim_plans()
+            else:
+                # Instead of using the query.all() method, now creating an index for 'status'
+                # field in conductor.plans table, and query plans by status columns
+                solved_plans = self.Plan.query.get_plan_by_col("status", self.Plan.SOLVED)
+                reserving_plans = self.Plan.query.get_plan_by_col("status", self.Plan.RESERVING)
 
-            # combine the plans with status = 'solved' and 'reserving' together
-            plans = solved_plans + reserving_plans
+                # combine the plans with status = 'solved' and 'reserving' together
+                plans = solved_plans + reserving_plans
 
             found_solved_template = False
 
@@ -283,6 +344,8 @@ class ReservationService(cotyledon.Service):
                     found_solved_template = True
                     break
 
+            self.poller.record(found_solved_template)
+
             if not solution:
                 if found_solved_template:
                     message = _LE("Plan {} status is solved, yet "
@@ -340,9 +403,14 @@ class ReservationService(cotyledon.Service):
 
                 recommendations = solution.get("recommendations")
                 reservation_list = list()
+                demand_reservations = list()
                 # TODO(larry) combine the two reservation logic as one, make the code service independent
                 sdwan_candidate_list = list()
                 service_model = reservations.get("service_model")
+                candidate_index = self.index_candidates(
+                    translation.get("conductor_solver").get("demands"),
+                    [resource.get("demands") for resource
+                     in reservations.get("demands", {}).values()])
 
                 for reservation, resource in reservations.get("demands", {}).items():
                     candidates = list()
@@ -356,86 +424,81 @@ class ReservationService(cotyledon.Service):
                         request = reservation_properties.get("request")
 
                     for recommendation in recommendations:
-                        for demand, r_resource in recommendation.items():
-                            if demand == reservation_demand:
-                                # get selected candidate from translation
-                                selected_candidate_id = r_resource.get("candidate").get("candidate_id")
-                                demands = translation.get("conductor_solver").get("demands")
-                                for demand_name, d_resource in demands.items():
-                                    if demand_name == demand:
-
-                                        for candidate in d_resource.get("candidates"):
-                                            if candidate.get("candidate_id") == selected_candidate_id:
-                                                candidate['request'] = request
-                                                candidates.append(candidate)
-                                                sdwan_candidate_list.append(candidate)
+                        r_resource = recommendation.get(reservation_demand)
+                        if r_resource is None:
+                            continue
+                        # get selected candidate from translation
+                        selected_candidate_id = r_resource.get("candidate").get("candidate_id")
+                        for candidate in candidate_index.get(
+                                (reservation_demand, selected_candidate_id), []):
+                            candidate['request'] = request
+                            candidates.append(candidate)
+                            sdwan_candidate_list.append(candidate)
 
                     #TODO(larry) combine the two reservation logic as one, make the code service independent
                     if service_model == "ADIOD":
-                        is_success = self.try_reservation_call(
-                            method="reserve",
-                            candidate_list=candidates,
-                            reservation_type=service_model,
-                            controller=controller,
-                            request=request,
-                            reservation_name=None
-                        )
+                        curr_reservation = dict()
+                        curr_reservation['candidate_list'] = candidates
+                        curr_reservation['reservation_name'] = reservation_name
+                        curr_reservation['reservation_type'] = reservation_type
+                        curr_reservation['controller'] = controller
+                        curr_reservation['request'] = request
+                        demand_reservations.append(curr_reservation)
+
+                if demand_reservations:
+                    # reserve all the demands at once
+                    results = self.try_reservation_calls(
+                        "reserve",
+                        [dict(curr_reservation, reservation_type=service_model,
+                              reservation_name=None)
+                         for curr_reservation in demand_reservations])
+                    reservation_list = [
+                        curr_reservation for curr_reservation, is_success
+                        in zip(demand_reservations, results) if is_success]
+
+                    if not all(results):
+                        # roll back all reserved resources if any
+                        # reservation failed
+                        rollback_status = \
+                            self.rollback_reservation(reservation_list)
 
-                        # if reservation succeed continue with next candidate
-                        if is_success:
-                            curr_reservation = dict()
-                            curr_reservation['candidate_list'] = candidates
-                            curr_reservation['reservation_name'] = reservation_name
-                            curr_reservation['reservation_type'] = reservation_type
-                            curr_reservation['controller'] = controller
-                            curr_reservation['request'] = request
-                            reservation_list.append(curr_reservation)
+                        # order_lock spin-up rollback
+                        for decision in solution.get('recommendations'):
 
-                        else:
-                            # begin roll back of all reserved resources on
-                            # the first failed reservation
-                            rollback_status = \
-                                self.rollback_reservation(reservation_list)
-
-                            # order_lock spin-up rollback
-                            for decision in solution.get('recommendations'):
-
-                                candidate = list(decision.values())[0].get('candidate')   # Python 3 Conversion -- dict object to list object
-                                if candidate.get('inventory_type') == 'cloud':
-                                    # TODO(larry) change the code to get('conflict_id') instead of 'location_id'
-                                    conflict_id = candidate.get('conflict_id')
-                                    order_record = self.OrderLock.query.get_plan_by_col("id", conflict_id)[0]
-                                    if order_record:
-                                        order_record.delete()
-                            # statuses
-                            if rollback_status:
-                                # released all reservations,
-                                # move plan to translated
-                                if p.reservation_counter >= self.conf.reservation.max_reservation_counter:
-                                    p.status = self.Plan.ERROR
-                                    p.message = _LE("Tried {} times. Plan {} is unable to reserve").format(self.conf.reservation.max_reservation_counter, p.id)
-                                    LOG.error(p.message)
-                                else:
-                                    p.status = self.Plan.TRANSLATED
-                                # TODO(larry): Should be replaced by the new api from MUSIC
-                                while 'FAILURE' in _is_success:
-                                    _is_success = p.update(condition=self.reservation_owner_condition)
-                                    LOG.info(_LI("Rolling back the template from reserving to {} status, "
-                                                 "atomic update response from MUSIC {}").format(p.status, _is_success))
-                                del reservation_list[:]
-                            else:
-                                LOG.error("Reservation rollback failed")
+                            # Python 3 Conversion -- dict object to list object
+                            candidate = list(decision.values())[0].get('candidate')
+                            if candidate.get('inventory_type') == 'cloud':
+                                # TODO(larry) change the code to get('conflict_id') instead of 'location_id'
+                                conflict_id = candidate.get('conflict_id')
+                                order_record = self.OrderLock.query.get_plan_by_col("id", conflict_id)[0]
+                                if order_record:
+                                    order_record.delete()
+                        # statuses
+                        if rollback_status:
+                            # released all reservations,
+                            # move plan to translated
+                            if p.reservation_counter >= self.conf.reservation.max_reservation_counter:
                                 p.status = self.Plan.ERROR
-                                p.message = "Reservation release failed"
-                                # TODO(larry): Should be replaced by the new api from MUSIC
-                                while 'FAILURE' in _is_success:
-                                    _is_success = p.update(condition=self.reservation_owner_condition)
-                                    LOG.info(_LI("Rollback Failed, Changing the template status from reserving to error, "
-                                                 "atomic update response from MUSIC {}").format(_is_success))
-                            break  # reservation failed
-
-                    continue
-                    # continue with reserving the next candidate
+                                p.message = _LE("Tried {} times. Plan {} is unable to reserve").format(
+                                    self.conf.reservation.max_reservation_counter, p.id)
+                                LOG.error(p.message)
+                            else:
+                                p.status = self.Plan.TRANSLATED
+                            # TODO(larry): Should be replaced by the new api from MUSIC
+                            while 'FAILURE' in _is_success:
+                                _is_success = p.update(condition=self.reservation_owner_condition)
+                                LOG.info(_LI("Rolling back the template from reserving to {} status, "
+                                             "atomic update response from MUSIC {}").format(p.status, _is_success))
+                            del reservation_list[:]
+                        else:
+                            LOG.error("Reservation rollback failed")
+                            p.status = self.Plan.ERROR
+                            p.message = "Reservation release failed"
+                            # TODO(larry): Should be replaced by the new api from MUSIC
+                            while 'FAILURE' in _is_success:
+                                _is_success = p.update(condition=self.reservation_owner_condition)
+                                LOG.info(_LI("Rollback Failed, Changing the template status from reserving to error, "
+                                             "atomic update response from MUSIC {}").format(_is_success))
 
                 # TODO(larry) combine the two reservation logic as one, make the code service independent
                 if service_model == "DHV":
@@ -452,7 +515,8 @@ class ReservationService(cotyledon.Service):
                         # order_lock spin-up rollback
                         for decision in solution.get('recommendations'):
 
-                            candidate = list(decision.values())[0].get('candidate')   # Python 3 Conversion -- dict object to list object
+                            # Python 3 Conversion -- dict object to list object
+                            candidate = list(decision.values())[0].get('candidate')
                             if candidate.get('inventory_type') == 'cloud':
                                 conflict_id = candidate.get('conflict_id')
                                 order_record = self.OrderLock.query.get_plan_by_col("id", conflict_id)[0]
@@ -482,7 +546,8 @@ class ReservationService(cotyledon.Service):
                 LOG.debug("Plan {} Reservation complete".format(p.id))
                 p.status = self.Plan.DONE
 
-                while 'FAILURE' in _is_success and (self.current_time_seconds() - self.millisec_to_sec(p.updated)) <= self.conf.reservation.timeout:
+                while 'FAILURE' in _is_success and (self.current_time_seconds() - self.millisec_to_sec(
+                        p.updated)) <= self.conf.reservation.timeout:
                     _is_success = p.update(condition=self.reservation_owner_condition)
                     LOG.info(_LI("Reservation is complete, changing the template status from reserving to done, "
                                  "atomic update response from MUSIC {}").format(_is_success))
@@ -32,6 +32,11 @@ from oslo_log import log
 
 LOG = log.getLogger(__name__)
 
+# Candidate fields used to match hpa
+HPA_CANDIDATE_KEYS = ('candidate_id', 'inventory_type', 'vim-id', 'flavors',
+                      'flavor_catalog', 'directives', 'flavor_map',
+                      'all_directives', 'hpa_score')
+
 
 class HPA(constraint.Constraint):
     def __init__(self, _name, _type, _demand_list, _priority=0,
@@ -54,25 +59,31 @@ class HPA(constraint.Constraint):
         LOG.info(_LI("Solving constraint type '{}' for demand - [{}]").format(
             self.constraint_type, demand_name))
         vm_label_list = self.properties.get('evaluate')
-        for vm_demand in vm_label_list:
-            id = vm_demand['id']
-            type = vm_demand['type']
-            directives = vm_demand['directives']
-            flavorProperties = vm_demand['flavorProperties']
-            response = (cei.get_candidates_with_hpa(id,
-                                                    type,
-                                                    directives,
-                                                    _candidate_list,
-                                                    flavorProperties))
-            _candidate_list = response
-            if not response:
-                LOG.error(_LE("No matching candidates for HPA exists").format(
-                    id))
+        vm_labels = [{'id': vm_demand['id'],
+                      'type': vm_demand['type'],
+                      'directives': vm_demand['directives'],
+                      'flavorProperties': vm_demand['flavorProperties']}
+                     for vm_demand in vm_label_list]
+        if not vm_labels:
+            return _candidate_list
+
+        # Match all the vm labels at once, only sending the candidate
+        # fields used for matching and getting back the mappings
+        hpa_candidates = [{key: candidate[key] for key in HPA_CANDIDATE_KEYS
+                           if key in candidate}
+                          for candidate in _candidate_list]
+        response = cei.get_hpa_flavor_mappings(vm_labels, hpa_candidates)
+        if not response:
+            LOG.error(_LE("No matching candidates for HPA exists"))
 
-                # Metrics to Prometheus
-                PC.HPA_CLOUD_REGION_UNSUCCESSFUL.labels('ONAP', 'N/A',
-                                                        'ALL').inc()
-                break
-                # No need to continue.
+            # Metrics to Prometheus
+            PC.HPA_CLOUD_REGION_UNSUCCESSFUL.labels('ONAP', 'N/A',
+                                                    'ALL').inc()
+            return response
 
-        return _candidate_list
+        candidate_list = []
+        for mapping in response:
+            candidate = dict(_candidate_list[mapping.pop('index')])
+            candidate.update(mapping)
+            candidate_list.append(candidate)
+        return candidate_list
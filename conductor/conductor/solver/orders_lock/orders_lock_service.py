@@ -23,7 +23,9 @@ from oslo_log import log
 from oslo_config import cfg
 from conductor.common.models.plan import Plan
 from conductor.common.models.order_lock import OrderLock
+from conductor.common.models.work_item import WorkItem
 from conductor.common.music.model import base
+from conductor.common import work_queue
 
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
@@ -34,6 +36,12 @@ class OrdersLockingService(object):
         self.Plan = base.create_dynamic_model(keyspace=CONF.keyspace, baseclass=Plan, classname="Plan")
         self.OrderLock = base.create_dynamic_model(
             keyspace=CONF.keyspace, baseclass=OrderLock, classname="OrderLock")
+        self.work_queue = None
+        if CONF.work_queue.enabled:
+            WorkItemModel = base.create_dynamic_model(
+                keyspace=CONF.keyspace, baseclass=WorkItem, classname="WorkItem")
+            self.work_queue = work_queue.WorkQueue(
+                CONF, WorkItemModel, self.Plan, work_queue.TRANSLATOR)
 
     def get_order_by_resource_id(self, service_resource_id):
         return self.OrderLock.query.get(service_resource_id)
@@ -185,6 +193,8 @@ class OrdersLockingService(object):
         plan = self.Plan.query.get_plan_by_col("id", plan_id)[0]
         plan.rehome_plan()
         plan.update()
+        if self.work_queue:
+            self.work_queue.put(plan.id)
         return
 
     def current_time_millis(self):
@@ -35,10 +35,13 @@ from conductor.common.models import order_lock_history
 from conductor.common.models import plan
 from conductor.common.models import region_placeholders
 from conductor.common.models import triage_tool
+from conductor.common.models import work_item
+from conductor.common import poller
 from conductor.common.music import api
 from conductor.common.music import messaging as music_messaging
 from conductor.common.music.model import base
 import conductor.common.prometheus_metrics as PC
+from conductor.common import work_queue
 from conductor.common.utils import conductor_logging_util as log_util
 from conductor.i18n import _LE
 from conductor.i18n import _LI
@@ -148,6 +151,10 @@ class SolverServiceLauncher(object):
             keyspace=conf.keyspace, baseclass=country_latency.CountryLatency, classname="CountryLatency")
         self.TriageTool = base.create_dynamic_model(
             keyspace=conf.keyspace, baseclass=triage_tool.TriageTool, classname="TriageTool")
+        self.WorkItem = None
+        if conf.work_queue.enabled:
+            self.WorkItem = base.create_dynamic_model(
+                keyspace=conf.keyspace, baseclass=work_item.WorkItem, classname="WorkItem")
         # self.Groups = base.create_dynamic_model(
         #    keyspace=conf.keyspace, baseclass=groups.Groups, classname="Groups")
         # self.GroupRules = base.create_dynamic_model(
@@ -176,7 +183,8 @@ class SolverServiceLauncher(object):
                   'order_locks_history': self.OrderLockHistory,
                   'region_placeholders': self.RegionPlaceholders,
                   'country_latency': self.CountryLatency,
-                  'triage_tool': self.TriageTool
+                  'triage_tool': self.TriageTool,
+                  'work_item_class': self.WorkItem
                   }
         # kwargs = {'plan_class': self.Plan}
         svcmgr = cotyledon.ServiceManager()
@@ -237,9 +245,21 @@ class SolverService(cotyledon.Service):
         if not self.conf.solver.concurrent:
             self._reset_solving_status()
 
+        self.poller = poller.AdaptivePoller(
+            conf, "solver", self.conf.delay_time)
+
+        self.work_queue = None
+        if kwargs.get('work_item_class'):
+            self.work_queue = work_queue.WorkQueue(
+                conf, kwargs.get('work_item_class'), self.Plan,
+                work_queue.SOLVER)
+            if not self.conf.solver.concurrent:
+                self.work_queue.backfill()
+
     def _gracefully_stop(self):
         """Gracefully stop working on things"""
-        pass
+        if self.work_queue:
+            self.work_queue.stop()
 
     def current_time_seconds(self):
         """Current time in milliseconds."""
@@ -284,7 +304,7 @@ class SolverService(cotyledon.Service):
         while self.running:
 
             # Delay time (Seconds) for MUSIC requests.
-            time.sleep(self.conf.delay_time)
+            self.poller.wait()
 
             # plans = Plan.query().all()
             # Find the first plan with a status of TRANSLATED.
@@ -297,13 +317,17 @@ class SolverService(cotyledon.Service):
             regions_maps = dict()
             country_groups = list()
 
-            # Instead of using the query.all() method, now creating an index for 'status'
-            # field in conductor.plans table, and query plans by status columns
-            translated_plans = self.Plan.query.get_plan_by_col("status", self.Plan.TRANSLATED)
-            solving_plans = self.Plan.query.get_plan_by_col("status", self.Plan.SOLVING)
+            if self.work_queue:
+                # Only look at plans claimed from the solver work queue
+                plans = self.work_queue.claim_plans()
+            else:
+                # Instead of using the query.all() method, now creating an index for 'status'
+                # field in conductor.plans table, and query plans by status columns
+                translated_plans = self.Plan.query.get_plan_by_col("status", self.Plan.TRANSLATED)
+                solving_plans = self.Plan.query.get_plan_by_col("status", self.Plan.SOLVING)
 
-            # combine the plans with status = 'translated' and 'solving' together
-            plans = translated_plans + solving_plans
+                # combine the plans with status = 'translated' and 'solving' together
+                plans = translated_plans + solving_plans
 
             found_translated_template = False
 
@@ -318,6 +342,8 @@ class SolverService(cotyledon.Service):
                     p.update(condition=self.solving_status_condition)
                     break
 
+            self.poller.record(found_translated_template)
+
             if not json_template:
                 if found_translated_template:
                     message = _LE("Plan {} status is translated, yet "
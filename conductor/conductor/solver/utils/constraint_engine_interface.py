@@ -139,6 +139,25 @@ class ConstraintEngineInterface(object):
         LOG.debug("get_candidates_with_hpa response: {}".format(response))
         return response
 
+    def get_hpa_flavor_mappings(self, vm_labels, candidate_list):
+        """Get the flavor mapping of candidates matching all the vm labels.
+
+        :param vm_labels: id, type, directives and flavorProperties of
+                          each vm label
+        :param candidate_list: list of candidates to process
+        :return: list of the index in candidate_list, flavor_map,
+                 all_directives and hpa_score of the matching candidates
+        """
+        ctxt = {}
+        args = {"candidate_list": candidate_list,
+                "vm_labels": vm_labels,
+                "method_name": "get_hpa_flavor_mappings"}
+        response = self.client.call(ctxt=ctxt,
+                                    method="invoke_method",
+                                    args=args)
+        LOG.debug("get_hpa_flavor_mappings response: {}".format(response))
+        return response
+
     def get_candidates_with_vim_capacity(self, candidate_list, vim_request):
         """Returns the candidate_list with required vim capacity.
 
@@ -0,0 +1,182 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Test class for model plan"""
+
+import json
+import unittest
+
+import mock
+from oslo_config import cfg
+
+from conductor.common.models import plan
+from conductor.common.models import plan_payload
+from conductor.common.music.model import base
+
+
+class TestPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.music = mock.patch('conductor.common.music.api.MUSIC_API',
+                                create=True).start()
+        self.music.row_update.return_value = 'SUCCESS'
+        self.Plan = base.create_dynamic_model(
+            keyspace='test', baseclass=plan.Plan, classname="Plan")
+        self.translation = {'demands': ['candidate'] * 100}
+
+    def tearDown(self):
+        mock.patch.stopall()
+        cfg.CONF.clear_override('split_payloads', 'plan_storage')
+        cfg.CONF.clear_override('split_threshold', 'plan_storage')
+
+    def _row(self, **kwargs):
+        row = {
+            'name': 'name', 'timeout': 10, 'recommend_max': '1',
+            'status': plan.Plan.TRANSLATED,
+            'template': json.dumps({'homing_template_version': '1'}),
+            'translation': json.dumps(self.translation),
+            'solution': json.dumps({}),
+        }
+        row.update(kwargs)
+        return self.Plan(_insert=False, id='plan-id', **row)
+
+    def _written(self):
+        return self.music.row_update.call_args[1]['values']
+
+    def test_insert(self):
+        p = self.Plan('name', 10, '1', {'homing_template_version': '1'})
+        values = self.music.row_create.call_args[1]['values']
+        self.assertEqual(p.id, values['id'])
+        self.assertEqual(json.dumps(p.template), values['template'])
+        self.assertEqual('{}', values['translation'])
+        self.assertEqual('{}', values['solution'])
+
+    def test_status_update(self):
+        p = self._row()
+        p.status = plan.Plan.SOLVING
+        p.update()
+        values = self._written()
+        self.assertEqual(plan.Plan.SOLVING, values['status'])
+        for field in plan.PAYLOAD_FIELDS:
+            self.assertNotIn(field, values)
+
+        p.solution = {'recommendations': []}
+        p.update()
+        self.assertEqual(json.dumps(p.solution), self._written()['solution'])
+        self.assertNotIn('translation', self._written())
+
+        # Not written again once stored
+        p.update()
+        self.assertNotIn('solution', self._written())
+
+    def test_failed_update(self):
+        p = self._row()
+        p.solution = {'recommendations': []}
+        self.music.row_update.return_value = 'FAILURE'
+        p.update()
+        self.music.row_update.return_value = 'SUCCESS'
+        p.update()
+        self.assertIn('solution', self._written())
+
+    def test_split_payload(self):
+        cfg.CONF.set_override('split_payloads', True, 'plan_storage')
+        cfg.CONF.set_override('split_threshold', 100, 'plan_storage')
+        p = self._row(translation=json.dumps({}))
+        p.translation = self.translation
+        p.solution = {'recommendations': []}
+        p.update()
+
+        payload = self.music.row_create.call_args[1]['values']
+        self.assertEqual('translation', payload['field'])
+        self.assertEqual(self.translation, json.loads(
+            plan_payload.decompress(payload['data'])))
+        values = self._written()
+        self.assertEqual({plan.PAYLOAD_REF: payload['id']},
+                         json.loads(values['translation']))
+        self.assertEqual(json.dumps(p.solution), values['solution'])
+
+        # Reading the plan back only reads the payload when used
+        loaded = self._row(translation=values['translation'])
+        self.music.row_read.reset_mock()
+        loaded.status = plan.Plan.SOLVING
+        loaded.update()
+        self.music.row_read.assert_not_called()
+        self.assertNotIn('translation', self._written())
+
+        self.music.row_read.return_value = {'row 0': payload.copy()}
+        self.assertEqual(self.translation, loaded.translation)
+        self.music.row_read.assert_called_once_with(
+            keyspace='test', table='plan_payloads',
+            pk_name='id', pk_value=payload['id'])
+
+        # Replacing the payload removes the old version
+        loaded.translation = {}
+        loaded.update()
+        self.assertEqual('{}', self._written()['translation'])
+        self.assertEqual(payload['id'],
+                         self.music.row_delete.call_args[1]['pk_value'])
+
+    def test_replaced_payload(self):
+        stale = self._row(translation=json.dumps({plan.PAYLOAD_REF: 'old'}))
+        stale.id = 'plan-id'
+
+        # Another worker replaced the payload and deleted the old one
+        current = self._row(translation=json.dumps({plan.PAYLOAD_REF: 'new'}))
+        data = plan_payload.compress(json.dumps(self.translation))
+        payload_query = mock.MagicMock()
+        payload_query.one.side_effect = [
+            None, self.Plan.payload_class()(
+                id='new', plan_id='plan-id', field='translation',
+                data=data, _insert=False)]
+        with mock.patch.object(self.Plan.payload_class(), 'query',
+                               payload_query), \
+                mock.patch.object(self.Plan, 'query') as plan_query:
+            plan_query.one.return_value = current
+            self.assertEqual(self.translation, stale.translation)
+        self.assertEqual(['old', 'new'], [
+            call[0][0] for call in payload_query.one.call_args_list])
+        plan_query.one.assert_called_once_with('plan-id')
+
+        # Missing for good
+        missing = self._row(translation=json.dumps({plan.PAYLOAD_REF: 'x'}))
+        payload_query.one.side_effect = None
+        payload_query.one.return_value = None
+        with mock.patch.object(self.Plan.payload_class(), 'query',
+                               payload_query), \
+                mock.patch.object(self.Plan, 'query') as plan_query:
+            plan_query.one.return_value = self._row(
+                translation=json.dumps({plan.PAYLOAD_REF: 'x'}))
+            self.assertRaises(ValueError, lambda: missing.translation)
+
+    def test_update_error(self):
+        cfg.CONF.set_override('split_payloads', True, 'plan_storage')
+        cfg.CONF.set_override('split_threshold', 100, 'plan_storage')
+        p = self._row(translation=json.dumps({}))
+        p.translation = self.translation
+        self.music.row_update.side_effect = IOError
+        self.assertRaises(IOError, p.update)
+        # The payload written for the update is removed
+        payload_id = self.music.row_create.call_args[1]['values']['id']
+        self.assertEqual(payload_id,
+                         self.music.row_delete.call_args[1]['pk_value'])
+        self.assertNotIn('translation', p.values())
+
+
+if __name__ == '__main__':
+    unittest.main()
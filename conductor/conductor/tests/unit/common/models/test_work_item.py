@@ -0,0 +1,54 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Test class for model work_item"""
+
+import unittest
+from conductor.common.models.work_item import WorkItem
+from conductor.common.models.work_item import current_time_millis
+
+
+class TestWorkItem(unittest.TestCase):
+
+    def setUp(self):
+        self.workItem = WorkItem(stage='solver', plan_id='p1', _insert=False)
+
+    def testWorkItem(self):
+        self.assertEqual(True, self.workItem.atomic())
+        self.assertEqual("id", self.workItem.pk_name())
+        self.assertEqual("solver.p1", self.workItem.pk_value())
+        self.assertEqual(['stage'], self.workItem.indexes())
+
+        self.assertEqual('', self.workItem.values().get('owner'))
+        self.assertEqual(0, self.workItem.values().get('lease_expiry'))
+        self.assertEqual('<WorkItem solver.p1>', self.workItem.__repr__())
+        self.assertEqual('p1', self.workItem.__json__().get('plan_id'))
+        self.assertEqual('(id)', self.workItem.schema().get('PRIMARY KEY'))
+
+    def testClaimed(self):
+        self.assertFalse(self.workItem.claimed)
+        self.workItem.owner = 'host.1'
+        self.workItem.lease_expiry = current_time_millis() + 60000
+        self.assertTrue(self.workItem.claimed)
+        self.workItem.lease_expiry = current_time_millis() - 1
+        self.assertFalse(self.workItem.claimed)
+
+
+if __name__ == '__main__':
+    unittest.main()
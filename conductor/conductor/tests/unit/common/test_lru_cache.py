@@ -0,0 +1,77 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Test class for the LRU cache"""
+
+import unittest
+
+import mock
+
+from conductor.common import lru_cache
+import conductor.common.prometheus_metrics as PC
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = lru_cache.LRUCache('test', 2, 10)
+
+    def test_lru_eviction(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.assertEqual(1, self.cache.get('a'))
+        self.cache.put('c', 3)
+        # b was the least recently used
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertEqual(3, self.cache.get('c'))
+        self.assertEqual(2, len(self.cache))
+
+    @mock.patch('time.time')
+    def test_ttl(self, mock_time):
+        mock_time.return_value = 100
+        self.cache.put('a', 1)
+        self.cache.put('b', 2, ttl=60)
+        mock_time.return_value = 110
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(2, self.cache.get('b'))
+        self.assertEqual(1, len(self.cache))
+
+    def test_disabled(self):
+        cache = lru_cache.LRUCache('test', 0, 10)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_metrics(self):
+        hits = PC.CACHE_LOOKUPS.labels('test', 'hit')
+        misses = PC.CACHE_LOOKUPS.labels('test', 'miss')
+        hit_count = hits._value.get()
+        miss_count = misses._value.get()
+        self.cache.put('a', 1)
+        self.cache.get('a')
+        self.cache.get('b')
+        self.assertEqual(hit_count + 1, hits._value.get())
+        self.assertEqual(miss_count + 1, misses._value.get())
+        self.assertEqual(1, PC.CACHE_SIZE.labels('test')._value.get())
+        self.cache.clear()
+        self.assertEqual(0, PC.CACHE_SIZE.labels('test')._value.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Test class for the adaptive poller"""
+
+import unittest
+
+import mock
+from oslo_config import cfg
+
+from conductor.common import poller
+
+
+class TestAdaptivePoller(unittest.TestCase):
+
+    def setUp(self):
+        cfg.CONF.set_override('max_interval', 8, 'polling')
+        cfg.CONF.set_override('backoff_factor', 2, 'polling')
+        self.poller = poller.AdaptivePoller(cfg.CONF, 'test', 1)
+
+    def tearDown(self):
+        cfg.CONF.clear_override('adaptive', 'polling')
+        cfg.CONF.clear_override('max_interval', 'polling')
+        cfg.CONF.clear_override('backoff_factor', 'polling')
+
+    def test_fixed_interval(self):
+        cfg.CONF.set_override('adaptive', False, 'polling')
+        self.assertEqual(1, self.poller.record(True))
+        self.assertEqual(1, self.poller.record(False))
+        self.assertEqual(1, self.poller.record(False))
+
+    def test_adaptive_interval(self):
+        cfg.CONF.set_override('adaptive', True, 'polling')
+        self.assertEqual(0, self.poller.record(True))
+        self.assertEqual(0, self.poller.record(True))
+        idle = [self.poller.record(False) for _ in range(6)]
+        self.assertEqual([1, 2, 4, 8, 8, 8], idle)
+        self.assertEqual(0, self.poller.record(True))
+        self.assertEqual(1, self.poller.record(False))
+
+    @mock.patch('time.sleep')
+    def test_wait(self, mock_sleep):
+        cfg.CONF.set_override('adaptive', True, 'polling')
+        self.poller.wait()
+        mock_sleep.assert_called_once_with(1)
+        mock_sleep.reset_mock()
+        self.poller.record(True)
+        self.poller.wait()
+        mock_sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
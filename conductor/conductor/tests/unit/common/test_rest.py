@@ -0,0 +1,74 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Test class for the REST helper"""
+
+import unittest
+
+import mock
+
+from conductor.common import rest
+
+
+class TestREST(unittest.TestCase):
+
+    def test_pool_options(self):
+        client = rest.REST(server_url='http://localhost:8080',
+                           pool_connections=2, pool_maxsize=25,
+                           pool_block=True, keep_alive=False,
+                           http_retries=2, name='test')
+        self.assertEqual(25, client.adapter._pool_maxsize)
+        self.assertEqual(2, client.adapter._pool_connections)
+        self.assertTrue(client.adapter._pool_block)
+        self.assertEqual(2, client.adapter.max_retries.total)
+        self.assertIs(client.adapter, client.session.get_adapter(
+            'https://localhost:8443'))
+        self.assertEqual('close', client.session.headers['Connection'])
+        self.assertEqual(0, client.pool_connection_count())
+
+        # Only connections returned to the pool are counted
+        pool = client.adapter.poolmanager.connection_from_url(
+            'https://localhost:8443')
+        pool.pool.get()
+        pool.pool.put(mock.MagicMock())
+        self.assertEqual(1, client.pool_connection_count())
+        pool.pool.get()
+        self.assertEqual(0, client.pool_connection_count())
+
+    def test_pool_kwargs(self):
+        conf = mock.MagicMock(pool_connections=1, pool_maxsize=2,
+                              pool_block=False, keep_alive=True,
+                              http_retries=0)
+        kwargs = rest.pool_kwargs(conf)
+        self.assertEqual(2, kwargs['pool_maxsize'])
+        client = rest.REST(server_url='http://localhost:8080', **kwargs)
+        self.assertEqual('keep-alive', client.session.headers['Connection'])
+
+    def test_request_timeout(self):
+        client = rest.REST(server_url='http://localhost:8080',
+                           connect_timeout=1, read_timeout=10, retries=1)
+        with mock.patch.object(client.session, 'get') as get_mock:
+            client.request(path='/a')
+            self.assertEqual((1.0, 10.0), get_mock.call_args[1]['timeout'])
+            client.request(path='/a', timeout=2)
+            self.assertEqual((1.0, 2.0), get_mock.call_args[1]['timeout'])
+
+
+if __name__ == '__main__':
+    unittest.main()
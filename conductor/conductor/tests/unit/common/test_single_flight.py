@@ -0,0 +1,99 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+"""Test class for single flight calls"""
+
+import threading
+import unittest
+
+import conductor.common.prometheus_metrics as PC
+from conductor.common import single_flight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = single_flight.SingleFlight(self.id())
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.count = 0
+
+    def _metric(self, result):
+        return PC.SINGLE_FLIGHT_CALLS.labels(self.id(), result)._value.get()
+
+    def _call(self, value):
+        self.count += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def _run(self, key, value, results):
+        try:
+            results.append(self.calls.do(key, self._call, value))
+        except ValueError as exc:
+            results.append(exc)
+
+    def _concurrent(self, value, callers=3):
+        results = []
+        leader = threading.Thread(target=self._run,
+                                  args=('key', value, results))
+        leader.start()
+        self.started.wait(5)
+        followers = [threading.Thread(target=self._run,
+                                      args=('key', 'other', results))
+                     for _ in range(callers - 1)]
+        for follower in followers:
+            follower.start()
+        while len(self.calls._calls['key'].done._cond._waiters) < \
+                len(followers):
+            threading.Event().wait(0.01)
+        self.release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+        return results
+
+    def test_coalesced(self):
+        self.assertEqual(['value'] * 3, self._concurrent('value'))
+        self.assertEqual(1, self.count)
+        self.assertEqual({}, self.calls._calls)
+        self.assertEqual(1, self._metric('issued'))
+        self.assertEqual(2, self._metric('coalesced'))
+
+        # calls after the first one completed are issued again
+        self.assertEqual('next', self.calls.do('key', self._call, 'next'))
+        self.assertEqual(2, self.count)
+
+    def test_error(self):
+        error = ValueError('failed')
+        self.assertEqual([error] * 3, self._concurrent(error))
+        self.assertEqual(1, self.count)
+        self.assertEqual({}, self.calls._calls)
+
+    def test_keys(self):
+        self.release.set()
+        self.assertEqual(1, self.calls.do('a', self._call, 1))
+        self.assertEqual(2, self.calls.do('b', self._call, 2))
+        self.assertEqual(2, self.count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+"""Test class for the plan work queue"""
+
+import threading
+import unittest
+
+import mock
+from oslo_config import cfg
+
+from conductor.common.models.plan import Plan
+from conductor.common.models.work_item import current_time_millis
+from conductor.common.models.work_item import WorkItem
+from conductor.common import work_queue
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        cfg.CONF.set_override('lease_duration', 60, 'work_queue')
+        cfg.CONF.set_override('claim_batch', 1, 'work_queue')
+        self.WorkItem = mock.MagicMock()
+        self.Plan = mock.MagicMock()
+        self.queue = work_queue.WorkQueue(cfg.CONF, self.WorkItem, self.Plan,
+                                          work_queue.SOLVER, owner='host.1')
+
+    def tearDown(self):
+        self.queue.stop()
+        cfg.CONF.clear_override('lease_duration', 'work_queue')
+        cfg.CONF.clear_override('claim_batch', 'work_queue')
+
+    @staticmethod
+    def _item(plan_id, owner=None, lease_expiry=None):
+        return WorkItem(stage=work_queue.SOLVER, plan_id=plan_id, owner=owner,
+                        lease_expiry=lease_expiry, _insert=False)
+
+    @staticmethod
+    def _plan(plan_id, status):
+        return mock.MagicMock(id=plan_id, status=status)
+
+    def test_stage_for_status(self):
+        self.assertEqual(work_queue.TRANSLATOR,
+                         work_queue.stage_for_status(Plan.TEMPLATE))
+        self.assertEqual(work_queue.SOLVER,
+                         work_queue.stage_for_status(Plan.TRANSLATED))
+        self.assertEqual(work_queue.RESERVATION,
+                         work_queue.stage_for_status(Plan.SOLVED))
+        self.assertIsNone(work_queue.stage_for_status(Plan.SOLVING))
+        self.assertIsNone(work_queue.stage_for_status(Plan.DONE))
+
+    def test_put(self):
+        self.queue.put('p1')
+        self.WorkItem.assert_called_once_with(stage=work_queue.SOLVER,
+                                              plan_id='p1')
+        self.queue.route(self._plan('p2', Plan.SOLVED))
+        self.WorkItem.assert_called_with(stage=work_queue.RESERVATION,
+                                         plan_id='p2')
+        self.WorkItem.reset_mock()
+        self.queue.route(self._plan('p3', Plan.DONE))
+        self.WorkItem.assert_not_called()
+
+    @mock.patch.object(WorkItem, 'update')
+    def test_claim(self, mock_update):
+        mock_update.return_value = 'SUCCESS'
+        leased = self._item('p1', 'host.2', current_time_millis() + 60000)
+        expired_at = current_time_millis() - 1
+        expired = self._item('p2', 'host.2', expired_at)
+        self.WorkItem.query.get_plan_by_col.return_value = [leased, expired]
+
+        claimed = self.queue.claim()
+        self.assertEqual([expired], claimed)
+        mock_update.assert_called_once_with(
+            condition={'owner': 'host.2',
+                       'lease_expiry': expired_at})
+        self.assertEqual('host.1', expired.owner)
+        self.assertTrue(expired.claimed)
+
+    @mock.patch.object(WorkItem, 'update')
+    def test_claim_lost(self, mock_update):
+        mock_update.return_value = 'FAILURE'
+        item = self._item('p1')
+        self.WorkItem.query.get_plan_by_col.return_value = [item]
+
+        self.assertEqual([], self.queue.claim())
+        self.assertEqual('', item.owner)
+        self.assertEqual(0, item.lease_expiry)
+
+    @mock.patch.object(WorkItem, 'update')
+    def test_claim_limit(self, mock_update):
+        mock_update.return_value = 'SUCCESS'
+        items = [self._item('p{}'.format(i)) for i in range(5)]
+        self.WorkItem.query.get_plan_by_col.return_value = items
+        self.assertEqual(3, len(self.queue.claim(limit=3)))
+
+    @mock.patch.object(WorkItem, 'update')
+    def test_renew(self, mock_update):
+        mock_update.return_value = 'SUCCESS'
+        item = self._item('p1', 'host.2', current_time_millis() + 1000)
+        self.assertFalse(self.queue.renew(item))
+        item.owner = 'host.1'
+        self.assertTrue(self.queue.renew(item))
+        self.assertTrue(item.lease_expiry > current_time_millis() + 50000)
+
+    @mock.patch.object(WorkItem, 'delete')
+    @mock.patch.object(WorkItem, 'update')
+    def test_claim_plans(self, mock_update, mock_delete):
+        mock_update.return_value = 'SUCCESS'
+        item = self._item('p1')
+        self.WorkItem.query.get_plan_by_col.return_value = [item]
+        the_plan = self._plan('p1', Plan.TRANSLATED)
+        self.Plan.query.get_plan_by_col.return_value = [the_plan]
+
+        self.assertEqual([the_plan], self.queue.claim_plans())
+        mock_delete.assert_not_called()
+
+        # The plan was solved, so the item is released on the next call
+        # and the plan is queued for reservation.
+        self.WorkItem.query.get_plan_by_col.return_value = []
+        self.Plan.query.get_plan_by_col.return_value = [
+            self._plan('p1', Plan.SOLVED)]
+        self.assertEqual([], self.queue.claim_plans())
+        mock_delete.assert_called_once_with()
+        self.WorkItem.assert_called_once_with(stage=work_queue.RESERVATION,
+                                              plan_id='p1')
+
+    @mock.patch.object(WorkItem, 'delete')
+    @mock.patch.object(WorkItem, 'update')
+    def test_claim_plans_in_progress(self, mock_update, mock_delete):
+        mock_update.return_value = 'SUCCESS'
+        self.WorkItem.query.get_plan_by_col.return_value = [self._item('p1')]
+        self.Plan.query.get_plan_by_col.return_value = [
+            self._plan('p1', Plan.SOLVING)]
+        self.queue.claim_plans()
+
+        # Still solving, the lease is kept and nothing is queued.
+        self.WorkItem.query.get_plan_by_col.return_value = []
+        self.assertEqual([], self.queue.claim_plans())
+        mock_delete.assert_not_called()
+        self.WorkItem.assert_not_called()
+
+    @mock.patch.object(WorkItem, 'delete')
+    @mock.patch.object(WorkItem, 'update')
+    def test_claim_plans_stale(self, mock_update, mock_delete):
+        mock_update.return_value = 'SUCCESS'
+        self.WorkItem.query.get_plan_by_col.return_value = [self._item('p1')]
+        self.Plan.query.get_plan_by_col.return_value = []
+        self.assertEqual([], self.queue.claim_plans())
+        mock_delete.assert_called_once_with()
+        self.WorkItem.assert_not_called()
+
+        # A plan that moved on is queued for its new stage, in case its
+        # last owner died before doing so.
+        self.WorkItem.query.get_plan_by_col.return_value = [self._item('p2')]
+        self.Plan.query.get_plan_by_col.return_value = [
+            self._plan('p2', Plan.SOLVED)]
+        self.assertEqual([], self.queue.claim_plans())
+        self.assertEqual(2, mock_delete.call_count)
+        self.WorkItem.assert_called_once_with(stage=work_queue.RESERVATION,
+                                              plan_id='p2')
+
+    @mock.patch.object(WorkItem, 'update')
+    def test_heartbeat(self, mock_update):
+        mock_update.return_value = 'SUCCESS'
+        self.WorkItem.query.get_plan_by_col.return_value = [self._item('p1')]
+        self.Plan.query.get_plan_by_col.return_value = [
+            self._plan('p1', Plan.TRANSLATED)]
+        with mock.patch.object(self.queue, '_start_heartbeat') as mock_start:
+            self.queue.claim_plans()
+        mock_start.assert_called_once_with()
+
+        # The lease of the plan worked on is renewed
+        item = self.queue._active[0][0]
+        item.lease_expiry = current_time_millis() + 1000
+        self.queue.heartbeat()
+        self.assertTrue(item.lease_expiry > current_time_millis() + 50000)
+
+        # Not anymore once the plan is settled
+        mock_update.reset_mock()
+        self.queue.settle()
+        self.queue.heartbeat()
+        mock_update.assert_not_called()
+
+    def test_heartbeat_thread(self):
+        cfg.CONF.set_override('lease_duration', 1, 'work_queue')
+        renewed = threading.Event()
+        with mock.patch.object(self.queue, 'heartbeat',
+                               side_effect=renewed.set):
+            self.queue._start_heartbeat()
+            self.assertTrue(renewed.wait(5))
+        self.queue.stop()
+        self.queue._heartbeat.join(5)
+        self.assertFalse(self.queue._heartbeat.is_alive())
+
+    def test_backfill(self):
+        self.WorkItem.query.get_plan_by_col.return_value = [self._item('p1')]
+        self.Plan.query.get_plan_by_col.side_effect = [
+            [self._plan('p1', Plan.TRANSLATED),
+             self._plan('p2', Plan.TRANSLATED)],
+            []]
+        self.queue.backfill()
+        self.WorkItem.assert_called_once_with(stage=work_queue.SOLVER,
+                                              plan_id='p2')
+
+
+if __name__ == '__main__':
+    unittest.main()
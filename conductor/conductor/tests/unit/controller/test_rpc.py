@@ -102,14 +102,16 @@ class TestRPCNoException(unittest.TestCase):
         self.assertEqual(plans, self.the_plan_expected)
         self.assertFalse(rtn_get.get('error'))
 
+    @patch('conductor.common.models.plan.Plan.delete_payloads')
     @patch('conductor.common.music.model.search.Query.all')
     @patch('conductor.common.music.model.base.Base.delete')
-    def test_plans_delete(self, mock_delete, mock_call):
+    def test_plans_delete(self, mock_delete, mock_call, mock_payloads):
         _id = {}
         mock_call.return_value = self.plan_mock
         rtn = self.r.plans_delete(self._cvx, _id)
         self.assertEqual(rtn.get('response'), {})
         self.assertFalse(rtn.get('error'))
+        self.assertEqual(len(self.plan_mock), mock_payloads.call_count)
 
     def tearDown(self):
         patch.stopall()
@@ -302,6 +302,49 @@ class TestNoExceptionTranslator(unittest.TestCase):
 
         self.assertEqual(self.Translator.parse_demands(demands), rtn)
 
+    @patch('conductor.common.music.messaging.component.RPCClient.call')
+    def test_parse_demands_concurrent(self, mock_call):
+        self.Translator._plan_id = "plan_id"
+        self.Translator._plan_name = "plan_name"
+        names = ['vG{}'.format(i) for i in range(5)]
+        demands = {name: [{"inventory_provider": "aai",
+                           "inventory_type": "cloud"}] for name in names}
+        dropped = {name: [{'name': name, 'translation_dropped': []}]
+                   for name in names}
+
+        def resolve(ctxt, method, args):
+            name = list(args['demands'])[0]
+            candidate = {'candidate_id': name}
+            # Each data worker returns the triage of the demands it has seen
+            return {'resolved_demands': {name: [candidate]},
+                    'trans': {'plan_id': 'plan_id',
+                              'plan_name': 'plan_name',
+                              'translator_triage': [dropped['vG0'],
+                                                    dropped[name]]}}
+        mock_call.side_effect = resolve
+
+        final_call = mock.MagicMock()
+        with mock.patch.object(self.Translator.triageTranslator,
+                               'thefinalCallTrans', final_call):
+            parsed = self.Translator.parse_demands(demands)
+        self.assertEqual(len(names), mock_call.call_count)
+        for name in names:
+            self.assertEqual([{'candidate_id': name}],
+                             parsed[name]['candidates'])
+        final_call.assert_called_once_with({
+            'plan_id': 'plan_id', 'plan_name': 'plan_name',
+            'translator_triage': [dropped[name] for name in names]})
+
+        # A demand without candidates still fails the translation
+        mock_call.side_effect = None
+        mock_call.return_value = {'resolved_demands': {}}
+        final_call.reset_mock()
+        with mock.patch.object(self.Translator.triageTranslator,
+                               'thefinalCallTrans', final_call):
+            self.assertRaises(TranslatorException,
+                              self.Translator.parse_demands, demands)
+        final_call.assert_called_once_with(None)
+
     def test_parse_constraints(self):
         constraints = {'constraint_loc': {
             'type': 'distance_to_location',
@@ -20,12 +20,18 @@
 import copy
 import json
 import mock
+import os
+import shutil
+import tempfile
+import time
 import unittest
 
 from oslo_config import cfg
 
+from conductor import service  # noqa: registers HPA_enabled
 import conductor.data.plugins.inventory_provider.aai as aai
 from conductor.data.plugins.inventory_provider.aai import AAI
+from conductor.data.plugins.inventory_provider import hpa_utils
 from conductor.data.plugins.inventory_provider.hpa_utils import match_hpa
 from conductor.data.plugins.triage_translator.triage_translator import TraigeTranslator
 
@@ -193,7 +199,9 @@ class TestAAI(unittest.TestCase):
              'physical_location_id': u'complex-id',
              'region': u'USA', 'service_resource_id': u'service-resource-id-123',
              'sriov_automation': 'false', 'state': u'NJ',
-             'flavors': flavor_info}]},
+             'flavor_catalog': {
+                 'cloud_region_id': 'region-name',
+                 'version': hpa_utils.get_fingerprint(flavor_info)}}]},
             self.aai_ep.resolve_demands(demands_list, plan_info=plan_info,
                                         triage_translator_data=triage_translator_data))
 
@@ -392,6 +400,29 @@ class TestAAI(unittest.TestCase):
         self.assertEqual("test-role",
                          self.aai_ep.check_candidate_role("candidate_host_id"))
 
+    def test_check_candidate_roles(self):
+        roles = {'host-1': 'ROLE-1', 'host-2': None}
+        with mock.patch.object(self.aai_ep, '_check_candidate_role',
+                               side_effect=roles.get) as mock_check:
+            self.assertEqual(roles, self.aai_ep.check_candidate_roles(
+                ['host-1', 'host-2', 'host-1']))
+            self.assertEqual(2, mock_check.call_count)
+
+            # Found roles are cached, missing ones looked up again
+            mock_check.reset_mock()
+            self.assertEqual(roles, self.aai_ep.check_candidate_roles(
+                ['host-1', 'host-2']))
+            mock_check.assert_called_once_with('host-2')
+
+    def test_check_network_roles_cache(self):
+        with mock.patch.object(self.aai_ep, '_check_network_roles',
+                               return_value={'region-1'}) as mock_check:
+            self.assertEqual({'region-1'},
+                             self.aai_ep.check_network_roles('role'))
+            self.assertEqual({'region-1'},
+                             self.aai_ep.check_network_roles('role'))
+            mock_check.assert_called_once_with('role')
+
     def test_match_inventory_attributes(self):
         template_attributes = dict()
         template_attributes['attr-1'] = ['attr-1-value1', 'attr-1-value2']
@@ -444,6 +475,333 @@ class TestAAI(unittest.TestCase):
         self.assertEqual(None,
                          self.aai_ep._refresh_cache())
 
+    @staticmethod
+    def _region(region_id, complex_id=None, resource_version=None):
+        data = {'cloud-region-id': region_id,
+                'cloud-region-version': '1.0',
+                'cloud-owner': 'owner',
+                'resource-version': resource_version}
+        if complex_id:
+            data['relationship-list'] = {'relationship': [{
+                'related-to': 'complex',
+                'related-link': '/aai/v10/complexes/complex/' + complex_id,
+                'relationship-data': [{
+                    'relationship-key': 'complex.physical-location-id',
+                    'relationship-value': complex_id}]}]}
+        return data
+
+    @staticmethod
+    def _complex(complex_link, complex_id=None, timeout=None):
+        if complex_id == 'c1':
+            return {'complex-name': complex_id, 'latitude': '1',
+                    'longitude': '2', 'city': 'city', 'country': 'US'}
+        raise IOError('timed out')
+
+    def test_refresh_cache_concurrent(self):
+        response = mock.MagicMock()
+        response.status_code = 200
+        response.json.return_value = {'cloud-region': [
+            self._region('r1', 'c1'), self._region('r2', 'c1'),
+            self._region('r3', 'c2'), self._region('r4')]}
+        mock.patch.object(AAI, '_request', return_value=response).start()
+
+        self.conf.set_override('cache_refresh_workers', 4, 'aai')
+        self.conf.set_override('cache_refresh_timeout', 5, 'aai')
+        self.conf.set_override('HPA_enabled', True)
+        self.addCleanup(self.conf.clear_override, 'cache_refresh_workers',
+                        'aai')
+        self.addCleanup(self.conf.clear_override, 'cache_refresh_timeout',
+                        'aai')
+        self.addCleanup(self.conf.clear_override, 'HPA_enabled')
+        complex_mock = mock.patch.object(
+            AAI, '_get_complex', side_effect=self._complex).start()
+        flavors_mock = mock.patch.object(
+            AAI, '_get_flavors', return_value={'flavor': []}).start()
+
+        old_cache = self.aai_ep._aai_cache
+        self.aai_ep._refresh_cache()
+
+        # Each complex is fetched once, with the refresh timeout
+        self.assertEqual(2, complex_mock.call_count)
+        for call in complex_mock.call_args_list:
+            self.assertEqual(5, call[1]['timeout'])
+        # Flavors are only fetched for regions that made it to the cache
+        self.assertEqual(['r1', 'r2'], sorted(
+            call[1]['cloud_region_id'] for call in flavors_mock.call_args_list))
+
+        regions = self.aai_ep._aai_cache['cloud_region']
+        self.assertIsNot(old_cache, self.aai_ep._aai_cache)
+        self.assertEqual(['r1', 'r2'], sorted(regions))
+        self.assertEqual('c1', regions['r2']['physical_location_id'])
+        self.assertEqual({'flavor': []}, regions['r1']['flavors'])
+
+        # Not refreshed again until the cache expires
+        complex_mock.reset_mock()
+        self.aai_ep._refresh_cache()
+        complex_mock.assert_not_called()
+
+    def test_refresh_cache_incremental(self):
+        response = mock.MagicMock()
+        response.status_code = 200
+        mock.patch.object(AAI, '_request', return_value=response).start()
+        complex_mock = mock.patch.object(
+            AAI, '_get_complex', side_effect=self._complex).start()
+        flavors_mock = mock.patch.object(
+            AAI, '_get_flavors', return_value={'flavor': []}).start()
+        self.conf.set_override('HPA_enabled', True)
+        self.addCleanup(self.conf.clear_override, 'HPA_enabled')
+
+        def refresh(*regions):
+            response.json.return_value = {'cloud-region': list(regions)}
+            complex_mock.reset_mock()
+            flavors_mock.reset_mock()
+            self.aai_ep.last_refresh_time = None
+            self.aai_ep._refresh_cache()
+            return self.aai_ep._aai_cache['cloud_region']
+
+        cache = refresh(self._region('r1', 'c1', '1'),
+                        self._region('r2', 'c1', '1'),
+                        self._region('r3', 'c1', '1'))
+        self.assertEqual(['r1', 'r2', 'r3'], sorted(cache))
+        self.assertEqual('1', cache['r1']['resource_version'])
+
+        # r1 unchanged, r2 changed, r3 gone, r4 new
+        r1 = cache['r1']
+        cache = refresh(self._region('r1', 'c1', '1'),
+                        self._region('r2', 'c1', '2'),
+                        self._region('r4', 'c1', '1'))
+        self.assertEqual(['r1', 'r2', 'r4'], sorted(cache))
+        self.assertIs(r1, cache['r1'])
+        self.assertEqual('2', cache['r2']['resource_version'])
+        self.assertEqual(1, complex_mock.call_count)
+        self.assertEqual(['r2', 'r4'], sorted(
+            call[1]['cloud_region_id'] for call in flavors_mock.call_args_list))
+
+        # With the default intervals, a scheduled refresh is incremental
+        self.aai_ep.last_full_refresh_time = time.time() - (
+            self.conf.aai.cache_refresh_interval * 60 + 1)
+        self.assertFalse(self.aai_ep._full_refresh_due())
+
+        # A full refresh fetches everything again
+        self.aai_ep.last_full_refresh_time = 1
+        cache = refresh(self._region('r1', 'c1', '1'))
+        self.assertIsNot(r1, cache['r1'])
+        self.assertEqual(1, flavors_mock.call_count)
+
+    def test_cache_snapshot(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'aai.snapshot')
+        self.conf.set_override('cache_snapshot_file', path, 'aai')
+        self.addCleanup(self.conf.clear_override,
+                        'cache_snapshot_file', 'aai')
+        flavors = {'flavor': [{'flavor-id': 'f1'}]}
+        cache = {'cloud_region': {'r1': {'cloud_owner': 'owner'},
+                                  'r2': {'flavors': flavors}},
+                 'service': {}}
+
+        def load_cache():
+            self.aai_ep._aai_cache = cache
+            self.aai_ep.last_refresh_time = time.time()
+            return True
+
+        mock.patch.object(AAI, '_load_cache', side_effect=load_cache).start()
+        self.aai_ep._refresh_cache()
+        self.assertTrue(os.path.exists(path))
+
+        # A new instance serves the snapshot without refreshing
+        mock.patch.object(AAI, '_init_python_request').start()
+        refresh_mock = mock.patch.object(AAI, '_refresh_cache').start()
+        aai_ep = AAI()
+        aai_ep.initialize()
+        refresh_mock.assert_not_called()
+        self.assertEqual(cache['cloud_region']['r1'],
+                         aai_ep._aai_cache['cloud_region']['r1'])
+        # Flavors of older snapshots are versioned when loaded
+        self.assertEqual(hpa_utils.get_fingerprint(flavors),
+                         aai_ep._aai_cache['cloud_region']['r2'][
+                             'flavors_version'])
+        self.assertEqual(self.aai_ep.last_refresh_time,
+                         aai_ep.last_refresh_time)
+
+        # unless it is too old
+        self.conf.set_override('cache_snapshot_max_age', 0, 'aai')
+        self.addCleanup(self.conf.clear_override,
+                        'cache_snapshot_max_age', 'aai')
+        aai_ep = AAI()
+        aai_ep.initialize()
+        refresh_mock.assert_called_once_with()
+        self.assertEqual({}, aai_ep._aai_cache)
+
+    def test_shared_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'aai.snapshot')
+        self.conf.set_override('cache_snapshot_file', path, 'aai')
+        self.conf.set_override('cache_shared', True, 'aai')
+        self.addCleanup(self.conf.clear_override,
+                        'cache_snapshot_file', 'aai')
+        self.addCleanup(self.conf.clear_override, 'cache_shared', 'aai')
+
+        leader = self.aai_ep
+        follower = AAI()
+        self.assertTrue(leader._is_cache_leader())
+        self.assertFalse(follower._is_cache_leader())
+        self.assertTrue(leader._is_cache_leader())
+
+        # The follower picks up each snapshot the leader saves
+        leader._aai_cache = {'cloud_region': {'r1': {}}, 'service': {}}
+        leader.last_refresh_time = time.time()
+        leader._save_snapshot()
+        follower._follow_snapshot()
+        self.assertEqual(leader._aai_cache, follower._aai_cache)
+        with mock.patch.object(aai.cache_snapshot, 'load') as load_mock:
+            follower._follow_snapshot()
+            load_mock.assert_not_called()
+
+        # and takes over when the leader is gone
+        leader._leader_file.close()
+        self.assertTrue(follower._is_cache_leader())
+        follower._leader_file.close()
+
+    def test_get_regions_stale_while_revalidate(self):
+        refresh_mock = mock.patch.object(AAI, '_refresh_cache').start()
+        start_mock = mock.patch.object(AAI, '_start_refresher').start()
+        self.aai_ep._aai_cache = {'cloud_region': {'r1': {}}}
+        self.aai_ep.last_refresh_time = 1
+
+        # Expired, but the snapshot is served without waiting
+        self.assertEqual({'r1': {}}, self.aai_ep._get_regions())
+        refresh_mock.assert_not_called()
+        start_mock.assert_called_once_with()
+
+        # Nothing to serve yet
+        self.aai_ep._aai_cache = {}
+        self.aai_ep._get_regions()
+        refresh_mock.assert_called_once_with()
+
+        self.conf.set_override('cache_background_refresh', False, 'aai')
+        self.addCleanup(self.conf.clear_override,
+                        'cache_background_refresh', 'aai')
+        self.aai_ep._aai_cache = {'cloud_region': {'r1': {}}}
+        self.aai_ep._get_regions()
+        self.assertEqual(2, refresh_mock.call_count)
+
+    def test_refresher(self):
+        stop = self.aai_ep._refresher_stop
+        refresh_mock = mock.patch.object(
+            AAI, '_refresh_cache', side_effect=lambda: stop.set()).start()
+        mock.patch.object(AAI, '_refresher_wait', return_value=0).start()
+
+        self.aai_ep._start_refresher()
+        thread = self.aai_ep._refresher_thread
+        self.aai_ep._start_refresher()
+        self.assertIs(thread, self.aai_ep._refresher_thread)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        refresh_mock.assert_called_once_with()
+
+    def test_refresher_follower(self):
+        stop = self.aai_ep._refresher_stop
+        refresh_mock = mock.patch.object(AAI, '_refresh_cache').start()
+        mock.patch.object(AAI, '_is_cache_leader', return_value=False).start()
+        follow_mock = mock.patch.object(
+            AAI, '_follow_snapshot', side_effect=lambda: stop.set()).start()
+
+        self.aai_ep._start_refresher()
+        self.aai_ep._refresher_thread.join(5)
+        follow_mock.assert_called_once_with()
+        refresh_mock.assert_not_called()
+
+    def test_refresher_wait(self):
+        self.conf.set_override('cache_refresh_retry_interval', 60, 'aai')
+        self.addCleanup(self.conf.clear_override,
+                        'cache_refresh_retry_interval', 'aai')
+        self.aai_ep.cache_refresh_interval = 10
+        self.assertEqual(60, self.aai_ep._refresher_wait())
+        self.aai_ep.last_refresh_time = time.time() - 60
+        self.assertAlmostEqual(540, self.aai_ep._refresher_wait(), delta=5)
+        # Retry a failed refresh later rather than right away
+        self.aai_ep.last_refresh_time = time.time() - 3600
+        self.assertEqual(60, self.aai_ep._refresher_wait())
+
+    def test_refresh_cache_metrics(self):
+        mock.patch.object(AAI, '_load_cache', return_value=False).start()
+        failures = aai.PC.AAI_CACHE_REFRESHES.labels('failure')
+        count = failures._value.get()
+        self.aai_ep._refresh_cache()
+        self.assertEqual(count + 1, failures._value.get())
+        self.assertEqual(0, self.aai_ep._cache_age())
+
+    def test_resolve_vnfs(self):
+        triage_data = {}
+        vnfs = [{'vnf-id': str(i)} for i in range(8)] + [{'vnf-id': '3'}]
+
+        def resolve_vnf(vnf, triage_translator_data):
+            vnf_id = int(vnf['vnf-id'])
+            # Later vnfs finish first
+            time.sleep((8 - vnf_id) * 0.01)
+            if vnf_id % 2:
+                dropped = triage_translator_data['dropped_candidates'][0]
+                dropped['translation_dropped'].append(
+                    {'candidate_id': vnf['vnf-id'], 'location_id': '',
+                     'reason': 'dropped'})
+                return []
+            return [vnf['vnf-id']]
+
+        with mock.patch.object(self.aai_ep.triage_translator,
+                               'collectDroppedCandiate') as collect_mock:
+            results = self.aai_ep._resolve_vnfs(resolve_vnf, vnfs, 'vG',
+                                                triage_data)
+        self.assertEqual([['0'], [], ['2'], [], ['4'], [], ['6'], []],
+                         results)
+        self.assertEqual(['1', '3', '5', '7'], [
+            call[0][0] for call in collect_mock.call_args_list])
+        self.assertIs(triage_data, collect_mock.call_args[0][3])
+
+    def test_request_object_cache(self):
+        self.aai_ep.rest = mock.MagicMock()
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = {'hostname': 'a'}
+        self.aai_ep.rest.request.return_value = response
+
+        self.assertIs(response, self.aai_ep._request(path='/pserver',
+                                                     cache_ttl=30))
+        cached = self.aai_ep._request(path='/pserver', cache_ttl=30)
+        self.assertIsInstance(cached, aai.CachedResponse)
+        self.assertEqual(200, cached.status_code)
+        self.assertEqual(1, self.aai_ep.rest.request.call_count)
+
+        # Callers get their own copy of the cached body
+        cached.json()['hostname'] = 'b'
+        self.assertEqual({'hostname': 'a'}, cached.json())
+
+        # Not cached: no cache_ttl, other methods, bodies and failures
+        self.aai_ep._request(path='/pserver')
+        self.aai_ep._request(method='put', path='/pserver', cache_ttl=30)
+        self.aai_ep._request(path='/pserver', data={}, cache_ttl=30)
+        self.assertEqual(4, self.aai_ep.rest.request.call_count)
+        response.status_code = 404
+        self.aai_ep._request(path='/vserver', cache_ttl=30)
+        self.aai_ep._request(path='/vserver', cache_ttl=30)
+        self.assertEqual(6, self.aai_ep.rest.request.call_count)
+
+    def test_request_single_flight(self):
+        self.aai_ep.rest = mock.MagicMock()
+        response = mock.MagicMock(status_code=200)
+        self.aai_ep.rest.request.return_value = response
+        self.aai_ep._calls = mock.MagicMock()
+        self.aai_ep._calls.do.side_effect = \
+            lambda key, function, *args: function(*args)
+
+        self.assertIs(response, self.aai_ep._request(path='/pserver'))
+        self.assertEqual('/pserver', self.aai_ep._calls.do.call_args[0][0])
+
+        # Only GET requests are shared
+        self.aai_ep._request(method='put', path='/pserver', data={})
+        self.assertEqual(1, self.aai_ep._calls.do.call_count)
+        self.assertEqual(2, self.aai_ep.rest.request.call_count)
+
     def test_get_aai_rel_link(self):
 
         relatonship_response_file = './conductor/tests/unit/data/plugins/inventory_provider/relationship_list.json'
@@ -726,6 +1084,74 @@ tenant/3c6c471ada7747fe8ff7f28e100b61e8/vservers/vserver/00bddefc-126e-4e4f-a18d
         self.assertEqual(None, match_hpa(candidate_json['candidate_list'][1],
                                                      feature_json[5]))
 
+    def test_get_flavor_index(self):
+        flavor_json_file = \
+            './conductor/tests/unit/data/plugins/inventory_provider/hpa_flavors.json'
+        flavors = json.loads(open(flavor_json_file).read())
+        entry = {'flavors': flavors}
+        self.aai_ep._aai_cache = {'cloud_region': {'region-1': entry}}
+        candidate = {'candidate_id': 'region-1',
+                     'flavors': copy.deepcopy(flavors)}
+
+        index = self.aai_ep._get_flavor_index(candidate)
+        self.assertEqual(flavors['flavor'], index.flavors)
+        self.assertIs(index, self.aai_ep._get_flavor_index(candidate))
+
+        # Rebuilt when a refresh replaced the region
+        self.aai_ep._aai_cache = {'cloud_region': {'region-1': dict(entry)}}
+        self.assertIsNot(index, self.aai_ep._get_flavor_index(candidate))
+
+        # Not used for flavors other than the cached ones
+        candidate['flavors'] = {'flavor': flavors['flavor'][:1]}
+        self.assertIsNone(self.aai_ep._get_flavor_index(candidate))
+        candidate['candidate_id'] = 'region-2'
+        self.assertIsNone(self.aai_ep._get_flavor_index(candidate))
+
+    def test_flavor_catalog_reference(self):
+        flavor_json_file = \
+            './conductor/tests/unit/data/plugins/inventory_provider/hpa_flavors.json'
+        flavors = json.loads(open(flavor_json_file).read())
+        region = {'flavors': flavors}
+        self.aai_ep._aai_cache = {'cloud_region': {'region-1': region}}
+
+        self.assertEqual({'flavors': flavors},
+                         self.aai_ep.resolve_flavors_for_region(flavors))
+        reference = self.aai_ep.resolve_flavors_for_region(
+            flavors, 'region-1', region)
+        self.assertEqual({'flavor_catalog': {
+            'cloud_region_id': 'region-1',
+            'version': hpa_utils.get_fingerprint(flavors)}}, reference)
+        self.assertNotIn('flavors_version', region)
+
+        # HPA matching dereferences the catalog in the cache
+        candidate = dict(reference, candidate_id='candidate-1')
+        index = self.aai_ep._get_flavor_index(candidate)
+        self.assertEqual(flavors['flavor'], index.flavors)
+        self.assertEqual(reference['flavor_catalog']['version'],
+                         index.fingerprint)
+        feature_json_file = \
+            './conductor/tests/unit/data/plugins/inventory_provider/hpa_req_features.json'
+        feature_json = json.loads(open(feature_json_file).read())
+        self.assertEqual(
+            match_hpa(dict(candidate, flavors=flavors), feature_json[0]),
+            match_hpa(candidate, feature_json[0], index))
+
+        # A reference to flavors that changed since is moved to the
+        # current ones
+        changed = {'flavor': flavors['flavor'][:1]}
+        self.aai_ep._set_cache({'cloud_region': {'region-1': {
+            'flavors': changed,
+            'flavors_version': hpa_utils.get_fingerprint(changed)}}})
+        self.assertEqual({}, self.aai_ep._flavor_indexes)
+        index = self.aai_ep._get_flavor_index(candidate)
+        self.assertEqual(changed['flavor'], index.flavors)
+        self.assertEqual(hpa_utils.get_fingerprint(changed),
+                         candidate['flavor_catalog']['version'])
+
+        self.aai_ep._set_cache({'cloud_region': {}})
+        self.assertEqual({}, self.aai_ep._flavor_indexes)
+        self.assertIsNone(self.aai_ep._get_flavor_index(candidate))
+
     def test_filter_nssi_candidates(self):
         nssi_response_file = './conductor/tests/unit/data/plugins/inventory_provider/nssi_response.json'
         nssi_response = json.loads(open(nssi_response_file).read())
@@ -0,0 +1,62 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from conductor.data.plugins.inventory_provider.utils import cache_snapshot
+
+
+class TestCacheSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'aai', 'cache.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_load(self):
+        snapshot = {'cache': {'cloud_region': {'r1': {'cloud_owner': 'o'}}},
+                    'last_refresh_time': 1.5}
+        cache_snapshot.save(self.path, snapshot)
+        self.assertEqual(snapshot, cache_snapshot.load(self.path))
+        self.assertEqual(['cache.snapshot'],
+                         os.listdir(os.path.dirname(self.path)))
+
+        snapshot['last_refresh_time'] = 2.5
+        cache_snapshot.save(self.path, snapshot)
+        self.assertEqual(snapshot, cache_snapshot.load(self.path))
+
+    def test_load_missing_or_corrupt(self):
+        self.assertIsNone(cache_snapshot.load(self.path))
+        with open(os.path.join(self.directory, 'bad'), 'wb') as bad:
+            bad.write(b'{}')
+        self.assertIsNone(
+            cache_snapshot.load(os.path.join(self.directory, 'bad')))
+        with open(os.path.join(self.directory, 'bad'), 'wb') as bad:
+            bad.write(cache_snapshot.HEADER + b'not zlib')
+        self.assertIsNone(
+            cache_snapshot.load(os.path.join(self.directory, 'bad')))
+
+
+if __name__ == '__main__':
+    unittest.main()
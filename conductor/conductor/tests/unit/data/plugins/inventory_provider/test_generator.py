@@ -20,7 +20,9 @@
 import unittest
 import json
 from mock import patch
+from oslo_config import cfg
 
+from conductor.data.plugins.inventory_provider import generator as gen
 from conductor.data.plugins.inventory_provider.generator import Generator
 
 
@@ -31,6 +33,9 @@ class TestGenerator(unittest.TestCase):
 
     def tearDown(self):
         patch.stopall()
+        cfg.CONF.clear_override('max_slice_profile_candidates', 'generator')
+        cfg.CONF.clear_override('slice_profile_sampling', 'generator')
+        cfg.CONF.clear_override('vectorized_validation', 'generator')
 
     def test_generate_candidate(self):
 
@@ -83,3 +88,77 @@ class TestGenerator(unittest.TestCase):
                 del candidate['candidate_id']
 
         self.assertEqual(expected_resolved_demands, resolved_demands)
+
+    def test_iter_valid_combinations(self):
+        service_profile = {'latency': {'value': 30, 'operator': 'lte'},
+                           'throughput': {'value': 100, 'operator': 'gte'}}
+        subnets = {'core': {'latency': {'min': 5, 'max': 30, 'steps': 5},
+                            'throughput': {'values': [50, 100, 200]}},
+                   'ran': {'latency': {'min': 10, 'max': 40, 'steps': 10},
+                           'throughput': {'values': [100, 150]}}}
+
+        subnet_names, product = gen.get_combinations_from_dict(
+            {subnet: gen.organize_combinations(*gen.generate_combinations(attributes))
+             for subnet, attributes in subnets.items()})
+        expected = [combination for combination in gen.organize_combinations(subnet_names, product)
+                    if gen.is_valid(gen.get_slice_requirements(combination), service_profile)]
+
+        with patch.object(gen, 'is_valid', wraps=gen.is_valid) as is_valid:
+            combinations = list(gen.iter_valid_combinations(subnets, service_profile))
+
+        self.assertEqual(expected, [combination for combination, _ in combinations])
+        for combination, slice_requirements in combinations:
+            self.assertEqual(gen.get_slice_requirements(combination), slice_requirements)
+        # invalid partial combinations are not completed
+        self.assertLess(is_valid.call_count, len(product))
+
+    def test_generate_candidate_limit(self):
+        filtering_attributes = {
+            'service_profile': {'latency': {'value': 30, 'operator': 'lte'}},
+            'subnets': {'core': {'latency': {'min': 5, 'max': 30, 'steps': 5}},
+                        'ran': {'latency': {'min': 5, 'max': 30, 'steps': 5}}}
+        }
+        generator = Generator()
+        all_candidates = generator.generate_candidates('slice_profiles', filtering_attributes,
+                                                       candidate_uniqueness='true', default_fields={})
+        self.assertEqual(15, len(all_candidates))
+
+        cfg.CONF.set_override('max_slice_profile_candidates', 4, 'generator')
+        candidates = generator.generate_candidates('slice_profiles', filtering_attributes,
+                                                   candidate_uniqueness='true', default_fields={})
+        self.assertEqual([c['core_latency'] for c in all_candidates[:4]],
+                         [c['core_latency'] for c in candidates])
+
+        cfg.CONF.set_override('slice_profile_sampling', True, 'generator')
+        candidates = generator.generate_candidates('slice_profiles', filtering_attributes,
+                                                   candidate_uniqueness='true', default_fields={})
+        self.assertEqual(4, len(candidates))
+        for candidate in candidates:
+            self.assertLessEqual(candidate['latency'], 30)
+
+    @unittest.skipIf(gen.np is None, 'NumPy is not installed')
+    def test_vectorized_validation(self):
+        service_profile = {'latency': {'value': 25, 'operator': 'lte'},
+                           'exp_data_rate_dl': {'value': 100, 'operator': 'gte'},
+                           'coverage_area_ta_list': {'value': 'City: Chennai', 'operator': 'eq'},
+                           'reliability': {'value': 99.99, 'operator': 'gte'}}
+        subnets = {'core': {'latency': {'min': 5, 'max': 30, 'steps': 5},
+                            'exp_data_rate_dl': {'values': [50, 100, 200]},
+                            'reliability': {'values': [99.9, 99.999]}},
+                   'tn': {'latency': {'min': 1, 'max': 10, 'steps': 3},
+                          'exp_data_rate_dl': {'values': [80, 120]},
+                          'coverage_area_ta_list': {'values': ['', 'City: Chennai', 'City: Delhi']}},
+                   'ran': {'latency': {'min': 10, 'max': 30, 'steps': 10},
+                           'exp_data_rate_dl': {'values': [100, 150]},
+                           'reliability': {'values': [99.99]},
+                           'coverage_area_ta_list': {'values': ['City: Chennai']}}}
+
+        cfg.CONF.set_override('vectorized_validation', False, 'generator')
+        expected = list(gen.iter_valid_combinations(subnets, service_profile))
+        self.assertNotEqual([], expected)
+
+        cfg.CONF.set_override('vectorized_validation', True, 'generator')
+        with patch.object(gen, 'may_be_valid') as may_be_valid:
+            combinations = list(gen.iter_valid_combinations(subnets, service_profile))
+        may_be_valid.assert_not_called()
+        self.assertEqual(expected, combinations)
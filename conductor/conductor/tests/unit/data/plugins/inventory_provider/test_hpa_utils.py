@@ -16,8 +16,14 @@
 #
 # -------------------------------------------------------------------------
 #
+import copy
+import json
 import unittest
 
+import mock
+import yaml
+
+from conductor.common import lru_cache
 from conductor.data.plugins.inventory_provider import hpa_utils
 
 
@@ -60,6 +66,117 @@ class TestHPAUtils(unittest.TestCase):
         self.assertEqual(True,
                          hpa_utils.match_all_operator(big_list, small_list))
 
+    def test_compare_attribute(self):
+        flavor_attr = hpa_utils._get_flavor_attribute(
+            {'hpa-attribute-value': '{"value": "4", "unit": "GB"}'})
+        self.assertEqual(('4294967296', 4 * 1024 ** 3), flavor_attr)
+        req_attr = {'operator': '>=', 'hpa-attribute-value': '4096',
+                    'unit': 'MB'}
+        self.assertTrue(hpa_utils._compare_attribute(
+            flavor_attr, hpa_utils._get_req_attribute(req_attr)))
+        req_attr['operator'] = '<'
+        self.assertFalse(hpa_utils._compare_attribute(
+            flavor_attr, hpa_utils._get_req_attribute(req_attr)))
+
+        flavor_attr = hpa_utils._get_flavor_attribute(
+            {'hpa-attribute-value': '{"value": "dedicated"}'})
+        self.assertTrue(hpa_utils._compare_attribute(
+            flavor_attr, ('=', 'dedicated', None)))
+        self.assertFalse(hpa_utils._compare_attribute(
+            flavor_attr, ('>', '4', 4)))
+        self.assertIsNone(hpa_utils._get_flavor_attribute(
+            {'hpa-attribute-value': '{value:4}'}))
+
+    def test_flavor_index(self):
+        path = './conductor/tests/unit/data/plugins/inventory_provider/'
+        flavors = json.loads(open(path + 'hpa_flavors.json').read())
+        features = json.loads(open(path + 'hpa_req_features.json').read())
+        index = hpa_utils.FlavorIndex(flavors['flavor'])
+        expected = set(
+            position for position, flavor in enumerate(flavors['flavor'])
+            for capability in flavor.get('hpa-capabilities', {}).get(
+                'hpa-capability', [])
+            if (capability['hpa-feature'], capability.get('architecture'),
+                capability.get('hpa-version')) ==
+            ('basicCapabilities', 'generic', 'v1'))
+        self.assertTrue(expected)
+        self.assertEqual(expected,
+                         index.find('basicCapabilities', 'generic', 'v1'))
+
+        # Matching with a prebuilt index gives the same results
+        candidate = {'flavors': flavors, 'vim-id': 'vim'}
+        for feature in features:
+            self.assertEqual(
+                hpa_utils.match_hpa(candidate, copy.deepcopy(feature)),
+                hpa_utils.match_hpa(candidate, copy.deepcopy(feature),
+                                    index))
+
+    def test_match_hpa_cache(self):
+        path = './conductor/tests/unit/data/plugins/inventory_provider/'
+        flavors = json.loads(open(path + 'hpa_flavors.json').read())
+        features = json.loads(open(path + 'hpa_req_features.json').read())
+        cache = lru_cache.LRUCache('test', 10, 60)
+        candidate = {'candidate_id': 'region-1', 'flavors': flavors}
+        index = hpa_utils.FlavorIndex(flavors['flavor'])
+        expected = hpa_utils.match_hpa(candidate, features[2])
+
+        with mock.patch.object(hpa_utils, 'HpaMatchProvider',
+                               wraps=hpa_utils.HpaMatchProvider
+                               ) as mock_match:
+            for _ in range(2):
+                result = hpa_utils.match_hpa(candidate, features[2],
+                                             index, cache)
+                self.assertEqual(expected, result)
+                result['directives'].append('modified')
+            self.assertEqual(1, mock_match.call_count)
+
+            # Unmatched requirements are cached as well
+            for _ in range(2):
+                self.assertIsNone(hpa_utils.match_hpa(
+                    candidate, features[3], index, cache))
+            self.assertEqual(2, mock_match.call_count)
+
+            # New flavors are matched again
+            index = hpa_utils.FlavorIndex(flavors['flavor'][:-1])
+            hpa_utils.match_hpa(candidate, features[2], index, cache)
+            self.assertEqual(3, mock_match.call_count)
+
+    @mock.patch.object(hpa_utils, 'match_hpa')
+    def test_get_hpa_flavor_mappings(self, mock_match):
+        candidate_list = yaml.safe_load(open(
+            './conductor/tests/unit/data/candidate_list.json'
+        ).read())['candidate_list']
+        hpa_json = yaml.safe_load(open(
+            './conductor/tests/unit/data/hpa_constraints.json').read())
+        constraint = list(
+            hpa_json["conductor_solver"]["constraints"][0].values())[0]
+        vm_labels = constraint['properties']['evaluate']
+        mock_match.return_value = {
+            'flavor_map': {'flavor-id': 'flavor-id1',
+                           'flavor-name': 'flavor-name1', 'score': 1},
+            'directives': []}
+
+        # Same result as matching the labels one by one
+        expected = copy.deepcopy(candidate_list)
+        for vm_label in copy.deepcopy(vm_labels):
+            vm_label['candidate_list'] = expected
+            hpa_utils.get_candidates_with_hpa(vm_label)
+        mappings = hpa_utils.get_hpa_flavor_mappings(
+            {'candidate_list': copy.deepcopy(candidate_list),
+             'vm_labels': copy.deepcopy(vm_labels)})
+        self.assertEqual([0, 1], [m['index'] for m in mappings])
+        self.assertEqual({'index': 0}, mappings[0])
+        self.assertEqual(2, mappings[1]['hpa_score'])
+        for mapping, candidate in zip(mappings, expected):
+            for key in hpa_utils.HPA_MAPPING_KEYS:
+                self.assertEqual(candidate.get(key), mapping.get(key))
+
+        # Candidates without a matching flavor are left out
+        mock_match.return_value = None
+        self.assertEqual([{'index': 0}], hpa_utils.get_hpa_flavor_mappings(
+            {'candidate_list': copy.deepcopy(candidate_list),
+             'vm_labels': copy.deepcopy(vm_labels)}))
+
 
 if __name__ == "__main__":
     unittest.main()
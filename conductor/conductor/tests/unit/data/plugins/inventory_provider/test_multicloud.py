@@ -40,6 +40,7 @@ class TestMultiCloud(unittest.TestCase):
 
     def tearDown(self):
         mock.patch.stopall()
+        cfg.CONF.clear_override('capacity_cache_ttl', 'multicloud')
 
     def test_initialize(self):
         self.mc_ep.initialize()
@@ -54,6 +55,8 @@ class TestMultiCloud(unittest.TestCase):
     @mock.patch.object(mc.LOG, 'info')
     @mock.patch('conductor.common.rest.REST.request')
     def test_check_vim_capacity(self, rest_mock, i_mock, d_mock, e_mock):
+        cfg.CONF.set_override('capacity_cache_ttl', 0, 'multicloud')
+        self.mc_ep = mc.MULTICLOUD()
         self.mc_ep.initialize()
         response = mock.MagicMock()
         response.status_code = 400
@@ -92,6 +95,41 @@ class TestMultiCloud(unittest.TestCase):
         rest_mock.return_value = response
         self.assertEqual(None, self.mc_ep.check_vim_capacity(vim_request))
 
+    @mock.patch('conductor.common.rest.REST.request')
+    def test_check_vim_capacity_cache(self, rest_mock):
+        self.mc_ep.initialize()
+        response = mock.MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"VIMs": ["vim-1"]}
+        rest_mock.return_value = response
+        vim_request = {
+            "vCPU": 10,
+            "Memory": {"quantity": "10", "unit": "GB"},
+            "Storage": {"quantity": "100", "unit": "GB"},
+            "VIMs": ["vim-1", "vim-2"]
+        }
+
+        self.assertEqual(['vim-1'], self.mc_ep.check_vim_capacity(vim_request))
+        vims = self.mc_ep.check_vim_capacity(
+            dict(vim_request, VIMs=["vim-2", "vim-1"]))
+        self.assertEqual(['vim-1'], vims)
+        self.assertEqual(1, rest_mock.call_count)
+
+        # results are copies of the cached one
+        vims.append('vim-2')
+        self.assertEqual(['vim-1'], self.mc_ep.check_vim_capacity(vim_request))
+
+        self.mc_ep.check_vim_capacity(dict(vim_request, vCPU=20))
+        self.assertEqual(2, rest_mock.call_count)
+
+        # failures are not cached
+        rest_mock.return_value = None
+        self.assertIsNone(self.mc_ep.check_vim_capacity(
+            dict(vim_request, VIMs=["vim-3"])))
+        self.assertIsNone(self.mc_ep.check_vim_capacity(
+            dict(vim_request, VIMs=["vim-3"])))
+        self.assertEqual(4, rest_mock.call_count)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,130 @@
+#
+# -------------------------------------------------------------------------
+#   Copyright (c) 2015-2017 AT&T Intellectual Property
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# -------------------------------------------------------------------------
+#
+
+
+"""Test class for the concurrent extension manager"""
+
+import threading
+import time
+import unittest
+
+import mock
+from oslo_config import cfg
+from stevedore import extension
+
+from conductor.conf import inventory_provider
+from conductor.data.plugins import extensions
+
+
+class Plugin(object):
+
+    def __init__(self, result, delay=0, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.threads = []
+
+    def resolve_demands(self, demands):
+        self.threads.append(threading.current_thread())
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {demands: [self.result]}
+
+
+class TestConcurrentManager(unittest.TestCase):
+
+    def setUp(self):
+        inventory_provider.register_extension_manager_opts()
+        cfg.CONF.set_override('map_timeout', 0.5, 'inventory_provider')
+
+    def tearDown(self):
+        cfg.CONF.clear_override('concurrent_map', 'inventory_provider')
+        cfg.CONF.clear_override('map_timeout', 'inventory_provider')
+        cfg.CONF.clear_override('extension_timeouts', 'inventory_provider')
+
+    def _manager(self, plugins, propagate=True):
+        manager = extensions.ConcurrentManager.make_test_instance(
+            [extension.Extension(name, None, None, plugin)
+             for name, plugin in plugins],
+            propagate_map_exceptions=propagate)
+        manager.group_conf = cfg.CONF.inventory_provider
+        return manager
+
+    def test_concurrent_map(self):
+        aai = Plugin('aai', delay=0.2)
+        generator = Plugin('generator', delay=0.2)
+        manager = self._manager([('aai', aai), ('generator', generator)])
+        start = time.time()
+        results = manager.map_method('resolve_demands', 'vG')
+        self.assertLess(time.time() - start, 0.35)
+        self.assertEqual([{'vG': ['aai']}, {'vG': ['generator']}], results)
+        self.assertNotEqual(aai.threads, generator.threads)
+
+        cfg.CONF.set_override('concurrent_map', False, 'inventory_provider')
+        results = manager.map_method('resolve_demands', 'vG')
+        self.assertEqual([{'vG': ['aai']}, {'vG': ['generator']}], results)
+        self.assertEqual(aai.threads[1], generator.threads[1])
+
+    def test_map_timeout(self):
+        cfg.CONF.set_override('extension_timeouts', {'generator': '0.1'},
+                              'inventory_provider')
+        manager = self._manager([('aai', Plugin('aai', delay=0.2)),
+                                 ('generator', Plugin('generator', delay=0.3))])
+        self.assertEqual(0.5, manager.timeout('aai'))
+        self.assertEqual(0.1, manager.timeout('generator'))
+        start = time.time()
+        self.assertEqual([{'vG': ['aai']}],
+                         manager.map_method('resolve_demands', 'vG'))
+        self.assertLess(time.time() - start, 0.3)
+
+        cfg.CONF.set_override('map_timeout', 0, 'inventory_provider')
+        self.assertIsNone(manager.timeout('aai'))
+
+    def test_map_exceptions(self):
+        plugins = [('aai', Plugin('aai', error=ValueError('failed'))),
+                   ('generator', Plugin('generator'))]
+        manager = self._manager(plugins)
+        self.assertRaises(ValueError, manager.map_method,
+                          'resolve_demands', 'vG')
+
+        manager = self._manager(plugins, propagate=False)
+        with mock.patch.object(extensions.LOG, 'exception') as log_mock:
+            self.assertEqual([{'vG': ['generator']}],
+                             manager.map_method('resolve_demands', 'vG'))
+        log_mock.assert_called_once()
+
+    def test_hung_extension(self):
+        cfg.CONF.set_override('extension_timeouts', {'generator': '0.1'},
+                              'inventory_provider')
+        hang = threading.Event()
+        self.addCleanup(hang.set)
+        generator = Plugin('generator')
+        generator.resolve_demands = lambda demands: hang.wait()
+        manager = self._manager([('aai', Plugin('aai', delay=0.2)),
+                                 ('generator', generator)])
+        for _ in range(3):
+            # Hung calls of earlier maps do not hold up the next ones
+            start = time.time()
+            self.assertEqual([{'vG': ['aai']}],
+                             manager.map_method('resolve_demands', 'vG'))
+            self.assertLess(time.time() - start, 0.4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -198,6 +198,18 @@ class TestDataEndpoint(unittest.TestCase):
                          self.data_ep.get_candidates_by_attributes(None,
                                                                    req_json))
 
+        # Replication roles of all hosts are looked up at once
+        req_json = yaml.safe_load(open(req_json_file).read())
+        req_json['properties']['evaluate'] = {
+            'replication_role': 'candidate-role0'}
+        candidate_list = copy.deepcopy(req_json['candidate_list'])
+        ext_mock1.reset_mock()
+        self.assertEqual({'response': candidate_list, 'error': False},
+                         self.data_ep.get_candidates_by_attributes(None,
+                                                                   req_json))
+        ext_mock1.assert_called_once_with('check_candidate_roles',
+                                          host_ids=['vnf_333', 'vnf_333'])
+
     @mock.patch.object(service.LOG, 'error')
     @mock.patch.object(service.LOG, 'debug')
     @mock.patch.object(service.LOG, 'info')
@@ -412,6 +424,9 @@ def ip_ext_sideeffect(*args, **kwargs):
             return ['DLLSTX55']
     elif args[0] == 'check_candidate_role':
         return ['candidate-role0']
+    elif args[0] == 'check_candidate_roles':
+        return [{host_id: 'CANDIDATE-ROLE0'
+                 for host_id in kwargs['host_ids']}]
 
 
 if __name__ == "__main__":
@@ -75,6 +75,69 @@ class TestReservationService(unittest.TestCase):
         reservation_list = list()
         self.assertEqual(True, self.service.rollback_reservation(reservation_list))
 
+    def test_index_candidates(self):
+        demands = {
+            'vG': {'candidates': [{'candidate_id': '1', 'cost': 1},
+                                  {'candidate_id': '2'},
+                                  {'candidate_id': '1', 'cost': 2}]},
+            'vGMuxInfra': {'candidates': [{'candidate_id': '1'}]},
+        }
+        index = self.service.index_candidates(demands, ['vG', 'vG', 'other'])
+        self.assertEqual({('vG', '1'), ('vG', '2')}, set(index))
+        self.assertEqual([1, 2], [c['cost'] for c in index[('vG', '1')]])
+        self.assertIs(demands['vG']['candidates'][1], index[('vG', '2')][0])
+
+    def _reservations(self, count):
+        return [{'candidate_list': [{'candidate_id': str(index)}],
+                 'reservation_name': 'name_{}'.format(index),
+                 'reservation_type': 'type',
+                 'controller': 'SDN-C',
+                 'request': {}} for index in range(count)]
+
+    def test_try_reservation_calls(self):
+        reservation_list = self._reservations(3)
+        with patch.object(self.service, 'try_reservation_call',
+                          side_effect=lambda **kwargs: kwargs[
+                              'reservation_name'] != 'name_1') as mock_call:
+            self.assertEqual([True, False, True],
+                             self.service.try_reservation_calls(
+                                 'reserve', reservation_list))
+        self.assertEqual(3, mock_call.call_count)
+        self.assertEqual(
+            ['name_0', 'name_1', 'name_2'],
+            sorted(call[1]['reservation_name']
+                   for call in mock_call.call_args_list))
+        for call in mock_call.call_args_list:
+            self.assertEqual('reserve', call[1]['method'])
+        self.assertEqual([], self.service.try_reservation_calls('reserve', []))
+
+    def test_executor(self):
+        executor = self.service.executor
+        self.assertEqual(self.conf.reservation.reserve_workers,
+                         executor._max_workers)
+        with patch.object(self.service, 'try_reservation_call',
+                          return_value=True):
+            self.service.try_reservation_calls(
+                'reserve', self._reservations(2))
+            self.service.rollback_reservation(self._reservations(2))
+        # One pool serves every plan until the service stops
+        self.assertIs(executor, self.service.executor)
+        self.assertTrue(executor.alive)
+        self.service._gracefully_stop()
+        self.assertFalse(executor.alive)
+
+    def test_rollback_reservation_failure(self):
+        reservation_list = self._reservations(3)
+        with patch.object(self.service, 'try_reservation_call',
+                          side_effect=lambda **kwargs: kwargs[
+                              'reservation_name'] != 'name_0') as mock_call:
+            self.assertFalse(
+                self.service.rollback_reservation(reservation_list))
+        # all the reservations are released, even after a failure
+        self.assertEqual(3, mock_call.call_count)
+        for call in mock_call.call_args_list:
+            self.assertEqual('release', call[1]['method'])
+
     @patch('conductor.common.music.model.base.Base.insert')
     @patch('conductor.common.music.model.search.Query.get_plan_by_col')
     @patch('conductor.common.music.model.base.Base.update')
@@ -99,6 +162,7 @@ class TestReservationService(unittest.TestCase):
         mock_restart.assert_called_once()
 
     def tearDown(self):
+        self.service.executor.shutdown()
         patch.stopall()
 
 
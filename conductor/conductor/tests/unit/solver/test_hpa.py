@@ -81,11 +81,23 @@ class TestHPA(unittest.TestCase):
                                               self.candidate_list,
                                               request_mock))
 
-        client_mock.call.side_effect = [hpa_candidate_list_1,
-                                        hpa_candidate_list_2]
-        self.assertEqual(hpa_candidate_list_2,
+        # All vm labels are matched in one call returning the mappings
+        client_mock.call.return_value = [
+            {'index': 1,
+             'flavor_map': hpa_candidate_list_2[1]['flavor_map']}]
+        self.assertEqual([hpa_candidate_list_2[1]],
                          self.hpa.solve(mock_decision_path,
                                         self.candidate_list, request_mock))
+        self.assertNotIn('flavor_map', self.candidate_list[1])
+        args = client_mock.call.call_args[1]['args']
+        self.assertEqual('get_hpa_flavor_mappings', args['method_name'])
+        self.assertEqual(
+            [vm_label['id'] for vm_label in self.hpa.properties['evaluate']],
+            [vm_label['id'] for vm_label in args['vm_labels']])
+        self.assertEqual(
+            [{key: candidate[key] for key in hpa.HPA_CANDIDATE_KEYS
+              if key in candidate} for candidate in self.candidate_list],
+            args['candidate_list'])
 
 
 if __name__ == "__main__":